@@ -1,6 +1,8 @@
 import re
 from os import path
 
+import pyarrow as pa
+
 from .config import VERSION as __version__
 
 # Exception
@@ -37,11 +39,38 @@ def file_path_parse(file_path: str) -> tuple:
     return (file_name, file_name_without_ext, file_ext)
 
 
-def get_xml_encoding(file_path):
-    """Read the XML encoding declaration, default to UTF-8"""
+def is_buffer(source) -> bool:
+    """Check if source is an in memory buffer: bytes, bytearray or memoryview"""
+
+    return isinstance(source, (bytes, bytearray, memoryview))
+
+
+def open_buffer(buffer):
+    """Binary file-like object reading the buffer, without copying it
+
+    Parameters:
+        in memory data (bytes | bytearray | memoryview): buffer
+
+    Returns:
+        zero-copy reader of the buffer (pyarrow.BufferReader): reader
+    """
+
+    return pa.BufferReader(pa.py_buffer(buffer))
+
+
+def get_xml_encoding(file_path_or_buffer):
+    """Read the XML encoding declaration, default to UTF-8
+
+    The XML is read from a file path or an in memory buffer
+    """
     # Read only the first 100 bytes or so for efficiency
-    with open(file_path, "rb") as f:
-        first_bytes = f.read(100).decode("ascii", errors="ignore")
+    if is_buffer(file_path_or_buffer):
+        first_bytes = bytes(memoryview(file_path_or_buffer)[:100])
+    else:
+        with open(file_path_or_buffer, "rb") as f:
+            first_bytes = f.read(100)
+
+    first_bytes = first_bytes.decode("ascii", errors="ignore")
 
     # Use a regex to match the encoding in the XML declaration
     match = re.search(r'encoding=["\'](.*?)["\']', first_bytes)
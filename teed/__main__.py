@@ -2,7 +2,7 @@ from typing import Optional
 
 import typer
 
-from . import bulkcm, config, meas
+from . import bulkcm, config, graph, index, meas, raml
 
 # Program
 
@@ -10,6 +10,9 @@ from . import bulkcm, config, meas
 program = typer.Typer()
 program.add_typer(bulkcm.program, name="bulkcm")
 program.add_typer(meas.program, name="meas")
+program.add_typer(raml.program, name="raml")
+program.add_typer(index.program, name="index")
+program.add_typer(graph.program, name="graph")
 
 # Helpers
 
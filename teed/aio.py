@@ -0,0 +1,492 @@
+import asyncio
+import multiprocessing
+import multiprocessing.connection
+from contextlib import aclosing
+from typing import AsyncIterator, Generator, List
+
+from teed import TeedException, bulkcm, meas
+
+# items sent per message by the generator jobs
+ITEMS_BATCH_SIZE = 1000
+
+# parsed nodes between the parse progress messages, see AsyncRunner.parse_progress
+PROGRESS_NODES = 10000
+
+# the connection of the job running in this process, see report
+_job_connection = None
+
+
+def serve(connection, func, args: tuple, kwargs: dict, batch_size: int):
+    """Run func in the job process and send its outcome through connection
+
+    The messages are (kind, value) tuples:
+
+    ("items", list) the items yielded by a generator func, batch_size at a time
+    ("progress", value) the values func sends with report
+    ("result", value) the func return value, or the generator return value
+    ("error", exception) the exception raised by func
+    """
+
+    global _job_connection
+    _job_connection = connection
+
+    try:
+        result = func(*args, **kwargs)
+
+        if isinstance(result, Generator):
+            items = result
+            batch = []
+            while True:
+                try:
+                    batch.append(next(items))
+                except StopIteration as stop:
+                    result = stop.value
+                    break
+
+                if len(batch) >= batch_size:
+                    connection.send(("items", batch))
+                    batch = []
+
+            if batch != []:
+                connection.send(("items", batch))
+
+        connection.send(("result", result))
+
+    except Exception as e:
+        try:
+            connection.send(("error", e))
+        except Exception:
+            # the exception can't be pickled, send it's message
+            connection.send(("error", TeedException(str(e))))
+
+    finally:
+        connection.close()
+
+
+def report(value):
+    """Send a progress value from the job function to the job coroutine
+
+    Outside of a job process the value is ignored.
+    """
+
+    if _job_connection is not None:
+        _job_connection.send(("progress", value))
+
+
+def report_nodes(stream: Generator, every: int) -> Generator:
+    """Adapter counting the nodes, or node batches, sent to stream
+
+    The count is reported, {"nodes": count}, every nodes and when the stream is closed.
+
+    Parameters:
+        nodes stream (Generator): stream
+        nodes between the reports (int): every
+    """
+
+    next(stream)
+
+    count = 0
+    reported = 0
+    try:
+        while True:
+            item = yield
+            stream.send(item)
+
+            count += len(item) if isinstance(item, list) else 1
+            if count - reported >= every:
+                report({"nodes": count})
+                reported = count
+
+    finally:
+        stream.close()
+        if count != reported:
+            report({"nodes": count})
+
+
+async def wait_readable(waitable):
+    """Wait, in the running event loop, until waitable is readable
+
+    A connection with a message to receive, or closed, and a process
+    sentinel once the process ends, are readable. The event loop watches
+    their file descriptor, no thread is used. The event loops without
+    add_reader, as the Windows proactor event loop, wait instead in an
+    executor thread with multiprocessing.connection.wait.
+
+    Parameters:
+        connection or process sentinel (Connection | int): waitable
+    """
+
+    loop = asyncio.get_running_loop()
+    readable = loop.create_future()
+    fd = waitable if isinstance(waitable, int) else waitable.fileno()
+
+    def set_readable():
+        if not readable.done():
+            readable.set_result(None)
+
+    try:
+        loop.add_reader(fd, set_readable)
+    except NotImplementedError:
+        await loop.run_in_executor(None, multiprocessing.connection.wait, [waitable])
+        return
+
+    try:
+        await readable
+    finally:
+        loop.remove_reader(fd)
+
+
+def parse_to_format(
+    file_uri: str,
+    output_dir_or_bucket: str,
+    output_format: str = "csv",
+    include_elements: list = [],
+    exclude_elements: list = [],
+    type_map: dict = None,
+    sample_size: int = 1000,
+    backend: str = "lxml",
+    batch_size: int = bulkcm.NODES_BATCH_SIZE,
+    where: list = [],
+    progress_nodes: int = 0,
+) -> tuple:
+    """bulkcm.parse with the stream created in the job process from output_format
+
+    With progress_nodes the parsed nodes count is reported, see report_nodes.
+    """
+
+    stream = bulkcm.create_stream(
+        output_format, output_dir_or_bucket, file_uri, type_map, sample_size
+    )
+    if progress_nodes > 0:
+        stream = report_nodes(stream, progress_nodes)
+
+    return bulkcm.parse(
+        file_uri,
+        output_dir_or_bucket,
+        stream,
+        include_elements,
+        exclude_elements,
+        backend=backend,
+        batch_size=batch_size,
+        where=where,
+    )
+
+
+def meas_parse_to_format(
+    pathname: str,
+    output_dir_or_bucket: str,
+    recursive: bool = False,
+    output_format: str = "csv",
+    dn_index: str = None,
+    producers: int = 1,
+):
+    """meas.parse with the consumer chosen in the job process from output_format"""
+
+    if output_format not in meas.CONSUMERS:
+        raise TeedException(f"Error, unknown output format {output_format}")
+
+    meas.parse(
+        pathname,
+        output_dir_or_bucket,
+        recursive,
+        consume=meas.CONSUMERS[output_format],
+        consume_kwargs={} if dn_index is None else {"dn_index": dn_index},
+        producers=producers,
+    )
+
+
+class AsyncRunner:
+    """Run the teed parsers from asyncio code without blocking the event loop
+
+    Each job runs in its own process, the event loop only waits for
+    the messages sent back by the process, watching the connection file
+    descriptor, no executor thread is held by the jobs, except on the
+    event loops without add_reader, see wait_readable. At most
+    max_concurrency jobs run at the same time, the others wait for a free slot.
+
+    Cancelling a job, or closing an async iterator, terminates its process.
+    An async for left early closes it's iterator when garbage collected,
+    contextlib.aclosing closes it as the loop is left. Closing the runner
+    terminates the processes of all the running jobs.
+    SIGTERM lets meas.parse stop its consumer in an orderly way.
+
+    async with AsyncRunner(max_concurrency=2) as runner:
+        metadata, duration = await runner.parse(file_uri, "data", output_format="parquet")
+
+        async for mo in runner.iter_nodes(file_uri, include_elements=["UtranCell"], exclude_elements=["*"]):
+            print(mo.dn_string)
+
+        async for progress in runner.parse_progress(file_uri, "data"):
+            print(progress["nodes"])
+
+    Parameters:
+        maximum number of concurrent jobs (int): max_concurrency
+        multiprocessing start method, spawn, fork or forkserver (str): start_method
+    """
+
+    def __init__(self, max_concurrency: int = 4, start_method: str = "spawn"):
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self._context = multiprocessing.get_context(start_method)
+        self._processes = set()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self.close()
+
+    def close(self):
+        """Terminate the processes of the running jobs"""
+
+        for process in list(self._processes):
+            if process.is_alive():
+                process.terminate()
+
+    async def run(self, func, *args, **kwargs):
+        """Run func(*args, **kwargs) in a job process and return its result
+
+        func, the arguments and the result must be picklable.
+
+        Raise:
+            the exception raised by func, TeedException if the process dies
+        """
+
+        result = None
+        async for kind, value in self._messages(func, args, kwargs, ITEMS_BATCH_SIZE):
+            if kind == "result":
+                result = value
+
+        return result
+
+    async def iterate(
+        self, func, *args, batch_size: int = ITEMS_BATCH_SIZE, **kwargs
+    ) -> AsyncIterator:
+        """Run the generator function func(*args, **kwargs) in a job process
+
+        and yield its items as they're received, batch_size at a time.
+        """
+
+        async with aclosing(self._messages(func, args, kwargs, batch_size)) as messages:
+            async for kind, value in messages:
+                if kind == "items":
+                    for item in value:
+                        yield item
+
+    async def probe(self, file_uri: str, elements: list = None) -> dict:
+        """Async bulkcm.probe"""
+
+        if elements is None:
+            return await self.run(bulkcm.probe, file_uri)
+
+        return await self.run(bulkcm.probe, file_uri, elements)
+
+    async def parse(
+        self,
+        file_uri: str,
+        output_dir_or_bucket: str,
+        output_format: str = "csv",
+        include_elements: list = [],
+        exclude_elements: list = [],
+        type_map: dict = None,
+        sample_size: int = 1000,
+        backend: str = "lxml",
+        batch_size: int = bulkcm.NODES_BATCH_SIZE,
+        where: list = [],
+    ) -> tuple:
+        """Async bulkcm.parse
+
+        The stream, a generator, can't be sent to the job process,
+        it's created there from output_format, one of bulkcm.OUTPUT_FORMATS.
+
+        Returns:
+            bulkcm metadata and parsing duration (tuple): metadata, duration
+        """
+
+        return await self.run(
+            parse_to_format,
+            file_uri,
+            output_dir_or_bucket,
+            output_format,
+            include_elements,
+            exclude_elements,
+            type_map,
+            sample_size,
+            backend,
+            batch_size,
+            where,
+        )
+
+    async def parse_progress(
+        self,
+        file_uri: str,
+        output_dir_or_bucket: str,
+        output_format: str = "csv",
+        include_elements: list = [],
+        exclude_elements: list = [],
+        type_map: dict = None,
+        sample_size: int = 1000,
+        backend: str = "lxml",
+        batch_size: int = bulkcm.NODES_BATCH_SIZE,
+        where: list = [],
+        every: int = PROGRESS_NODES,
+    ) -> AsyncIterator:
+        """Async bulkcm.parse, yields the progress as the parse goes
+
+        {"nodes": count} the nodes parsed so far, about every nodes
+        apart, counted in node batches of batch_size. The last progress
+        also has the parse "metadata" and "duration".
+        """
+
+        nodes = 0
+        async with aclosing(
+            self._messages(
+                parse_to_format,
+                (
+                    file_uri,
+                    output_dir_or_bucket,
+                    output_format,
+                    include_elements,
+                    exclude_elements,
+                    type_map,
+                    sample_size,
+                    backend,
+                    batch_size,
+                    where,
+                    every,
+                ),
+                {},
+                ITEMS_BATCH_SIZE,
+            )
+        ) as messages:
+            async for kind, value in messages:
+                if kind == "progress":
+                    nodes = value["nodes"]
+                    yield value
+                elif kind == "result":
+                    metadata, duration = value
+                    yield {"nodes": nodes, "metadata": metadata, "duration": duration}
+
+    async def split(
+        self,
+        file_path_or_uri: str,
+        output_dir_or_bucket: str,
+        subnetworks: List[str] = [],
+        byte_range: bool = False,
+    ) -> AsyncIterator:
+        """Async bulkcm.split_by_subnetwork, or split_by_byte_range with byte_range,
+
+        yields each (sn_id, sn_file_path)
+        """
+
+        async with aclosing(
+            self.iterate(
+                bulkcm.split_by_byte_range if byte_range else bulkcm.split_by_subnetwork,
+                file_path_or_uri,
+                output_dir_or_bucket,
+                subnetworks,
+                batch_size=1,
+            )
+        ) as sns:
+            async for sn in sns:
+                yield sn
+
+    async def iter_nodes(
+        self,
+        file_uri_or_stream,
+        include_elements: list = [],
+        exclude_elements: list = [],
+        where: list = [],
+    ) -> AsyncIterator:
+        """Async bulkcm.iter_nodes, yields the nodes as ManagedObject records
+
+        file_uri_or_stream is a file_uri or in memory bytes,
+        file-like objects can't be sent to the job process.
+        """
+
+        async with aclosing(
+            self.iterate(
+                bulkcm.iter_nodes,
+                file_uri_or_stream,
+                include_elements,
+                exclude_elements,
+                where=where,
+            )
+        ) as mos:
+            async for mo in mos:
+                yield mo
+
+    async def meas_parse(
+        self,
+        pathname: str,
+        output_dir_or_bucket: str,
+        recursive: bool = False,
+        output_format: str = "csv",
+        dn_index: str = None,
+        producers: int = 1,
+    ):
+        """Async meas.parse, output_format is one of meas.CONSUMERS
+
+        dn_index is the path of a teed.index.DnIndex file, see meas.consume_to_csv
+        producers is the number of processes parsing the files, see meas.parse
+        """
+
+        await self.run(
+            meas_parse_to_format,
+            pathname,
+            output_dir_or_bucket,
+            recursive,
+            output_format,
+            dn_index,
+            producers,
+        )
+
+    async def _messages(self, func, args, kwargs, batch_size):
+        """Start the job process and yield the messages it sends"""
+
+        async with self._semaphore:
+            receiver, sender = self._context.Pipe(duplex=False)
+            process = self._context.Process(
+                target=serve,
+                name=getattr(func, "__name__", "job"),
+                args=(sender, func, args, kwargs, batch_size),
+            )
+            process.start()
+            self._processes.add(process)
+
+            # only the job process writes, once it ends recv raises EOFError
+            sender.close()
+
+            done = False
+            try:
+                while True:
+                    await wait_readable(receiver)
+                    try:
+                        kind, value = receiver.recv()
+                    except EOFError:
+                        await wait_readable(process.sentinel)
+                        process.join()
+                        raise TeedException(
+                            f"Error, job process {process.name} exited with code {process.exitcode}"
+                        )
+
+                    if kind == "error":
+                        raise value
+
+                    if kind == "result":
+                        done = True
+
+                    yield kind, value
+
+                    if done:
+                        break
+
+            finally:
+                # cancelled, failed or closed before the result
+                if not done and process.is_alive():
+                    process.terminate()
+
+                receiver.close()
+                if process.is_alive():
+                    await wait_readable(process.sentinel)
+                process.join()
+                self._processes.discard(process)
@@ -0,0 +1,271 @@
+import re
+from typing import List, NamedTuple
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import yaml
+
+from teed import TeedException
+
+# Class.attribute operator value, UtranCell.qQualMin == -18
+EXPRESSION_PATTERN = re.compile(
+    r"^\s*([^.\s]+)\.(\S+)\s+(==|!=|<=|>=|<|>|not in|in)\s+(.+?)\s*$"
+)
+
+# expression operators and their Arrow compute kernels
+OPERATORS = {
+    "==": pc.equal,
+    "!=": pc.not_equal,
+    "<": pc.less,
+    "<=": pc.less_equal,
+    ">": pc.greater,
+    ">=": pc.greater_equal,
+    "in": lambda values, value_set: pc.is_in(values, value_set=value_set),
+    "not in": lambda values, value_set: pc.invert(pc.is_in(values, value_set=value_set)),
+}
+
+# the violations table schema
+VIOLATION_SCHEMA = pa.schema(
+    [
+        pa.field("rule", pa.string()),
+        pa.field("severity", pa.string()),
+        pa.field("class", pa.string()),
+        pa.field("dn", pa.string()),
+        pa.field("attribute", pa.string()),
+        pa.field("value", pa.string()),
+        pa.field("expected", pa.string()),
+    ]
+)
+
+
+class Expression(NamedTuple):
+    """A Class.attribute operator value comparison"""
+
+    class_name: str
+    attribute: str
+    operator: str
+    value: object
+    text: str
+
+
+class Rule(NamedTuple):
+    """An audit rule, the check of the class rows matching all the when expressions"""
+
+    name: str
+    check: Expression
+    when: List[Expression]
+    severity: str
+
+    @property
+    def class_name(self) -> str:
+        return self.check.class_name
+
+
+def parse_expression(text: str) -> Expression:
+    """Parse a Class.attribute operator value expression
+
+    The value is a YAML scalar, or a YAML list for in and not in:
+
+    UtranCell.qQualMin == -18
+    UtranCell.userLabel != Gbg
+    UtranCell.uarfcnDl in [10812, 10837]
+
+    Raise:
+        TeedException
+    """
+
+    match = EXPRESSION_PATTERN.match(text)
+    if match is None:
+        raise TeedException(
+            f"Error, invalid expression {text}, expected Class.attribute operator value"
+        )
+
+    class_name, attribute, operator, value = match.groups()
+    value = yaml.safe_load(value)
+
+    if operator in ("in", "not in") and not isinstance(value, list):
+        raise TeedException(f"Error, invalid expression {text}, {operator} needs a list")
+
+    return Expression(class_name, attribute, operator, value, text.strip())
+
+
+def load_rules(rules) -> List[Rule]:
+    """Load the audit rules from a YAML rule set file path, or from it's content
+
+    rules:
+      - name: qQualMin golden value
+        check: UtranCell.qQualMin == -18
+        when: UtranCell.uarfcnDl == 10837
+        severity: major
+
+    when, optional, is an expression or a list of expressions of the same class.
+
+    Raise:
+        TeedException
+    """
+
+    if isinstance(rules, str):
+        try:
+            with open(rules, "r") as yaml_file:
+                rules = yaml.safe_load(yaml_file)
+        except (OSError, yaml.YAMLError) as e:
+            raise TeedException(f"Error, can't load the rules {rules}: {e}")
+
+    if isinstance(rules, dict):
+        rules = rules.get("rules")
+
+    if not isinstance(rules, list):
+        raise TeedException("Error, the rule set needs a rules list")
+
+    loaded = []
+    for i, rule in enumerate(rules):
+        if not isinstance(rule, dict) or "check" not in rule:
+            raise TeedException(f"Error, rule #{i + 1} needs a check")
+
+        check = parse_expression(rule["check"])
+        when = rule.get("when", [])
+        when = [
+            parse_expression(text) for text in ([when] if isinstance(when, str) else when)
+        ]
+
+        for expression in when:
+            if expression.class_name != check.class_name:
+                raise TeedException(
+                    f"Error, rule {rule.get('name', check.text)} when {expression.text} "
+                    f"isn't a {check.class_name} expression"
+                )
+
+        loaded.append(
+            Rule(
+                str(rule.get("name", check.text)),
+                check,
+                when,
+                str(rule.get("severity", "")),
+            )
+        )
+
+    return loaded
+
+
+def compare(table: pa.Table, expression: Expression) -> pa.Array:
+    """Evaluate the expression over the table column, nulls where there's no value
+
+    A column typed as string is compared to the value as text. A missing column
+    has only nulls.
+
+    Raise:
+        TeedException
+    """
+
+    if expression.attribute not in table.column_names:
+        return pa.nulls(table.num_rows, pa.bool_())
+
+    column = table.column(expression.attribute)
+    values = (
+        expression.value if isinstance(expression.value, list) else [expression.value]
+    )
+
+    if pa.types.is_string(column.type):
+        values = [
+            str(value).lower() if isinstance(value, bool) else str(value)
+            for value in values
+        ]
+
+    try:
+        value_set = pa.array(values).cast(column.type)
+    except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+        raise TeedException(
+            f"Error, can't compare {expression.text}, {expression.attribute} is {column.type}: {e}"
+        )
+
+    if isinstance(expression.value, list):
+        return OPERATORS[expression.operator](column, value_set)
+
+    return OPERATORS[expression.operator](column, value_set[0])
+
+
+def get_dn(table: pa.Table, class_name: str) -> pa.Array:
+    """The DN of each row, from the node path columns: up to the class column"""
+
+    key_columns = table.column_names[: table.column_names.index(class_name) + 1]
+
+    return pc.binary_join_element_wise(
+        *[
+            pc.binary_join_element_wise(f"{column}=", table.column(column), "")
+            for column in key_columns
+        ],
+        ",",
+        null_handling="skip",
+    )
+
+
+def evaluate(tables: dict, rules: List[Rule]) -> pa.Table:
+    """Evaluate the rules over the class tables, one vectorized pass per class
+
+    A row violates a rule when it matches all the when expressions
+    and the check is false or has no value.
+
+    Parameters:
+        Arrow tables by class name, as returned by bulkcm.parse_to_arrow (dict): tables
+        audit rules (list): rules
+
+    Returns:
+        the violations, rule, severity, class, dn, attribute, value and expected (pyarrow.Table): violations
+
+    Raise:
+        TeedException
+    """
+
+    class_rules = {}
+    for rule in rules:
+        class_rules.setdefault(rule.class_name, []).append(rule)
+
+    violations = []
+    for class_name, rules in class_rules.items():
+        table = tables.get(class_name)
+        if table is None or table.num_rows == 0:
+            continue
+
+        dn = get_dn(table, class_name)
+
+        for rule in rules:
+            applies = pa.array([True] * table.num_rows)
+            for expression in rule.when:
+                applies = pc.and_(
+                    applies, pc.fill_null(compare(table, expression), False)
+                )
+
+            failed = pc.and_(
+                applies, pc.invert(pc.fill_null(compare(table, rule.check), False))
+            )
+
+            count = pc.sum(failed).as_py() or 0
+            if count == 0:
+                continue
+
+            attribute = rule.check.attribute
+            values = (
+                pc.filter(table.column(attribute), failed).cast(pa.string())
+                if attribute in table.column_names
+                else pa.nulls(count, pa.string())
+            )
+
+            violations.append(
+                pa.table(
+                    [
+                        pa.array([rule.name] * count, pa.string()),
+                        pa.array([rule.severity] * count, pa.string()),
+                        pa.array([class_name] * count, pa.string()),
+                        pc.filter(dn, failed),
+                        pa.array([attribute] * count, pa.string()),
+                        values,
+                        pa.array([rule.check.text] * count, pa.string()),
+                    ],
+                    schema=VIOLATION_SCHEMA,
+                )
+            )
+
+    if violations == []:
+        return VIOLATION_SCHEMA.empty_table()
+
+    return pa.concat_tables(violations)
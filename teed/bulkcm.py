@@ -4,27 +4,77 @@
 # python -m teed bulkcm probe data/bulkcm_with_vsdatacontainer.xml
 
 import csv
+import fnmatch
 import hashlib
+import heapq
+import itertools
 import os
-from contextlib import ExitStack
+import pickle
+import re
+import tempfile
+import time
+from contextlib import ExitStack, nullcontext
 from copy import deepcopy
 from datetime import datetime
 from os import path
 from pprint import pprint
-from typing import Generator, List
+from typing import ContextManager, Generator, List, NamedTuple
+from xml.parsers import expat
 
 import typer
+import pyarrow as pa
+import pyarrow.compute as pc
 import pyarrow.fs as fs
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+from pyarrow import csv as arrow_csv
 from pyarrow.lib import ArrowInvalid
 
-from io import TextIOWrapper
+from io import BytesIO, TextIOWrapper
 import yaml
 from lxml import etree
 
-from teed import TeedException, file_path_parse, get_xml_encoding
+from teed import (
+    TeedException,
+    file_path_parse,
+    get_xml_encoding,
+    is_buffer,
+    open_buffer,
+)
+from teed.columnar import (
+    IPC_FORMATS,
+    BatchCollector,
+    ColumnarWriter,
+    IpcFileWriter,
+    ParquetFileWriter,
+    concat_tables,
+    format_value,
+    type_name,
+)
+from teed.audit import evaluate, load_rules
+from teed.catalog import SchemaCatalog
+from teed.profiling import HLL_PRECISION, TOP_K, Profiler
+from teed.sqlite import SqliteLoader
+from teed.tree import TreeBuilder
 
 program = typer.Typer()
 
+# XML parser backends driving the BulkCmParser target
+BACKENDS = ("lxml", "expat")
+EXPAT_BUFFER_SIZE = 1024 * 1024
+
+# bytes of the input parsed by each backend to choose the auto backend
+BACKEND_SAMPLE_SIZE = 1024 * 1024
+
+# parse output formats, see create_stream
+OUTPUT_FORMATS = ("csv", "parquet", "arrow", "sqlite", "tree")
+
+# nodes per batch sent by the BulkCmParser to the batch aware streams
+NODES_BATCH_SIZE = 1000
+
+# the DN dictionary table written by BulkCmParser.with_mo_ids
+MO_DN_TABLE = "mo_dn"
+
 
 def reverse_readline(filename, buf_size=8192):
     """A generator that returns the lines of a file in reverse order
@@ -66,6 +116,66 @@ def reverse_readline(filename, buf_size=8192):
             yield segment
 
 
+def get_localname(tag: str) -> str:
+    """Return the local name of a namespaced tag
+
+    Accepts the lxml Clark notation, {namespace}localname,
+    and the expat namespace_separator="}" notation, namespace}localname.
+
+    Cheaper than creating an etree.QName for every parser event.
+    """
+
+    return tag[tag.rfind("}") + 1 :]
+
+
+class Predicate(NamedTuple):
+    """A condition on a DN component or on an attribute value of a class
+
+    Parsed from the where expressions:
+
+    MeContext=RNC-Gbg*                     nodes under the MeContext ids matching RNC-Gbg*
+    UtranCell.administrativeState=LOCKED   UtranCell nodes with the attribute LOCKED
+    UtranCell.administrativeState!=LOCKED  UtranCell nodes with another, or no, value
+
+    The values are shell-style patterns, as in fnmatch: *, ?, [seq] and [!seq].
+    """
+
+    class_name: str
+    attribute: str  # None on DN component predicates
+    pattern: re.Pattern
+    negate: bool
+
+    def match(self, value: str) -> bool:
+        matched = value is not None and self.pattern.match(value) is not None
+        return matched != self.negate
+
+
+WHERE_PATTERN = re.compile(r"^\s*([^.=!\s]+)(?:\.([^=!\s]+))?\s*(!?=)(.*)$")
+
+
+def parse_predicate(where: str) -> Predicate:
+    """Parse a where expression, Class=pattern or Class.attribute=pattern, into a Predicate
+
+    Raise:
+        TeedException on malformed expressions
+    """
+
+    match = WHERE_PATTERN.match(where)
+    if match is None:
+        raise TeedException(
+            f"Error, invalid predicate {where}, use Class=pattern or Class.attribute=pattern"
+        )
+
+    class_name, attribute, operator, value = match.groups()
+
+    return Predicate(
+        class_name,
+        attribute,
+        re.compile(fnmatch.translate(value.strip())),
+        operator == "!=",
+    )
+
+
 class BulkCmParser:
     """The parser target object that receives
 
@@ -75,8 +185,25 @@ class BulkCmParser:
 
     and sends them to the stream.
 
+    With batch_size the nodes are sent in lists of up to batch_size nodes,
+    instead of one at a time. The stream must accept node lists, as the
+    BulkCmParser.stream_to_* generators do, or be wrapped by BulkCmParser.unbatched.
+
+    The where predicates, see Predicate, are evaluated in the parser.
+    A node whose DN component doesn't match is skipped together with its subtree,
+    the skipped elements aren't processed. The DN component of a vsData class
+    is matched once the VsDataContainer vsDataType is read. The nodes of a class with attribute
+    predicates are only sent when all of them match. All predicates must match.
+
+    In 32.616 delta files the nodes have a node_modifier, create, update or delete,
+    from their modifier attribute or inherited from the nearest ancestor with one.
+
     Parameters:
         nodes stream (Generator): stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        nodes per send, 0 sends one node at a time (int): batch_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
     """
 
     def __init__(
@@ -84,6 +211,8 @@ class BulkCmParser:
         stream: Generator,
         include_elements: list = [],
         exclude_elements: list = [],
+        batch_size: int = 0,
+        where: list = [],
     ):
         # bulkcm general file data
         self._metadata = {}
@@ -106,6 +235,10 @@ class BulkCmParser:
         self._is_vs_data = False
         self._vs_data_type = None
 
+        # nodes waiting to be sent in a batch
+        self._batch_size = batch_size
+        self._batch = []
+
         # move stream to the first yield
         # set it ready to receive nodes
         self._stream = stream
@@ -115,11 +248,33 @@ class BulkCmParser:
         self._include_elements = list(include_elements)
         self._exclude_elements = list(exclude_elements)
 
+        # DN component and attribute predicates by class name
+        self._dn_predicates = {}
+        self._attribute_predicates = {}
+        for predicate in map(parse_predicate, where):
+            predicates = (
+                self._dn_predicates
+                if predicate.attribute is None
+                else self._attribute_predicates
+            )
+            predicates.setdefault(predicate.class_name, []).append(predicate)
+
+        # depth inside a subtree skipped by a DN predicate
+        self._skip_depth = 0
+
+        # 32.616 delta modifiers (create, update or delete) of the node path,
+        # inherited from the ancestors when the node has none
+        self._modifiers = []
+
     def start(self, tag, attrib):
+        if self._skip_depth > 0:
+            self._skip_depth += 1
+            return
+
         # flow-control using the element tag local name
         # tag = {http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData1}configData
         # localname = configData
-        localname = etree.QName(tag).localname
+        localname = get_localname(tag)
 
         if localname == "attributes":
             # <xn:attributes>
@@ -147,19 +302,35 @@ class BulkCmParser:
             pass
 
         elif len(attrib) > 0:
+            node_id = attrib.get("id").strip()
+
+            if localname in self._dn_predicates and not all(
+                predicate.match(node_id) for predicate in self._dn_predicates[localname]
+            ):
+                # skip the node and its subtree
+                self._skip_depth = 1
+                return
+
             if "*" in self._exclude_elements and localname not in self._include_elements:
                 if localname not in self._exclude_elements:
                     self._exclude_elements.append(localname)
 
             self._node_queue.append(localname)
-            self._node_path[localname] = attrib.get("id").strip()
-            self._nodes.append(
-                {
-                    "node_name": localname,
-                    "node_path": deepcopy(self._node_path),
-                    "node_values": {},
-                }
-            )
+            self._node_path[localname] = node_id
+            node = {
+                "node_name": localname,
+                "node_path": dict(self._node_path),
+                "node_values": {},
+            }
+
+            modifier = attrib.get("modifier")
+            if modifier is None and self._modifiers != []:
+                modifier = self._modifiers[-1]
+            self._modifiers.append(modifier)
+            if modifier is not None:
+                node["node_modifier"] = modifier
+
+            self._nodes.append(node)
 
             if localname == "VsDataContainer":
                 self._is_vs_data = True
@@ -168,7 +339,11 @@ class BulkCmParser:
             self._node_queue.append(localname)
 
     def end(self, tag):
-        localname = etree.QName(tag).localname
+        if self._skip_depth > 0:
+            self._skip_depth -= 1
+            return
+
+        localname = get_localname(tag)
 
         if localname == "attributes":
             # </xn:attributes>
@@ -178,7 +353,8 @@ class BulkCmParser:
             if node["node_name"] not in self._exclude_elements:
                 # node.update(self._node_attributes)
                 node["node_values"] = self._node_attributes
-                self._stream.send(node)
+                if self._matches(node):
+                    self._send(node)
 
             self._node_attributes = {}
             self._is_attributes = False
@@ -197,10 +373,24 @@ class BulkCmParser:
 
             node = self._nodes[-1]
             node["node_name"] = vs_data_type
-            node["node_path"] = deepcopy(self._node_path)
+            node["node_path"] = dict(self._node_path)
 
             self._text = []
 
+            if vs_data_type in self._dn_predicates and not all(
+                predicate.match(vs_id) for predicate in self._dn_predicates[vs_data_type]
+            ):
+                # skip the rest of the VsDataContainer and its subtree
+                self._nodes.pop()
+                self._node_path.popitem()
+                self._modifiers.pop()
+                self._skip_depth = 2 if self._is_attributes else 1
+                self._node_attributes = {}
+                self._is_attributes = False
+                self._is_vs_data = False
+                self._vs_data_type = None
+                return
+
             if (
                 "*" in self._exclude_elements
                 and vs_data_type not in self._include_elements
@@ -229,6 +419,7 @@ class BulkCmParser:
 
             # end of node
             self._node_path.popitem()
+            self._modifiers.pop()
 
         else:
             node = self._node_queue.pop()
@@ -245,18 +436,25 @@ class BulkCmParser:
             else:
                 # end of node
                 self._node_path.popitem()
+                self._modifiers.pop()
 
             self._text = []
 
     def data(self, data):
-        self._text.append(data.strip())
+        if self._skip_depth == 0:
+            self._text.append(data.strip())
 
     def close(self):
         # send remaining nodes to stream
         for node in self._nodes:
             node_name = node.get("node_name")
-            if node_name not in self._exclude_elements:
-                self._stream.send(node)
+            if node_name not in self._exclude_elements and self._matches(node):
+                self._send(node)
+
+        # send the last, incomplete, batch
+        if self._batch != []:
+            self._stream.send(self._batch)
+            self._batch = []
 
         # send close signal to
         # the stream generator
@@ -264,435 +462,3192 @@ class BulkCmParser:
 
         return self._metadata
 
+    def _matches(self, node: dict) -> bool:
+        """Check the node values against its class attribute predicates"""
+
+        predicates = self._attribute_predicates.get(node["node_name"])
+        if predicates is None:
+            return True
+
+        return all(
+            predicate.match(node["node_values"].get(predicate.attribute))
+            for predicate in predicates
+        )
+
+    def _send(self, node: dict):
+        """Send the node to the stream, or add it to the batch"""
+
+        if self._batch_size == 0:
+            self._stream.send(node)
+            return
+
+        self._batch.append(node)
+        if len(self._batch) >= self._batch_size:
+            self._stream.send(self._batch)
+            self._batch = []
+
+    @staticmethod
+    def unbatched(stream: Generator) -> Generator[list, None, None]:
+        """Adapter receiving node batches and sending them, one at a time, to stream
+
+        Allows the streams consuming single nodes to be used with batch_size.
+
+        Parameters:
+            nodes stream (Generator): stream
+        """
+
+        next(stream)
+
+        try:
+            while True:
+                nodes = yield
+                for node in nodes:
+                    stream.send(node)
+
+        finally:
+            stream.close()
+
+    @staticmethod
+    def with_mo_ids(stream: Generator) -> Generator[dict, None, None]:
+        """Adapter replacing the nodes path by integer surrogate keys
+
+        Each managed object gets a dense integer id, in document order,
+        the node path columns are replaced by the mo_id and parent_mo_id columns.
+
+        The first time a managed object, or one of it's ancestors, is seen
+        a row is added to the MO_DN_TABLE dictionary table:
+        mo_id, parent_mo_id, class, id and dn. The root has no parent_mo_id.
+
+        receives node dict, or list of node dicts, and sends the same to stream
+
+        Parameters:
+            nodes stream (Generator): stream
+        """
+
+        # maps the (parent_mo_id, class, id) to it's mo_id, the key size
+        # doesn't grow with the node depth
+        mo_ids = {}
+
+        def to_mo_ids(node: dict, nodes: list):
+            path_items = tuple(node["node_path"].items())
+            parent_mo_id = None
+            mo_id = None
+
+            for depth, (class_name, id_value) in enumerate(path_items, 1):
+                key = (mo_id, class_name, id_value)
+                parent_mo_id = mo_id
+                mo_id = mo_ids.get(key)
+
+                if mo_id is None:
+                    mo_id = len(mo_ids)
+                    mo_ids[key] = mo_id
+                    nodes.append(
+                        {
+                            "node_name": MO_DN_TABLE,
+                            "node_path": {
+                                "mo_id": mo_id,
+                                "parent_mo_id": parent_mo_id,
+                                "class": class_name,
+                                "id": id_value,
+                            },
+                            "node_values": {
+                                "dn": ",".join(f"{k}={v}" for k, v in path_items[:depth]),
+                            },
+                        }
+                    )
+
+            node = dict(node)
+            node["node_path"] = {"mo_id": mo_id, "parent_mo_id": parent_mo_id}
+            nodes.append(node)
+
+        next(stream)
+
+        try:
+            while True:
+                item = yield
+                nodes = []
+
+                for node in item if isinstance(item, list) else [item]:
+                    to_mo_ids(node, nodes)
+
+                if isinstance(item, list):
+                    stream.send(nodes)
+                else:
+                    for node in nodes:
+                        stream.send(node)
+
+        finally:
+            stream.close()
+
     @staticmethod
     def stream_to_csv(
         output_dir_or_bucket,
         output_fs: fs.FileSystem = fs.LocalFileSystem(),
+        catalog: SchemaCatalog = None,
     ) -> Generator[dict, None, None]:
         """Serialization of nodes to csv files using generator
 
         creates the CSV file in the output directory
 
-        receives node dict by send/yield
+        receives node dict, or list of node dicts, by send/yield
 
         @@@ to be changed to producer/consumer using asyncio.Queue
         @@@ https://pymotw.com/3/asyncio/synchronization.html#queues
 
+        With a schema catalog the files are named after the catalog table id,
+        {node_name}-v{version}.csv, instead of the columns hash.
+
         Parameters:
             output directory (str): output_dir_or_bucket
             output filesystem (pyarrow.fs.FileSystem): output_fs
+            schema catalog, saved when the stream is closed (teed.catalog.SchemaCatalog): catalog
         """
 
-        writer = None
         writers = {}  # maps the node_key to it's writer
+        csv_streams = []
 
         try:
             while True:
-                node = yield
-                node_name = node.pop("node_name")
-                node_path = node.pop("node_path")
-                node_values = node.pop("node_values")
-                # @@@ this md5 hash is expensive, and runs for each node
-                # @@@ analyze and find a more efficient method
-                columns = list(node_path.keys()) + list(node_values.keys())
-                node_hash = hashlib.md5("".join(columns).encode()).hexdigest()
-                node_key = f"{node_name}-{node_hash}"
-
-                if node_key not in writers:
-                    # create new file
-                    # using mode w truncate existing files
-                    csv_path = output_fs.normalize_path(
-                        f"{output_dir_or_bucket}{path.sep}{node_name}-{node_hash}.csv"
-                    )
-                    csv_bstream = output_fs.open_output_stream(csv_path, compression=None)
+                item = yield
+                nodes = item if isinstance(item, list) else [item]
+
+                # rows by node_key, serialized with a single writerows
+                rows = {}
+
+                for node in nodes:
+                    node_name = node.pop("node_name")
+                    node_path = node.pop("node_path")
+                    node_values = node.pop("node_values")
+                    # @@@ this md5 hash is expensive, and runs for each node
+                    # @@@ analyze and find a more efficient method
+                    columns = list(node_path.keys()) + list(node_values.keys())
+                    if catalog is None:
+                        node_hash = hashlib.md5("".join(columns).encode()).hexdigest()
+                        node_key = f"{node_name}-{node_hash}"
+                    else:
+                        node_key = catalog.table_id(node_name, columns)
 
-                    print(f"Created {csv_path}")
-                    writer = csv.DictWriter(
-                        TextIOWrapper(csv_bstream), fieldnames=columns
-                    )
-                    writer.writeheader()
+                    if node_key not in writers:
+                        # create new file
+                        # using mode w truncate existing files
+                        csv_path = output_fs.normalize_path(
+                            f"{output_dir_or_bucket}{path.sep}{node_key}.csv"
+                        )
+                        csv_bstream = output_fs.open_output_stream(
+                            csv_path, compression=None
+                        )
+                        csv_stream = TextIOWrapper(csv_bstream)
+                        csv_streams.append(csv_stream)
 
-                    writers[node_key] = writer
+                        print(f"Created {csv_path}")
+                        writer = csv.DictWriter(csv_stream, fieldnames=columns)
+                        writer.writeheader()
 
-                else:
-                    # get previously created writer
-                    writer = writers.get(node_key)
+                        writers[node_key] = writer
 
-                node_path.update(node_values)
-                writer.writerow(node_path)
+                    node_path.update(node_values)
+                    rows.setdefault(node_key, []).append(node_path)
 
-        except StopIteration:
-            for writer in writers:
-                writer.close()
+                for node_key, node_rows in rows.items():
+                    writers[node_key].writerows(node_rows)
 
+        finally:
+            for csv_stream in csv_streams:
+                csv_stream.close()
 
-def parse(
-    file_uri: str,
-    output_dir_or_bucket: str,
-    stream: Generator,
-    include_elements: list = [],
-    exclude_elements: list = [],
-    output_fs: fs.FileSystem = fs.LocalFileSystem(),
-) -> tuple:
-    """Parse BulkCm file and place it's content in output directories CSV files
+            if catalog is not None:
+                catalog.save()
 
-    Parameters:
-        file_uri (str): file_uri
-        output directory (str): output_dir_or_bucket
-        send parsed nodes to stream (Generator): stream
-        elements to parse (list): include_elements
-        elements to ignore (list): exclude_elements
-        output filesystem (pyarrow.fs.FileSystem): output_fs
+    @staticmethod
+    def stream_to_parquet(
+        output_dir_or_bucket,
+        output_fs: fs.FileSystem = fs.LocalFileSystem(),
+        type_map: dict = None,
+        sample_size: int = 1000,
+        batch_size: int = 65536,
+        catalog: SchemaCatalog = None,
+    ) -> Generator[dict, None, None]:
+        """Serialization of nodes to parquet files using generator
 
-    Returns:
-        bulkcm metadata and parsing duration (dict, timedelta): (metadata, duration)
-    """
+        creates a parquet file per node name and columns in the output directory
 
-    try:
-        # create input filesystem and path from the uri
-        input_fs, input_path = fs.FileSystem.from_uri(file_uri)
-    except ArrowInvalid:
-        raise TeedException(f"Error, check if the {file_uri} uri exists .")
+        receives node dict, or list of node dicts, by send/yield
 
-    # check if the file exists in the filesystem
-    if input_fs.get_file_info(input_path).type == fs.FileType.NotFound:
-        raise TeedException(f"Error, {file_uri} doesn't exists")
+        The node path columns are strings, the attribute columns are typed.
+        Their type, integer, float, boolean or string, is taken from the type_map
+        or inferred from the first sample_size nodes of each file.
 
-    if output_fs.get_file_info(output_dir_or_bucket).type == fs.FileType.NotFound:
-        raise TeedException(
-            f"Error, output directory {output_dir_or_bucket} doesn't exists"
-        )
+        A value not fitting the inferred type widens the column (to float or string),
+        the data following it is written in a new part file:
+        {node_name}-{node_hash}-{part}.parquet
 
-    parser = etree.XMLParser(
-        target=BulkCmParser(stream, include_elements, exclude_elements),
-        no_network=True,
-        ns_clean=True,
-        remove_blank_text=True,
-        remove_comments=True,
-        remove_pis=True,
-        huge_tree=True,
-        recover=False,
-    )
+        Parameters:
+            output directory (str): output_dir_or_bucket
+            output filesystem (pyarrow.fs.FileSystem): output_fs
+            class -> attribute -> type name (dict): type_map
+            nodes used to infer the column types (int): sample_size
+            nodes per parquet row group (int): batch_size
+            schema catalog, names the files as in stream_to_csv (teed.catalog.SchemaCatalog): catalog
+        """
 
-    start = datetime.now()
+        def open_writer(node_name, node_key, part, schema):
+            suffix = "" if part == 0 else f"-{part}"
+            parquet_path = output_fs.normalize_path(
+                f"{output_dir_or_bucket}{path.sep}{node_key}{suffix}.parquet"
+            )
 
-    try:
-        # parse the BulkCm file
-        with input_fs.open_input_stream(input_path) as input_stream:
-            metadata = etree.parse(input_stream, parser)
+            print(f"Created {parquet_path}")
+            return ParquetFileWriter(parquet_path, schema, output_fs)
 
-        # output metadata
-        _, file_name_without_ext, _ = file_path_parse(file_uri)
-        metadata_file_path = output_fs.normalize_path(
-            f"{output_dir_or_bucket}{path.sep}{file_name_without_ext}_metadata.yml"
-        )
-        with output_fs.open_output_stream(metadata_file_path, compression=None) as out:
-            with TextIOWrapper(out) as tout:
-                yaml.dump(metadata, tout, default_flow_style=False)
+        writer = ColumnarWriter(open_writer, batch_size, sample_size, type_map)
 
-    except etree.XMLSyntaxError as e:
-        raise TeedException(e)
+        yield from BulkCmParser.stream_to_columnar(writer, catalog)
 
-    finish = datetime.now()
+    @staticmethod
+    def stream_to_arrow(
+        output_dir_or_bucket,
+        output_fs: fs.FileSystem = fs.LocalFileSystem(),
+        ipc_format: str = "file",
+        type_map: dict = None,
+        sample_size: int = 1000,
+        batch_size: int = 65536,
+        catalog: SchemaCatalog = None,
+    ) -> Generator[dict, None, None]:
+        """Serialization of nodes to Arrow IPC files using generator
 
-    return (metadata, finish - start)
+        creates an Arrow IPC file per node name and columns in the output directory:
+        {node_name}-{node_hash}.arrow for the file format (Feather V2)
+        or {node_name}-{node_hash}.arrows for the stream format
 
+        receives node dict, or list of node dicts, by send/yield
 
-@program.command(name="parse")
-def parse_program(
-    file_path_or_uri: str,
-    output_dir: str,
-    include_elements: List[str] = typer.Option(
-        [],
-        "--include-element",
-        "-ie",
-        help="Parse element",
-    ),
-    exclude_elements: List[str] = typer.Option(
-        [],
-        "--exlude-element",
-        "-ee",
-        help="Ignore element",
-    ),
-) -> None:
-    """Parse BulkCm file and place it's content in output directories CSV files
+        The file format can be memory mapped by the consumer without copying.
+        The stream format can be read while it's written, a named pipe (FIFO)
+        previously created with the file name receives the record batches.
 
-    Command-line program for bulkcm.parse function
+        The attribute columns are typed as in stream_to_parquet.
 
-    Parameters:
-        bulkcm file path (str): local file path or PyArrow URI
-        output directory (str): output_dir
-        elements to parse (list): include_elements
-        elements to ignore (list): exclude_elements
-    """
+        Parameters:
+            output directory (str): output_dir_or_bucket
+            output filesystem (pyarrow.fs.FileSystem): output_fs
+            IPC format, file or stream (str): ipc_format
+            class -> attribute -> type name (dict): type_map
+            nodes used to infer the column types (int): sample_size
+            nodes per record batch (int): batch_size
+            schema catalog, names the files as in stream_to_csv (teed.catalog.SchemaCatalog): catalog
+        """
 
-    print(f"Parsing {file_path_or_uri}")
+        if ipc_format not in IPC_FORMATS:
+            raise TeedException(f"Error, unknown IPC format {ipc_format}")
 
-    # check if file_path_or_uri is a local file path of a URI
-    if path.exists(file_path_or_uri):
-        file_uri = f"file://{path.abspath(file_path_or_uri)}"
-    else:
-        file_uri = file_path_or_uri
+        def open_writer(node_name, node_key, part, schema):
+            suffix = "" if part == 0 else f"-{part}"
+            ipc_path = output_fs.normalize_path(
+                f"{output_dir_or_bucket}{path.sep}{node_key}{suffix}{IPC_FORMATS[ipc_format]}"
+            )
 
-    try:
-        # stream to csv files
-        stream_csv = BulkCmParser.stream_to_csv(output_dir)
+            print(f"Created {ipc_path}")
+            return IpcFileWriter(ipc_path, schema, output_fs, ipc_format)
 
-        _, duration = parse(
-            file_uri,
-            output_dir,
-            stream_csv,
-            include_elements,
-            exclude_elements,
-        )
-        print(f"Duration: {duration}")
-    except TeedException as e:
-        typer.secho(f"Error parsing {file_path_or_uri}")
-        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
-        exit(1)
+        writer = ColumnarWriter(open_writer, batch_size, sample_size, type_map)
 
+        yield from BulkCmParser.stream_to_columnar(writer, catalog)
 
-def subnetwork_writer(
-    sn: etree._Element,
-    sn_file_path: str,
-    subnetwork_ids: list,
-    bulkCmConfigDataFile: dict,
-    fileHeader: dict,
-    configData: dict,
-    fileFooter: dict,
-    output_fs: fs.FileSystem,
-):
-    """Writes a SubNetwork to the output directory
+    @staticmethod
+    def stream_to_columnar(
+        writer: ColumnarWriter, catalog: SchemaCatalog = None
+    ) -> Generator[dict, None, None]:
+        """Serialization of nodes to a ColumnarWriter using generator
 
-    A new, valid, BulkCm file is created with a single SubNetwork
-    """
+        the table key is the node name and the columns hash, the node path
+        columns are the table key columns
 
-    with output_fs.open_output_stream(sn_file_path, compression=None) as out_stream:
-        with etree.xmlfile(out_stream, encoding=bulkCmConfigDataFile["encoding"]) as xf:
-            xf.write_declaration()
-            with xf.element("bulkCmConfigDataFile", nsmap=bulkCmConfigDataFile["nsmap"]):
-                if fileHeader is not None:
-                    xf.write(etree.Element("fileHeader", attrib=fileHeader["attrib"]))
+        receives node dict, or list of node dicts, by send/yield,
+        closes the writer when the stream is closed
 
-                with xf.element("configData", attrib=configData["attrib"]):
-                    # enter the xn:SubNetwork(s)
-                    with ExitStack() as stack:
-                        for sn_id in subnetwork_ids[:-1]:
-                            stack.enter_context(xf.element("xn:SubNetwork", id=sn_id))
+        Parameters:
+            columnar writer (teed.columnar.ColumnarWriter): writer
+            schema catalog, the table key is the catalog table id (teed.catalog.SchemaCatalog): catalog
+        """
 
-                        xf.write(sn)
+        try:
+            while True:
+                item = yield
+                nodes = item if isinstance(item, list) else [item]
+
+                for node in nodes:
+                    node_name = node.pop("node_name")
+                    node_path = node.pop("node_path")
+                    node_values = node.pop("node_values")
+                    columns = list(node_path.keys()) + list(node_values.keys())
+                    if catalog is None:
+                        node_hash = hashlib.md5("".join(columns).encode()).hexdigest()
+                        node_key = f"{node_name}-{node_hash}"
+                    else:
+                        node_key = catalog.table_id(node_name, columns)
+
+                    writer.write(
+                        node_key,
+                        node_name,
+                        columns,
+                        list(node_path.values()) + list(node_values.values()),
+                        key_columns=len(node_path),
+                    )
 
-                if fileFooter is not None:
-                    xf.write(etree.Element("fileFooter", attrib=fileFooter["attrib"]))
+        finally:
+            writer.close()
 
+            if catalog is not None:
+                catalog.save()
 
-def split_by_subnetwork(
-    file_path_or_uri: str, output_dir_or_bucket: str, subnetworks: list = []
-) -> Generator[tuple, None, None]:
-    """Search and write a SubNetwork(s) ElementTree to new file(s).
+    @staticmethod
+    def stream_to_sqlite(
+        db_path: str,
+        batch_size: int = 50000,
+        pragmas: dict = None,
+    ) -> Generator[dict, None, None]:
+        """Serialization of nodes to a SQLite database using generator
 
-    If subnetworks contains values, these are the SubNetwork id's
+        creates a table per node name, the node path columns are indexed after the load
 
-    which will be split to files. Other SubNetwork, not present in the list are to be ignore.
+        receives node dict, or list of node dicts, by send/yield
 
-    By default subnetworks is empty. All SubNetwork are to be processed and split to a respective file.
+        Parameters:
+            SQLite database file path (str): db_path
+            rows per insert batch (int): batch_size
+            pragmas applied to the connection, default to teed.sqlite.DEFAULT_PRAGMAS (dict): pragmas
+        """
 
-    Parameters:
-        bulkcm file path (str): file_path
-        output directory (str): output_dir_or_bucket
+        loader = SqliteLoader(db_path, batch_size, pragmas)
+
+        try:
+            while True:
+                item = yield
+                nodes = item if isinstance(item, list) else [item]
+
+                for node in nodes:
+                    node_name = node.pop("node_name")
+                    node_path = node.pop("node_path")
+                    node_values = node.pop("node_values")
+
+                    loader.insert(
+                        node_name,
+                        list(node_path.keys()) + list(node_values.keys()),
+                        list(node_path.values()) + list(node_values.values()),
+                        key_columns=len(node_path),
+                    )
+
+        finally:
+            loader.close()
+
+    @staticmethod
+    def stream_to_profiler(profiler: Profiler) -> Generator[dict, None, None]:
+        """Profiling of the nodes attributes using generator
+
+        receives node dict, or list of node dicts, by send/yield
+
+        Parameters:
+            attributes profiler (teed.profiling.Profiler): profiler
+        """
+
+        while True:
+            item = yield
+            nodes = item if isinstance(item, list) else [item]
+
+            for node in nodes:
+                profiler.add(node)
+
+    @staticmethod
+    def stream_to_tree(
+        tree_file_path: str,
+        output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    ) -> Generator[dict, None, None]:
+        """Serialization of the nodes containment tree to an Arrow file using generator
+
+        only the node paths are kept, the tree is written when the stream is closed,
+        see teed.tree.MoTree
+
+        receives node dict, or list of node dicts, by send/yield
+
+        Parameters:
+            tree Arrow file path (str): tree_file_path
+            output filesystem (pyarrow.fs.FileSystem): output_fs
+        """
+
+        builder = TreeBuilder()
+
+        try:
+            while True:
+                item = yield
+                nodes = item if isinstance(item, list) else [item]
+
+                for node in nodes:
+                    builder.add(node["node_path"])
+
+        except GeneratorExit:
+            builder.build().save(tree_file_path, output_fs)
+            raise
+
+
+def parse_expat(input_stream, target, buffer_size: int = EXPAT_BUFFER_SIZE):
+    """Drive a parser target object with the expat parser
+
+    The expat events are delivered to the target start, end and data methods,
+    as lxml does with the XMLParser target. The tags are reported as
+    namespace}localname, the namespace_separator being "}".
+
+    The text is buffered (buffer_text) so each element text is delivered
+    in a single data call, up to buffer_size.
+
+    Parameters:
+        binary input stream (BinaryIO): input_stream
+        parser target object (BulkCmParser): target
+        input chunk and text buffer size (int): buffer_size
+
+    Returns:
+        the target close method result
+
+    Raise:
+        TeedException
+    """
+
+    parser = create_expat_parser(target, buffer_size)
+
+    try:
+        while True:
+            chunk = input_stream.read(buffer_size)
+            if not chunk:
+                break
+
+            parser.Parse(chunk, False)
+
+        parser.Parse(b"", True)
+
+    except expat.ExpatError as e:
+        raise TeedException(
+            f"{expat.ErrorString(e.code)}, line {e.lineno}, column {e.offset}"
+        )
+
+    return target.close()
+
+
+def create_expat_parser(target, buffer_size: int = EXPAT_BUFFER_SIZE):
+    """Create the expat parser delivering the BulkCm events to target"""
+
+    parser = expat.ParserCreate(namespace_separator="}")
+    parser.buffer_text = True
+    parser.buffer_size = buffer_size
+    parser.StartElementHandler = target.start
+    parser.EndElementHandler = target.end
+    parser.CharacterDataHandler = target.data
+
+    return parser
+
+
+def create_xml_parser(target) -> etree.XMLParser:
+    """Create the lxml parser delivering the BulkCm events to target"""
+
+    return etree.XMLParser(
+        target=target,
+        no_network=True,
+        ns_clean=True,
+        remove_blank_text=True,
+        remove_comments=True,
+        remove_pis=True,
+        huge_tree=True,
+        recover=False,
+    )
+
+
+def parse_target(input_stream, target, backend: str = "lxml"):
+    """Drive a parser target object with the backend XML parser
+
+    lxml: etree.XMLParser(target=...) the default, also used by probe and split
+    expat: the python standard library xml.parsers.expat, see parse_expat
+    auto: the fastest on the first BACKEND_SAMPLE_SIZE bytes, see choose_backend
+
+    Parameters:
+        binary input stream (BinaryIO): input_stream
+        parser target object (BulkCmParser): target
+        XML parser backend, lxml, expat or auto (str): backend
+
+    Returns:
+        the target close method result
+
+    Raise:
+        TeedException
+    """
+
+    if backend == "auto":
+        # the sample is parsed again, as the start of the input
+        sample = input_stream.read(BACKEND_SAMPLE_SIZE)
+        backend = choose_backend(sample)
+        input_stream = PrefixedReader(sample, input_stream)
+
+    if backend == "expat":
+        return parse_expat(input_stream, target)
+
+    elif backend != "lxml":
+        raise TeedException(
+            f"Error, unknown parser backend {backend}, use one of {', '.join(BACKENDS)} or auto"
+        )
+
+    try:
+        return etree.parse(input_stream, create_xml_parser(target))
+    except etree.XMLSyntaxError as e:
+        raise TeedException(e)
+
+
+def stream_to_nothing():
+    """Stream discarding the nodes, the parsing is measured alone"""
+
+    while True:
+        yield
+
+
+class PrefixedReader:
+    """Binary file-like object reading prefix bytes, then the rest of in_stream
+
+    Parameters:
+        bytes already read from in_stream (bytes): prefix
+        binary input stream (BinaryIO): in_stream
+    """
+
+    def __init__(self, prefix: bytes, in_stream):
+        self._prefix = memoryview(prefix)
+        self._in_stream = in_stream
+
+    def read(self, size: int = -1) -> bytes:
+        if len(self._prefix) == 0:
+            return self._in_stream.read(size)
+
+        chunk = bytes(self._prefix if size < 0 else self._prefix[:size])
+        self._prefix = self._prefix[len(chunk) :]
+
+        if size < 0:
+            return chunk + self._in_stream.read()
+        return chunk
+
+
+def choose_backend(sample: bytes, backends: list = BACKENDS, repeat: int = 2) -> str:
+    """The backend parsing sample fastest, the start of a BulkCm file
+
+    The sample is fed to each backend parser without ending the document,
+    it may stop at any byte. As benchmark, the best of repeat durations
+    counts. A backend failing on the sample isn't chosen, lxml is returned
+    when every backend fails.
+
+    Parameters:
+        BulkCm file first bytes (bytes): sample
+        XML parser backends (list): backends
+        number of repetitions (int): repeat
+
+    Returns:
+        the fastest backend (str): backend
+    """
+
+    durations = {}
+    failed = set()
+    for _ in range(repeat):
+        for backend in backends:
+            if backend in failed:
+                continue
+
+            target = BulkCmParser(stream_to_nothing(), batch_size=NODES_BATCH_SIZE)
+
+            start = time.perf_counter()
+            try:
+                if backend == "expat":
+                    create_expat_parser(target).Parse(sample, False)
+                else:
+                    create_xml_parser(target).feed(sample)
+            except (expat.ExpatError, etree.XMLSyntaxError, TeedException):
+                failed.add(backend)
+                durations.pop(backend, None)
+                continue
+            duration = time.perf_counter() - start
+
+            durations[backend] = min(duration, durations.get(backend, duration))
+
+    return min(durations, key=durations.get, default="lxml")
+
+
+def benchmark(file_uri: str, backends: list = BACKENDS, repeat: int = 1) -> dict:
+    """Measure the BulkCm parsing duration of each backend
+
+    The file is parsed repeat times by each backend, the nodes are discarded.
+    The file is read to memory beforehand so only the parsing is measured.
+
+    Parameters:
+        file_uri (str): file_uri
+        XML parser backends (list): backends
+        number of repetitions (int): repeat
+
+    Returns:
+        best parsing duration, in seconds, by backend (dict): durations
+    """
+
+    with open_input(file_uri) as input_stream:
+        data = input_stream.read()
+
+    durations = {}
+    for backend in backends:
+        for _ in range(repeat):
+            target = BulkCmParser(stream_to_nothing(), batch_size=NODES_BATCH_SIZE)
+
+            start = time.perf_counter()
+            parse_target(BytesIO(data), target, backend)
+            duration = time.perf_counter() - start
+
+            durations[backend] = min(duration, durations.get(backend, duration))
+
+    return durations
+
+
+def parse(
+    file_uri: str,
+    output_dir_or_bucket: str,
+    stream: Generator,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    backend: str = "lxml",
+    batch_size: int = 0,
+    file_name: str = None,
+    where: list = [],
+    target_class: type = BulkCmParser,
+    quarantine: str = None,
+) -> tuple:
+    """Parse BulkCm file and place it's content in output directories CSV files
+
+    The BulkCm is read from an URI or from memory: bytes, bytearray, memoryview
+    or a binary file-like object. The in memory data is parsed without copies
+    or temporary files. Its metadata file is named after file_name, if given.
+
+    With quarantine, a unit class as MeContext, the malformed units are
+    skipped instead of failing the parse. The file is first checked by
+    check_document, a well-formed file is parsed as is, otherwise the
+    malformed units are located by quarantine_units. Their bytes
+    are written to the {file_name}_quarantine.xml file in the output directory
+    and listed in the metadata quarantine. Only files, not in memory data.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri
+        output directory (str): output_dir_or_bucket
+        send parsed nodes to stream (Generator): stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+        XML parser backend, lxml, expat or auto (str): backend
+        nodes sent to stream per batch, 0 sends one node at a time (int): batch_size
+        in memory data file name, names the metadata file (str): file_name
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+        parser target, BulkCmParser or a subclass as raml.RamlParser (type): target_class
+        unit class of the malformed elements skipped, one of QUARANTINE_UNITS (str): quarantine
+
+    Returns:
+        bulkcm metadata and parsing duration (dict, timedelta): (metadata, duration)
+    """
+
+    corrupt = []
+    if quarantine is None:
+        input_context = open_input(file_uri)
+    elif isinstance(file_uri, str):
+        file_path = get_split_input(file_uri)
+        # the units are only scanned when the file isn't well-formed
+        if check_document(file_path) is not None:
+            corrupt = quarantine_units(file_path, quarantine)
+        input_context = open(file_path, mode="rb")
+    else:
+        raise TeedException("Error, quarantine needs a file path or URI")
+
+    with input_context as input_stream:
+        if output_fs.get_file_info(output_dir_or_bucket).type == fs.FileType.NotFound:
+            raise TeedException(
+                f"Error, output directory {output_dir_or_bucket} doesn't exists"
+            )
+
+        target = target_class(
+            stream, include_elements, exclude_elements, batch_size, where
+        )
+
+        start = datetime.now()
+
+        if corrupt != []:
+            # read the file around the corrupt units
+            ranges = []
+            position = 0
+            for unit in corrupt:
+                ranges.append((position, unit["range"][0]))
+                position = unit["range"][1]
+            ranges.append((position, input_stream.seek(0, os.SEEK_END)))
+
+            input_stream = ByteRangeReader(
+                input_stream, [(s, e) for s, e in ranges if e > s]
+            )
+
+        # parse the BulkCm file
+        metadata = parse_target(input_stream, target, backend)
+
+    # output metadata
+    # named after the file, or the file_name given to the in memory data
+    if isinstance(file_uri, str):
+        file_name = file_uri
+
+    if quarantine is not None:
+        metadata["quarantine"] = [
+            {"dn": unit["dn"], "range": list(unit["range"]), "error": unit["error"]}
+            for unit in corrupt
+        ]
+
+    if corrupt != []:
+        _, file_name_without_ext, _ = file_path_parse(file_name)
+        quarantine_file_path = output_fs.normalize_path(
+            f"{output_dir_or_bucket}{path.sep}{file_name_without_ext}_quarantine.xml"
+        )
+        with open(file_path, mode="rb") as in_stream:
+            with output_fs.open_output_stream(
+                quarantine_file_path, compression=None
+            ) as out:
+                for unit in corrupt:
+                    out.write(
+                        f"<!-- {unit['dn']} bytes {unit['range'][0]}-{unit['range'][1]}"
+                        f" -->\n".encode()
+                    )
+                    copy_byte_range(in_stream, out, *unit["range"])
+                    out.write(b"\n")
+
+    if file_name is not None:
+        _, file_name_without_ext, _ = file_path_parse(file_name)
+        metadata_file_path = output_fs.normalize_path(
+            f"{output_dir_or_bucket}{path.sep}{file_name_without_ext}_metadata.yml"
+        )
+        with output_fs.open_output_stream(metadata_file_path, compression=None) as out:
+            with TextIOWrapper(out) as tout:
+                yaml.dump(metadata, tout, default_flow_style=False)
+
+    finish = datetime.now()
+
+    return (metadata, finish - start)
+
+
+def open_input(file_uri_or_stream) -> ContextManager:
+    """Open a BulkCm input for reading
+
+    A string is an URI or file path opened through the PyArrow filesystems,
+    bytes, bytearray and memoryview are read in place, without copying,
+    anything else is taken as an already open binary file-like object.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+
+    Returns:
+        context manager of a binary input stream (ContextManager): input_stream
+
+    Raise:
+        TeedException
+    """
+
+    if is_buffer(file_uri_or_stream):
+        return open_buffer(file_uri_or_stream)
+
+    if not isinstance(file_uri_or_stream, str):
+        # the caller owns the file-like object
+        return nullcontext(file_uri_or_stream)
+
+    try:
+        # create input filesystem and path from the uri
+        input_fs, input_path = fs.FileSystem.from_uri(file_uri_or_stream)
+    except ArrowInvalid:
+        raise TeedException(f"Error, check if the {file_uri_or_stream} uri exists .")
+
+    # check if the file exists in the filesystem
+    if input_fs.get_file_info(input_path).type == fs.FileType.NotFound:
+        raise TeedException(f"Error, {file_uri_or_stream} doesn't exists")
+
+    return input_fs.open_input_stream(input_path)
+
+
+def parse_to_arrow(
+    file_uri_or_stream,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    type_map: dict = None,
+    sample_size: int = 1000,
+    batch_size: int = 65536,
+    backend: str = "lxml",
+    where: list = [],
+) -> tuple:
+    """Parse BulkCm file into in memory Arrow tables, one per node name (class)
+
+    The BulkCm is read from an URI or from memory: bytes, bytearray, memoryview
+    or a binary file-like object.
+
+    The nodes are accumulated in column buffers and converted to record batches,
+    no file is written. The attribute columns are typed as in stream_to_parquet.
+
+    Nodes of the same class with distinct columns are combined in the class table,
+    it has the union of the columns, the missing values are null.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        class -> attribute -> type name (dict): type_map
+        nodes used to infer the column types (int): sample_size
+        nodes per record batch (int): batch_size
+        XML parser backend, lxml, expat or auto (str): backend
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        tables by class name and bulkcm metadata (dict, dict): (tables, metadata)
+    """
+
+    collectors = []
+
+    def open_writer(node_name, node_key, part, schema):
+        collector = BatchCollector(schema)
+        collectors.append((node_name, collector))
+        return collector
+
+    writer = ColumnarWriter(open_writer, batch_size, sample_size, type_map)
+
+    target = BulkCmParser(
+        BulkCmParser.stream_to_columnar(writer),
+        include_elements,
+        exclude_elements,
+        batch_size=NODES_BATCH_SIZE,
+        where=where,
+    )
+
+    with open_input(file_uri_or_stream) as input_stream:
+        metadata = parse_target(input_stream, target, backend)
+
+    class_tables = {}
+    for node_name, collector in collectors:
+        class_tables.setdefault(node_name, []).append(collector.to_table())
+
+    tables = {
+        node_name: concat_tables(node_tables)
+        for node_name, node_tables in class_tables.items()
+    }
+
+    return (tables, metadata)
+
+
+def parse_to_tree(
+    file_uri_or_stream,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    backend: str = "lxml",
+    where: list = [],
+) -> tuple:
+    """Parse BulkCm file into the in memory containment tree of it's nodes
+
+    The ancestors of the parsed nodes are always in the tree,
+    even if their classes are excluded.
+
+    tree, _ = bulkcm.parse_to_tree("file:///data/bulkcm.xml")
+    me = tree.find("SubNetwork=1,ManagedElement=1")
+    cells = tree.descendants(me, "UtranCell")
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        XML parser backend, lxml, expat or auto (str): backend
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        containment tree and bulkcm metadata (teed.tree.MoTree, dict): (tree, metadata)
+    """
+
+    builder = TreeBuilder()
+
+    def stream_to_builder():
+        while True:
+            item = yield
+            for node in item:
+                builder.add(node["node_path"])
+
+    target = BulkCmParser(
+        stream_to_builder(),
+        include_elements,
+        exclude_elements,
+        batch_size=NODES_BATCH_SIZE,
+        where=where,
+    )
+
+    with open_input(file_uri_or_stream) as input_stream:
+        metadata = parse_target(input_stream, target, backend)
+
+    return (builder.build(), metadata)
+
+
+class ManagedObject(NamedTuple):
+    """Immutable BulkCm node record
+
+    class_name: the node name, UtranCell or the vsDataType
+    dn: the node path as (class, id) pairs, (("SubNetwork", "1"), ("UtranCell", "2"))
+    attributes: the node values as (name, value) pairs
+    """
+
+    class_name: str
+    dn: tuple
+    attributes: tuple
+
+    @property
+    def dn_string(self) -> str:
+        """The distinguished name, SubNetwork=1,UtranCell=2"""
+
+        return ",".join(f"{class_name}={id}" for class_name, id in self.dn)
+
+
+def iter_nodes(
+    file_uri_or_stream,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    chunk_size: int = 1024 * 1024,
+    where: list = [],
+) -> Generator[ManagedObject, None, dict]:
+    """Iterate over the nodes of a BulkCm file
+
+    Pull-style alternative to bulkcm.parse and its streams.
+
+    The file is fed, chunk_size bytes at a time, to the lxml feed parser
+    and the nodes parsed from each chunk are yielded as ManagedObject records.
+    Only the nodes of the current chunk are kept in memory.
+
+    for mo in bulkcm.iter_nodes("data/bulkcm.xml", include_elements=["UtranCell"], exclude_elements=["*"]):
+        print(mo.class_name, mo.dn_string, dict(mo.attributes))
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        bytes fed to the parser at a time (int): chunk_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Yields:
+        BulkCm node (ManagedObject): mo
+
+    Returns:
+        bulkcm metadata, as the generator return value (dict): metadata
+
+    Raise:
+        TeedException
+    """
+
+    nodes = []
+
+    def stream_to_list():
+        while True:
+            node = yield
+            nodes.append(
+                ManagedObject(
+                    node["node_name"],
+                    tuple(node["node_path"].items()),
+                    tuple(node["node_values"].items()),
+                )
+            )
+
+    parser = create_xml_parser(
+        BulkCmParser(stream_to_list(), include_elements, exclude_elements, where=where)
+    )
+
+    try:
+        with open_input(file_uri_or_stream) as input_stream:
+            while True:
+                chunk = input_stream.read(chunk_size)
+                if not chunk:
+                    break
+
+                parser.feed(chunk)
+
+                yield from nodes
+                nodes.clear()
+
+        metadata = parser.close()
+
+    except etree.XMLSyntaxError as e:
+        raise TeedException(e)
+
+    yield from nodes
+    nodes.clear()
+
+    return metadata
+
+
+# parquet snapshot files, {node_name}-{node_hash}[-{part}].parquet
+SNAPSHOT_FILE_PATTERN = re.compile(r"^(.+)-(?:[0-9a-f]{32}|v\d+)(?:-\d+)?\.parquet$")
+
+DELTA_MODIFIERS = ("create", "update", "delete")
+
+
+def list_snapshot(snapshot_dir_or_bucket: str, output_fs: fs.FileSystem) -> dict:
+    """The parquet files of a snapshot, written by stream_to_parquet, by node name"""
+
+    class_files = {}
+    for file_info in output_fs.get_file_info(fs.FileSelector(snapshot_dir_or_bucket)):
+        match = SNAPSHOT_FILE_PATTERN.match(file_info.base_name)
+        if file_info.type == fs.FileType.File and match is not None:
+            class_files.setdefault(match.group(1), []).append(file_info.path)
+
+    return class_files
+
+
+def get_key_columns(node_name: str, columns: list) -> list:
+    """The node path columns of a snapshot file, up to the node name column"""
+
+    if node_name not in columns:
+        return []
+
+    return columns[: columns.index(node_name) + 1]
+
+
+# separates the node path values joined in a single DN key
+DN_KEY_SEPARATOR = "\x1f"
+
+
+def get_dn_key(dn: tuple) -> str:
+    """The DN values joined, as get_dn_keys joins the node path columns"""
+
+    return DN_KEY_SEPARATOR.join(str(value) for _, value in dn)
+
+
+def get_dn_keys(table: pa.Table, key_columns: list) -> pa.ChunkedArray:
+    """The DN key of each row of table, the key_columns values joined"""
+
+    return pc.binary_join_element_wise(
+        *(table.column(column).cast(pa.string()) for column in key_columns),
+        DN_KEY_SEPARATOR,
+        null_handling="replace",
+    )
+
+
+def match_dns(table: pa.Table, key_columns: list, dns: set) -> pa.ChunkedArray:
+    """Mask of the table rows with a dn, or an ancestor dn, in dns
+
+    The dns are compared to the rows node path prefix of the same
+    class names, see get_key_columns.
+    """
+
+    mask = pc.fill_null(pa.nulls(table.num_rows, pa.bool_()), False)
+
+    # the dns by the length of the node path prefix they match
+    dn_keys = {}
+    for dn in dns:
+        if tuple(class_name for class_name, _ in dn) == tuple(key_columns[: len(dn)]):
+            dn_keys.setdefault(len(dn), []).append(get_dn_key(dn))
+
+    for length, keys in dn_keys.items():
+        mask = pc.or_(
+            mask,
+            pc.is_in(
+                get_dn_keys(table, key_columns[:length]),
+                value_set=pa.array(keys, pa.string()),
+            ),
+        )
+
+    return mask
+
+
+def is_deleted(dn: tuple, deleted: set) -> bool:
+    """Check if the dn, or one of its ancestors, is in the deleted dns"""
+
+    return any(dn[:i] in deleted for i in range(1, len(dn) + 1))
+
+
+def has_deleted_rows(
+    node_name: str, file_paths: list, deleted: set, output_fs: fs.FileSystem
+) -> bool:
+    """Check if a snapshot class has nodes under the deleted dns
+
+    Only the node path columns of the files are read
+    """
+
+    for file_path in file_paths:
+        columns = pq.read_schema(output_fs.open_input_file(file_path)).names
+        key_columns = get_key_columns(node_name, columns)
+
+        # the deleted dns matching the file node path
+        if key_columns == [] or not any(
+            tuple(class_name for class_name, _ in dn) == tuple(key_columns[: len(dn)])
+            for dn in deleted
+        ):
+            continue
+
+        table = pq.read_table(file_path, columns=key_columns, filesystem=output_fs)
+        if pc.any(match_dns(table, key_columns, deleted)).as_py():
+            return True
+
+    return False
+
+
+def apply_delta(
+    file_uri_or_stream,
+    snapshot_dir_or_bucket: str,
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    backend: str = "lxml",
+) -> dict:
+    """Apply a 3GPP 32.616 delta BulkCm file to a parquet snapshot
+
+    The snapshot is the output of parse with stream_to_parquet.
+
+    The delta nodes with a modifier are merged into the snapshot, by DN:
+    create adds, or replaces, the node, update sets the node attributes,
+    adding it if it doesn't exist, and delete removes the node and its subtree.
+    The operations are applied in file order, the last one on a DN wins.
+    Nodes without modifier, the delta DN context, are ignored.
+
+    Only the classes with changes are rewritten, keeping the attribute types.
+    Besides the delta node classes, the classes with nodes under a deleted DN.
+    The other snapshot files aren't read, only their node path columns
+    when there are deletes. The rows are matched to the delta DNs on the
+    node path columns, only the rows changed by the delta are read as
+    python values, the others are copied as is.
+
+    The class files are written to a staging directory, and moved over
+    the snapshot files once complete. The snapshot files replaced by none
+    are deleted last.
+
+    Parameters:
+        delta file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        snapshot directory (str): snapshot_dir_or_bucket
+        snapshot filesystem (pyarrow.fs.FileSystem): output_fs
+        XML parser backend, lxml, expat or auto (str): backend
+
+    Returns:
+        created, updated and deleted nodes by class name (dict): changes
+
+    Raise:
+        TeedException
+    """
+
+    if output_fs.get_file_info(snapshot_dir_or_bucket).type == fs.FileType.NotFound:
+        raise TeedException(
+            f"Error, snapshot directory {snapshot_dir_or_bucket} doesn't exists"
+        )
+
+    # the creates and updates by class name, and the deletes,
+    # numbered in file order
+    operations = {}
+    deletes = []
+    deleted = set()
+    orders = itertools.count()
+
+    def stream_to_operations():
+        while True:
+            node = yield
+            modifier = node.get("node_modifier")
+            if modifier is None:
+                continue
+
+            if modifier not in DELTA_MODIFIERS:
+                raise TeedException(
+                    f"Error, unknown modifier {modifier}, use one of {', '.join(DELTA_MODIFIERS)}"
+                )
+
+            dn = tuple(node["node_path"].items())
+            order = next(orders)
+            if modifier == "delete":
+                deletes.append((order, dn))
+                deleted.add(dn)
+            else:
+                operations.setdefault(node["node_name"], []).append(
+                    (order, modifier, node)
+                )
+
+    with open_input(file_uri_or_stream) as input_stream:
+        parse_target(input_stream, BulkCmParser(stream_to_operations()), backend)
+
+    class_files = list_snapshot(snapshot_dir_or_bucket, output_fs)
+
+    # classes with delta nodes, or nodes under the deleted dns
+    node_names = set(operations) | {dn[-1][0] for dn in deleted}
+    if deleted != set():
+        node_names |= {
+            node_name
+            for node_name, file_paths in class_files.items()
+            if node_name not in node_names
+            and has_deleted_rows(node_name, file_paths, deleted, output_fs)
+        }
+
+    staging_dir = output_fs.normalize_path(f"{snapshot_dir_or_bucket}{path.sep}_delta")
+    changes = {}
+
+    for node_name in sorted(node_names):
+        file_paths = class_files.get(node_name, [])
+        class_operations = operations.get(node_name, [])
+        operation_dns = {
+            tuple(node["node_path"].items()) for _, _, node in class_operations
+        }
+
+        # the snapshot nodes changed by the delta, the remaining rows by file
+        nodes = {}
+        types = {}
+        remaining = {}
+        snapshot_dns = set()
+        deleted_rows = 0
+        for file_path in file_paths:
+            table = pq.read_table(file_path, filesystem=output_fs)
+            key_columns = get_key_columns(node_name, table.column_names)
+
+            for field in table.schema:
+                if field.name not in key_columns:
+                    types.setdefault(field.name, set()).add(type_name(field.type))
+
+            if key_columns == []:
+                continue
+
+            deleted_mask = match_dns(table, key_columns, deleted)
+            changed_mask = pc.is_in(
+                get_dn_keys(table, key_columns),
+                value_set=pa.array(
+                    [
+                        get_dn_key(dn)
+                        for dn in operation_dns
+                        if tuple(class_name for class_name, _ in dn) == tuple(key_columns)
+                    ],
+                    pa.string(),
+                ),
+            )
+
+            for row in table.filter(changed_mask).to_pylist():
+                node_path = {column: row.pop(column) for column in key_columns}
+                dn = tuple(node_path.items())
+                snapshot_dns.add(dn)
+                nodes[dn] = (
+                    node_path,
+                    {column: format_value(value) for column, value in row.items()},
+                )
+
+            # the rows without operation are removed by any delete
+            deleted_rows += pc.sum(pc.and_not(deleted_mask, changed_mask)).as_py() or 0
+            removed_mask = pc.or_(deleted_mask, changed_mask)
+            if pc.any(removed_mask).as_py():
+                remaining[file_path] = table.filter(pc.invert(removed_mask))
+
+        # the nodes with operations go through the creates, updates
+        # and deletes in file order
+        for order, modifier, node in sorted(
+            class_operations + [(order, "delete", dn) for order, dn in deletes],
+            key=lambda operation: operation[0],
+        ):
+            if modifier == "delete":
+                for dn in [dn for dn in nodes if is_deleted(dn, {node})]:
+                    del nodes[dn]
+                continue
+
+            dn = tuple(node["node_path"].items())
+            if modifier == "update" and dn in nodes:
+                nodes[dn][1].update(node["node_values"])
+            else:
+                nodes[dn] = (node["node_path"], dict(node["node_values"]))
+
+        changes[node_name] = {
+            "created": len(set(nodes) - snapshot_dns),
+            "updated": len(set(nodes) & snapshot_dns),
+            "deleted": deleted_rows + len(snapshot_dns - set(nodes)),
+        }
+
+        # the changed nodes are written to the staging directory,
+        # emptied of the files left by an interrupted run
+        output_fs.create_dir(staging_dir)
+        output_fs.delete_dir_contents(staging_dir)
+
+        type_map = {
+            node_name: {
+                column: type_names.pop()
+                for column, type_names in types.items()
+                if len(type_names) == 1
+            }
+        }
+        stream = BulkCmParser.stream_to_parquet(staging_dir, output_fs, type_map=type_map)
+        next(stream)
+        try:
+            for node_path, node_values in nodes.values():
+                stream.send(
+                    {
+                        "node_name": node_name,
+                        "node_path": node_path,
+                        "node_values": node_values,
+                    }
+                )
+        finally:
+            stream.close()
+
+        # and appended to the remaining rows of the snapshot file with the same
+        # name and schema, or written to a part file of their own
+        snapshot_files = {path.basename(file_path): file_path for file_path in file_paths}
+        staged_names = {
+            file_info.base_name
+            for file_info in output_fs.get_file_info(fs.FileSelector(staging_dir))
+        }
+        for file_name in sorted(staged_names & set(snapshot_files)):
+            staged_path = output_fs.normalize_path(f"{staging_dir}{path.sep}{file_name}")
+            file_path = snapshot_files[file_name]
+
+            table = remaining.get(file_path)
+            if table is None:
+                table = pq.read_table(file_path, filesystem=output_fs)
+
+            staged = pq.read_table(staged_path, filesystem=output_fs)
+            if staged.schema.equals(table.schema):
+                pq.write_table(
+                    pa.concat_tables([table, staged]), staged_path, filesystem=output_fs
+                )
+                remaining.pop(file_path, None)
+                continue
+
+            stem = re.sub(r"(-\d+)?\.parquet$", "", file_name)
+            part = 1
+            while (
+                f"{stem}-{part}.parquet" in snapshot_files
+                or f"{stem}-{part}.parquet" in staged_names
+            ):
+                part += 1
+
+            output_fs.move(
+                staged_path,
+                output_fs.normalize_path(f"{staging_dir}{path.sep}{stem}-{part}.parquet"),
+            )
+            staged_names.remove(file_name)
+            staged_names.add(f"{stem}-{part}.parquet")
+
+        for file_path, table in remaining.items():
+            if table.num_rows > 0:
+                pq.write_table(
+                    table,
+                    output_fs.normalize_path(
+                        f"{staging_dir}{path.sep}{path.basename(file_path)}"
+                    ),
+                    filesystem=output_fs,
+                )
+                staged_names.add(path.basename(file_path))
+
+        # each staged file replaces the snapshot file of the same name,
+        # the snapshot is never without the class
+        for file_name in sorted(staged_names):
+            output_fs.move(
+                output_fs.normalize_path(f"{staging_dir}{path.sep}{file_name}"),
+                output_fs.normalize_path(
+                    f"{snapshot_dir_or_bucket}{path.sep}{file_name}"
+                ),
+            )
+
+        # the changed snapshot files left empty
+        for file_path in remaining:
+            if path.basename(file_path) not in staged_names:
+                output_fs.delete_file(file_path)
+
+        output_fs.delete_dir(staging_dir)
+
+    return changes
+
+
+def create_stream(
+    output_format: str,
+    output_dir_or_bucket: str,
+    file_name: str,
+    type_map: dict = None,
+    sample_size: int = 1000,
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    catalog: SchemaCatalog = None,
+    mo_ids: bool = False,
+) -> Generator[dict, None, None]:
+    """Create the BulkCmParser stream serializing nodes to the output format
+
+    Parameters:
+        output format, one of OUTPUT_FORMATS (str): output_format
+        output directory (str): output_dir_or_bucket
+        parsed file name, names the SQLite database (str): file_name
+        class -> attribute -> type name, parquet and arrow (dict): type_map
+        nodes used to infer the column types, parquet and arrow (int): sample_size
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+        schema catalog naming the tables, csv, parquet and arrow (teed.catalog.SchemaCatalog): catalog
+        replace the node paths by integer ids, see BulkCmParser.with_mo_ids (bool): mo_ids
+
+    Returns:
+        nodes stream (Generator): stream
+
+    Raise:
+        TeedException
+    """
+
+    if mo_ids:
+        if output_format == "tree":
+            raise TeedException("Error, the tree output format already has integer ids")
+
+        return BulkCmParser.with_mo_ids(
+            create_stream(
+                output_format,
+                output_dir_or_bucket,
+                file_name,
+                type_map,
+                sample_size,
+                output_fs,
+                catalog,
+            )
+        )
+
+    if output_format == "parquet":
+        # stream to typed parquet files
+        return BulkCmParser.stream_to_parquet(
+            output_dir_or_bucket,
+            output_fs,
+            type_map=type_map,
+            sample_size=sample_size,
+            catalog=catalog,
+        )
+
+    elif output_format == "arrow":
+        # stream to typed Arrow IPC (Feather V2) files
+        return BulkCmParser.stream_to_arrow(
+            output_dir_or_bucket,
+            output_fs,
+            type_map=type_map,
+            sample_size=sample_size,
+            catalog=catalog,
+        )
+
+    elif output_format == "sqlite":
+        # stream to a SQLite database named after the file
+        _, file_name_without_ext, _ = file_path_parse(file_name)
+        return BulkCmParser.stream_to_sqlite(
+            path.normpath(
+                f"{output_dir_or_bucket}{path.sep}{file_name_without_ext}.sqlite"
+            )
+        )
+
+    elif output_format == "tree":
+        # stream the containment tree to an Arrow file named after the file
+        _, file_name_without_ext, _ = file_path_parse(file_name)
+        return BulkCmParser.stream_to_tree(
+            output_fs.normalize_path(
+                f"{output_dir_or_bucket}{path.sep}{file_name_without_ext}_tree.arrow"
+            ),
+            output_fs,
+        )
+
+    elif output_format == "csv":
+        # stream to csv files
+        return BulkCmParser.stream_to_csv(output_dir_or_bucket, output_fs, catalog)
+
+    raise TeedException(
+        f"Error, unknown output format {output_format}, use one of {', '.join(OUTPUT_FORMATS)}"
+    )
+
+
+@program.command(name="parse")
+def parse_program(
+    file_path_or_uri: str,
+    output_dir: str,
+    include_elements: List[str] = typer.Option(
+        [],
+        "--include-element",
+        "-ie",
+        help="Parse element",
+    ),
+    exclude_elements: List[str] = typer.Option(
+        [],
+        "--exlude-element",
+        "-ee",
+        help="Ignore element",
+    ),
+    output_format: str = typer.Option(
+        "csv",
+        "--output-format",
+        "-of",
+        help="Output files format: csv, parquet, arrow, sqlite or tree",
+    ),
+    type_map_path: str = typer.Option(
+        None,
+        "--type-map",
+        "-tm",
+        help="YAML file mapping class attributes to int, float, bool or string",
+    ),
+    sample_size: int = typer.Option(
+        1000,
+        "--sample-size",
+        help="Nodes used to infer the attribute types",
+    ),
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+    batch_size: int = typer.Option(
+        NODES_BATCH_SIZE,
+        "--batch-size",
+        help="Nodes sent to the output per batch, 0 sends one node at a time",
+    ),
+    where: List[str] = typer.Option(
+        [],
+        "--where",
+        "-w",
+        help="Predicate, Class=pattern or Class.attribute=pattern",
+    ),
+    catalog_path: str = typer.Option(
+        None,
+        "--catalog",
+        help="Schema catalog YAML file, names the tables with stable ids",
+    ),
+    mo_ids: bool = typer.Option(
+        False,
+        "--mo-ids",
+        help="Replace the node path columns by integer mo_id and parent_mo_id",
+    ),
+    incremental: bool = typer.Option(
+        False,
+        "--incremental",
+        help="Parse only the SubNetworks changed since the last run, one subdirectory each",
+    ),
+    quarantine: str = typer.Option(
+        None,
+        "--quarantine",
+        "-q",
+        help="Skip the malformed SubNetwork, MeContext or ManagedElement elements",
+    ),
+) -> None:
+    """Parse BulkCm file and place it's content in output directories CSV files
+
+    Command-line program for bulkcm.parse function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        output directory (str): output_dir
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        output files format, csv, parquet, arrow, sqlite or tree (str): output_format
+        attribute types YAML file (str): type_map_path
+        nodes used to infer the attribute types (int): sample_size
+        XML parser backend, lxml, expat or auto (str): backend
+        nodes sent to the output per batch (int): batch_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+        schema catalog YAML file (str): catalog_path
+        integer mo_id and parent_mo_id columns, plus a DN dictionary table (bool): mo_ids
+        parse only the changed SubNetworks, see parse_incremental (bool): incremental
+        unit class of the malformed elements skipped, see parse (str): quarantine
+    """
+
+    print(f"Parsing {file_path_or_uri}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    try:
+        type_map = None
+        if type_map_path is not None:
+            with open(type_map_path, "r") as yaml_file:
+                type_map = yaml.load(yaml_file, Loader=yaml.FullLoader)
+
+        catalog = None if catalog_path is None else SchemaCatalog(catalog_path)
+
+        if incremental:
+            if mo_ids:
+                raise TeedException("Error, the integer ids aren't kept by --incremental")
+
+            if quarantine is not None:
+                raise TeedException(
+                    "Error, --quarantine can't be used with --incremental"
+                )
+
+            start = datetime.now()
+            result = parse_incremental(
+                file_path_or_uri,
+                output_dir,
+                output_format,
+                include_elements,
+                exclude_elements,
+                type_map,
+                sample_size,
+                backend,
+                batch_size,
+                where,
+                catalog,
+            )
+            for action in ("parsed", "reused", "removed"):
+                print(f"SubNetwork {action}: #{len(result[action])}")
+            print(f"Duration: {datetime.now() - start}")
+            return
+
+        stream = create_stream(
+            output_format,
+            output_dir,
+            file_path_or_uri,
+            type_map,
+            sample_size,
+            catalog=catalog,
+            mo_ids=mo_ids,
+        )
+
+        metadata, duration = parse(
+            file_uri,
+            output_dir,
+            stream,
+            include_elements,
+            exclude_elements,
+            backend=backend,
+            batch_size=batch_size,
+            where=where,
+            quarantine=quarantine,
+        )
+
+        for unit in metadata.get("quarantine", []):
+            typer.secho(
+                f"Quarantined {unit['dn']} bytes {unit['range'][0]}-{unit['range'][1]}: "
+                f"{unit['error']}",
+                fg=typer.colors.YELLOW,
+            )
+        print(f"Duration: {duration}")
+    except TeedException as e:
+        typer.secho(f"Error parsing {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+
+@program.command(name="benchmark")
+def benchmark_program(
+    file_path_or_uri: str,
+    repeat: int = typer.Option(
+        3,
+        "--repeat",
+        "-r",
+        help="Number of parsing repetitions per backend",
+    ),
+) -> None:
+    """Benchmark the XML parser backends on a BulkCm file
+
+    Reports the best parsing duration of each backend and the fastest,
+
+    to be used in the parse command --backend option. --backend auto makes
+
+    the same choice on the first BACKEND_SAMPLE_SIZE bytes of each file.
+
+    Command-line program for bulkcm.benchmark function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        number of repetitions (int): repeat
+    """
+
+    print(f"Benchmarking {file_path_or_uri}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    try:
+        durations = benchmark(file_uri, repeat=repeat)
+    except TeedException as e:
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    for backend, duration in durations.items():
+        print(f"{backend}: {duration:.6f}s")
+
+    print(f"Fastest backend: {min(durations, key=durations.get)}")
+
+
+@program.command(name="apply-delta")
+def apply_delta_program(
+    file_path_or_uri: str,
+    snapshot_dir: str,
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+) -> None:
+    """Apply a 32.616 delta BulkCm file to a parquet snapshot
+
+    The snapshot directory holds the parse --output-format parquet files.
+
+    Command-line program for bulkcm.apply_delta function
+
+    Parameters:
+        delta bulkcm file path (str): local file path or PyArrow URI
+        snapshot directory (str): snapshot_dir
+        XML parser backend, lxml, expat or auto (str): backend
+    """
+
+    print(f"Applying {file_path_or_uri} to {snapshot_dir}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    start = datetime.now()
+
+    try:
+        changes = apply_delta(file_uri, snapshot_dir, backend=backend)
+    except TeedException as e:
+        typer.secho(f"Error applying {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    for node_name, counts in changes.items():
+        print(
+            f"{node_name}: created #{counts['created']}, "
+            f"updated #{counts['updated']}, deleted #{counts['deleted']}"
+        )
+
+    finish = datetime.now()
+    print(f"Duration: {finish - start}")
+
+
+def audit(
+    file_uri_or_stream,
+    rules,
+    output_file_path: str = None,
+    type_map: dict = None,
+    sample_size: int = 1000,
+    backend: str = "lxml",
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+) -> pa.Table:
+    """Audit a BulkCm file against a rule set, see teed.audit.load_rules
+
+    Only the rules classes are parsed, once, into typed Arrow tables.
+    All the rules of a class are evaluated with Arrow compute kernels
+    over it's table columns, no row is visited in Python.
+
+    The violations are written to output_file_path, CSV or Parquet
+    chosen by the file extension, if given.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        rule set YAML file path, or the rules (str | dict | list): rules
+        violations CSV or Parquet file path (str): output_file_path
+        class -> attribute -> type name (dict): type_map
+        nodes used to infer the column types (int): sample_size
+        XML parser backend, lxml, expat or auto (str): backend
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+
+    Returns:
+        the violations, rule, severity, class, dn, attribute, value and expected (pyarrow.Table): violations
+
+    Raise:
+        TeedException
+    """
+
+    rules = load_rules(rules)
+
+    if output_file_path is not None and not output_file_path.endswith(
+        (".csv", ".parquet")
+    ):
+        raise TeedException(
+            f"Error, unknown violations file format {output_file_path}, use .csv or .parquet"
+        )
+
+    tables, _ = parse_to_arrow(
+        file_uri_or_stream,
+        include_elements=list({rule.class_name for rule in rules}),
+        exclude_elements=["*"],
+        type_map=type_map,
+        sample_size=sample_size,
+        backend=backend,
+    )
+
+    violations = evaluate(tables, rules)
+
+    if output_file_path is not None:
+        with output_fs.open_output_stream(output_file_path, compression=None) as stream:
+            if output_file_path.endswith(".parquet"):
+                pq.write_table(violations, stream)
+            else:
+                arrow_csv.write_csv(violations, stream)
+
+    return violations
+
+
+@program.command(name="audit")
+def audit_program(
+    file_path_or_uri: str,
+    rules_path: str,
+    output_file_path: str,
+    type_map_path: str = typer.Option(
+        None,
+        "--type-map",
+        "-tm",
+        help="YAML file mapping class attributes to int, float, bool or string",
+    ),
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+) -> None:
+    """Audit a BulkCm file against a YAML rule set and write the violations
+
+    Command-line program for bulkcm.audit function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        rule set YAML file (str): rules_path
+        violations CSV or Parquet file path (str): output_file_path
+        attribute types YAML file (str): type_map_path
+        XML parser backend, lxml, expat or auto (str): backend
+    """
+
+    print(f"Auditing {file_path_or_uri}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    start = datetime.now()
+
+    try:
+        type_map = None
+        if type_map_path is not None:
+            with open(type_map_path, "r") as yaml_file:
+                type_map = yaml.load(yaml_file, Loader=yaml.FullLoader)
+
+        violations = audit(
+            file_uri, rules_path, output_file_path, type_map, backend=backend
+        )
+    except TeedException as e:
+        typer.secho(f"Error auditing {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    # violations per rule
+    for row in violations.group_by("rule").aggregate([("rule", "count")]).to_pylist():
+        print(f"{row['rule']}: #{row['rule_count']}")
+
+    finish = datetime.now()
+    print(f"Violations: #{violations.num_rows}")
+    print(f"Duration: {finish - start}")
+
+
+def profile(
+    file_uri_or_stream,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    top_k: int = TOP_K,
+    precision: int = HLL_PRECISION,
+    backend: str = "lxml",
+    where: list = [],
+) -> tuple:
+    """Profile the attributes of a BulkCm file, in one pass with bounded memory
+
+    Per (class, attribute) the distinct values count, null and empty ratios,
+    top values and numeric min and max are estimated with sketches,
+    see teed.profiling.Profiler. The memory doesn't grow with the file size.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        number of top values per attribute (int): top_k
+        HyperLogLog precision, 2 ** precision registers (int): precision
+        XML parser backend, lxml, expat or auto (str): backend
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        the profile report and bulkcm metadata (dict, dict): (report, metadata)
+    """
+
+    profiler = Profiler(precision, top_k)
+
+    target = BulkCmParser(
+        BulkCmParser.stream_to_profiler(profiler),
+        include_elements,
+        exclude_elements,
+        batch_size=NODES_BATCH_SIZE,
+        where=where,
+    )
+
+    with open_input(file_uri_or_stream) as input_stream:
+        metadata = parse_target(input_stream, target, backend)
+
+    return (profiler.report(), metadata)
+
+
+@program.command(name="profile")
+def profile_program(
+    file_path_or_uri: str,
+    report_file_path: str = typer.Option(
+        None,
+        "--output",
+        "-o",
+        help="YAML report file, printed if not given",
+    ),
+    include_elements: List[str] = typer.Option(
+        [],
+        "--include-element",
+        "-ie",
+        help="Profile element",
+    ),
+    exclude_elements: List[str] = typer.Option(
+        [],
+        "--exlude-element",
+        "-ee",
+        help="Ignore element",
+    ),
+    top_k: int = typer.Option(
+        TOP_K,
+        "--top",
+        help="Number of top values per attribute",
+    ),
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+) -> None:
+    """Profile the attributes of a BulkCm file: distinct values, null ratio, top values, min and max
+
+    Command-line program for bulkcm.profile function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        YAML report file path (str): report_file_path
+        elements to profile (list): include_elements
+        elements to ignore (list): exclude_elements
+        number of top values per attribute (int): top_k
+        XML parser backend, lxml, expat or auto (str): backend
+    """
+
+    print(f"Profiling {file_path_or_uri}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    start = datetime.now()
+
+    try:
+        report, _ = profile(
+            file_uri, include_elements, exclude_elements, top_k, backend=backend
+        )
+    except TeedException as e:
+        typer.secho(f"Error profiling {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    if report_file_path is None:
+        print(yaml.dump(report, default_flow_style=False, sort_keys=False))
+    else:
+        with open(report_file_path, "w") as yaml_file:
+            yaml.dump(report, yaml_file, default_flow_style=False, sort_keys=False)
+
+    finish = datetime.now()
+    print(f"Duration: {finish - start}")
+
+
+def subnetwork_writer(
+    sn: etree._Element,
+    sn_file_path: str,
+    subnetwork_ids: list,
+    bulkCmConfigDataFile: dict,
+    fileHeader: dict,
+    configData: dict,
+    fileFooter: dict,
+    output_fs: fs.FileSystem,
+):
+    """Writes a SubNetwork to the output directory
+
+    A new, valid, BulkCm file is created with a single SubNetwork
+    """
+
+    with output_fs.open_output_stream(sn_file_path, compression=None) as out_stream:
+        with etree.xmlfile(out_stream, encoding=bulkCmConfigDataFile["encoding"]) as xf:
+            xf.write_declaration()
+            with xf.element("bulkCmConfigDataFile", nsmap=bulkCmConfigDataFile["nsmap"]):
+                if fileHeader is not None:
+                    xf.write(etree.Element("fileHeader", attrib=fileHeader["attrib"]))
+
+                with xf.element("configData", attrib=configData["attrib"]):
+                    # enter the xn:SubNetwork(s)
+                    with ExitStack() as stack:
+                        for sn_id in subnetwork_ids[:-1]:
+                            stack.enter_context(xf.element("xn:SubNetwork", id=sn_id))
+
+                        xf.write(sn)
+
+                if fileFooter is not None:
+                    xf.write(etree.Element("fileFooter", attrib=fileFooter["attrib"]))
+
+
+def get_split_input(file_path_or_uri: str) -> str:
+    """The local file path of the file to split
+
+    An URI is copied to the local filesystem for splitting
+    """
+
+    if path.exists(file_path_or_uri):
+        # local file
+        return file_path_or_uri
+
+    # URI
+    # copy file to local filesystem for splitting
+    input_fs, file_path = fs.FileSystem.from_uri(file_path_or_uri)
+
+    if isinstance(input_fs, fs.LocalFileSystem):
+        # file:// URI, already local
+        return file_path
+
+    # create destination local dir
+    output_dir = path.dirname(file_path)
+    os.makedirs(output_dir, exist_ok=True)
+
+    fs.copy_files(
+        file_path,
+        file_path,
+        source_filesystem=input_fs,
+        destination_filesystem=fs.LocalFileSystem(),
+    )
+
+    return file_path
+
+
+def get_split_output(output_dir_or_bucket: str) -> tuple:
+    """The output filesystem and directory of the split files"""
+
+    if path.exists(output_dir_or_bucket):
+        # if the output_dir_or_bucket
+        # exists as a directory in the
+        # local filesystem
+        return fs.LocalFileSystem(), output_dir_or_bucket
+
+    # create the output filesystem from
+    # the output_dir_or_bucket URI
+    return fs.FileSystem.from_uri(output_dir_or_bucket)
+
+
+def split_by_subnetwork(
+    file_path_or_uri: str, output_dir_or_bucket: str, subnetworks: list = []
+) -> Generator[tuple, None, None]:
+    """Search and write a SubNetwork(s) ElementTree to new file(s).
+
+    If subnetworks contains values, these are the SubNetwork id's
+
+    which will be split to files. Other SubNetwork, not present in the list are to be ignore.
+
+    By default subnetworks is empty. All SubNetwork are to be processed and split to a respective file.
+
+    Parameters:
+        bulkcm file path (str): file_path
+        output directory (str): output_dir_or_bucket
+        list of SubNetwork id's (list): subnetworks (if empty consider all SubNetwork's)
+
+    Yields:
+        Tuple with the SubNetwork id and file path: generator(sn_id, sn_file_path)
+
+    Raise:
+        TeedException (inside the split_by_subnetwork call)
+    """
+
+    file_path = get_split_input(file_path_or_uri)
+    output_fs, output_dir = get_split_output(output_dir_or_bucket)
+
+    # read file footer
+    footer = []
+    for line in reverse_readline(file_path, 1024):
+        line = line.strip()
+        if not (line.startswith("</configData")):
+            # footer
+            footer.append(line)
+        else:
+            # configData found, break loop
+            break
+
+    # extract the fileFooter dateTime attribute
+    # <fileFooter dateTime="2017-10-04T00:39:15Z"/>
+    fileFooter = None
+    for line in footer:
+        if line.startswith("<fileFooter"):
+            dateTime = line[line.index('"') + 1 : line.rindex('"')]
+            fileFooter = {"attrib": {"dateTime": dateTime}}
+            break
+
+    _, file_name_without_ext, file_ext = file_path_parse(file_path)
+
+    with open(file_path, mode="rb") as stream:
+        bulkCmConfigDataFile = None
+        configData = None
+        fileHeader = None
+        fileFooter = None
+        subnetwork_ids = []
+
+        try:
+            for event, element in etree.iterparse(
+                stream,
+                events=(
+                    "start",
+                    "end",
+                ),
+                tag=(
+                    "{*}bulkCmConfigDataFile",
+                    "{*}fileHeader",
+                    "{*}configData",
+                    "{*}SubNetwork",
+                    "{*}fileFooter",
+                ),
+                no_network=True,
+                remove_blank_text=True,
+                remove_comments=True,
+                remove_pis=True,
+                huge_tree=True,
+                recover=False,
+            ):
+                localName = etree.QName(element.tag).localname
+
+                if event == "start" and localName == "SubNetwork":
+                    sn_id = element.attrib.get("id")
+                    subnetwork_ids.append(sn_id)
+
+                elif event == "end" and localName == "SubNetwork":
+                    # check if the subnetwork include filter
+                    # is used and if the subnetwork is to be
+                    # processed
+                    if len(subnetworks) > 0:
+                        sn_id = subnetwork_ids[-1]
+                        if sn_id not in subnetworks:
+                            subnetwork_ids.pop()
+                            element.clear(keep_tail=False)
+
+                            yield (sn_id, None)
+
+                            # move to the next iterparse event
+                            continue
+
+                    # subnetwork will be split to it's file
+                    sn_file_path = output_fs.normalize_path(
+                        f"{output_dir}{path.sep}{file_name_without_ext}_{'_'.join(subnetwork_ids)}.{file_ext}"
+                    )
+
+                    subnetwork_writer(
+                        element,
+                        sn_file_path,
+                        subnetwork_ids,
+                        bulkCmConfigDataFile,
+                        fileHeader,
+                        configData,
+                        fileFooter,
+                        output_fs,
+                    )
+
+                    # yield the latest SubNetwork
+                    yield (subnetwork_ids.pop(), sn_file_path)
+
+                elif event == "start" and localName == "bulkCmConfigDataFile":
+                    doc_encoding = (element.getroottree()).docinfo.encoding
+                    encoding = (
+                        doc_encoding
+                        if doc_encoding is not None
+                        else get_xml_encoding(file_path)
+                    )
+                    bulkCmConfigDataFile = {
+                        "tag": element.tag,
+                        "attrib": element.attrib,
+                        "nsmap": element.nsmap,
+                        "encoding": encoding,
+                    }
+
+                elif event == "start" and localName == "fileHeader":
+                    fileHeader = {
+                        "tag": element.tag,
+                        "attrib": deepcopy(element.attrib),
+                        "nsmap": element.nsmap,
+                    }
+
+                elif event == "start" and localName == "configData":
+                    configData = {
+                        "tag": element.tag,
+                        "attrib": deepcopy(element.attrib),
+                        "nsmap": element.nsmap,
+                    }
+
+                if event == "end":
+                    element.clear(keep_tail=False)
+
+        except etree.XMLSyntaxError as e:
+            raise TeedException(e)
+
+
+# the configData and SubNetwork qualified tag names
+SPLIT_TAG_NAMES = rb"(?:[\w.-]+:)?(?:SubNetwork|configData)"
+# comments, CDATA sections and processing instructions, skipped by the scans,
+# with their end markers
+SCAN_SKIPPED = {b"<!--": b"-->", b"<![CDATA[": b"]]>", b"<?": b"?>"}
+SPLIT_ID_PATTERN = re.compile(rb"""\sid\s*=\s*["']([^"']*)["']""")
+SPLIT_CHUNK_SIZE = 8 * 1024 * 1024
+
+
+def get_scan_encoding(file_path: str) -> str:
+    """The encoding of a file scanned as raw bytes, it must be ASCII compatible
+
+    Raise:
+        TeedException
+    """
+
+    with open(file_path, mode="rb") as stream:
+        head = stream.read(100)
+
+    # without declaration the encoding is UTF-8, a UTF-16 file has null bytes
+    encoding = get_xml_encoding(file_path) if head.startswith(b"<?xml") else "UTF-8"
+    try:
+        ascii_compatible = b"\x00" not in head and "<".encode(encoding) == b"<"
+    except LookupError:
+        ascii_compatible = False
+
+    if not ascii_compatible:
+        raise TeedException(
+            f"Error, byte range split requires an ASCII compatible encoding, "
+            f"{file_path} is {encoding}"
+        )
+
+    return encoding
+
+
+def get_scan_limit(buffer: bytes, eof: bool) -> int:
+    """The buffer offset before which the scanned tags are complete
+
+    The last < may start an incomplete tag, or be inside a comment, CDATA
+    section or processing instruction that isn't closed in the buffer.
+    XML forbids < in attribute values.
+    """
+
+    if eof:
+        return len(buffer)
+
+    limit = buffer.rfind(b"<")
+    if limit == -1:
+        return len(buffer)
+
+    for skipped_start, skipped_end in SCAN_SKIPPED.items():
+        start = buffer.rfind(skipped_start, 0, limit + 1)
+        if start != -1 and buffer.find(skipped_end, start + len(skipped_start)) == -1:
+            limit = min(limit, start)
+
+    return limit
+
+
+def iter_scan_tags(
+    stream, tag_names: bytes, chunk_size: int = SPLIT_CHUNK_SIZE
+) -> Generator[tuple, None, None]:
+    """Locate the start and end tags matching tag_names in the raw bytes of stream
+
+    Comments, CDATA sections and processing instructions are skipped and
+    the attribute values are quoted strings, that may contain > or />.
+    The stream is read chunk_size bytes at a time, with constant memory use.
+
+    Parameters:
+        binary input stream (BinaryIO): stream
+        qualified tag names regular expression (bytes): tag_names
+        bytes read at a time (int): chunk_size
+
+    Yields:
+        the tag file offsets, closing and empty flags, qualified name and bytes:
+        (start, end, closing, empty, qname, tag)
+    """
+
+    pattern = re.compile(
+        rb"<!--|<!\[CDATA\[|<\?|<(/?)("
+        + tag_names
+        + rb""")(?=[\s/>])(?:[^>"']|"[^"]*"|'[^']*')*?(/?)>"""
+    )
+
+    offset = 0  # file offset of buffer[0]
+    buffer = b""
+    eof = False
+
+    while not eof:
+        chunk = stream.read(chunk_size)
+        eof = chunk == b""
+        buffer += chunk
+
+        limit = get_scan_limit(buffer, eof)
+        pos = 0
+
+        while True:
+            match = pattern.search(buffer, pos)
+            if match is None or match.start() >= limit:
+                # keep the incomplete tag for the next chunk
+                pos = max(pos, limit)
+                break
+
+            skipped_end = SCAN_SKIPPED.get(match.group(0))
+            if skipped_end is not None:
+                end = buffer.find(skipped_end, match.end())
+                if end == -1:
+                    # continued in the next chunk, or unclosed at the end of file
+                    pos = len(buffer) if eof else match.start()
+                    break
+
+                pos = end + len(skipped_end)
+                continue
+
+            pos = match.end()
+            closing, qname, empty = match.groups()
+            yield (
+                offset + match.start(),
+                offset + match.end(),
+                closing == b"/",
+                empty == b"/",
+                qname,
+                match.group(0),
+            )
+
+        offset += pos
+        buffer = buffer[pos:]
+
+
+def scan_subnetworks(file_path: str, chunk_size: int = SPLIT_CHUNK_SIZE) -> dict:
+    """Scan a BulkCm file for the byte ranges of its SubNetwork elements
+
+    Only the configData and SubNetwork tags are located, by iter_scan_tags
+    over the raw bytes, the file isn't parsed as XML.
+
+    The SubNetworks are the configData children, nested SubNetworks
+    are part of their parent range. Each range goes from the start of the
+    <xn:SubNetwork> tag to the end of its </xn:SubNetwork> tag.
+
+    The preamble range precedes the first configData: the XML declaration,
+    the root element start tag and the fileHeader. The postamble range
+    follows the last configData: the fileFooter and the root element end tag.
+
+    Parameters:
+        bulkcm file path (str): file_path
+        bytes read at a time (int): chunk_size
+
+    Returns:
+        preamble, postamble, configData and SubNetwork ranges (dict): scan
+
+    Raise:
+        TeedException
+    """
+
+    encoding = get_scan_encoding(file_path)
+
+    scan = {"preamble": None, "postamble": None, "configData": [], "subnetworks": []}
+    in_config_data = False
+    depth = 0  # SubNetwork depth inside configData
+    sn = None
+
+    with open(file_path, mode="rb") as stream:
+        for start, end, closing, empty, qname, tag in iter_scan_tags(
+            stream, SPLIT_TAG_NAMES, chunk_size
+        ):
+            localname = qname.rsplit(b":", 1)[-1]
+
+            if localname == b"configData":
+                if closing:
+                    scan["configData"][-1]["end_tag"] = tag
+                    scan["postamble"] = end
+                    in_config_data = False
+                elif not empty:
+                    if scan["preamble"] is None:
+                        scan["preamble"] = start
+                    scan["configData"].append({"start_tag": tag, "end_tag": None})
+                    in_config_data = True
+
+            elif not in_config_data:
+                # SubNetwork outside configData, not split
+                pass
+
+            elif closing:
+                depth -= 1
+                if depth < 0:
+                    raise TeedException(
+                        f"Error, unexpected SubNetwork end tag at byte {start}"
+                    )
+
+                if depth == 0:
+                    sn["range"] = (sn["range"][0], end)
+                    scan["subnetworks"].append(sn)
+
+            elif depth == 0:
+                sn_id = SPLIT_ID_PATTERN.search(tag)
+                sn = {
+                    "id": sn_id.group(1).decode(encoding) if sn_id else None,
+                    "range": (start, end),
+                    "configData": len(scan["configData"]) - 1,
+                }
+                if empty:
+                    scan["subnetworks"].append(sn)
+                else:
+                    depth = 1
+
+            elif not empty:
+                depth += 1
+
+        scan["size"] = stream.tell()
+
+    if depth != 0 or any(cd["end_tag"] is None for cd in scan["configData"]):
+        raise TeedException(f"Error, {file_path} ends inside a configData or SubNetwork")
+
+    return scan
+
+
+def copy_byte_range(
+    in_stream, out_stream, start: int, end: int, chunk_size: int = SPLIT_CHUNK_SIZE
+):
+    """Copy the bytes from start to end of in_stream to out_stream"""
+
+    in_stream.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = in_stream.read(min(chunk_size, remaining))
+        if not chunk:
+            raise TeedException(
+                f"Error, unexpected end of file at byte {end - remaining}"
+            )
+
+        out_stream.write(chunk)
+        remaining -= len(chunk)
+
+
+class ByteRangeReader:
+    """Binary file-like object reading a sequence of byte strings and file byte ranges
+
+    Allows a part of a file, wrapped in other bytes, to be parsed
+    without copying it to a new file.
+
+    Parameters:
+        binary file opened for reading (BinaryIO): in_stream
+        bytes or (start, end) file byte ranges (list): segments
+    """
+
+    def __init__(self, in_stream, segments: list):
+        self._in_stream = in_stream
+        self._segments = list(segments)
+        self._position = None  # file position of the current range
+
+    def read(self, size: int = -1) -> bytes:
+        chunks = []
+
+        while self._segments and (size < 0 or size > 0):
+            segment = self._segments[0]
+
+            if isinstance(segment, bytes):
+                chunk = segment if size < 0 else segment[:size]
+                if len(chunk) == len(segment):
+                    self._segments.pop(0)
+                else:
+                    self._segments[0] = segment[len(chunk) :]
+
+            else:
+                start, end = segment
+                if self._position is None:
+                    self._in_stream.seek(start)
+                    self._position = start
+
+                remaining = end - self._position
+                chunk = self._in_stream.read(
+                    remaining if size < 0 else min(size, remaining)
+                )
+                if not chunk:
+                    raise TeedException(
+                        f"Error, unexpected end of file at byte {self._position}"
+                    )
+
+                self._position += len(chunk)
+                if self._position == end:
+                    self._segments.pop(0)
+                    self._position = None
+
+            chunks.append(chunk)
+            if size > 0:
+                size -= len(chunk)
+
+        return b"".join(chunks)
+
+
+def hash_byte_range(
+    in_stream, start: int, end: int, chunk_size: int = SPLIT_CHUNK_SIZE
+) -> str:
+    """The hex digest of the bytes from start to end of in_stream"""
+
+    digest = hashlib.blake2b(digest_size=16)
+    in_stream.seek(start)
+    remaining = end - start
+    while remaining > 0:
+        chunk = in_stream.read(min(chunk_size, remaining))
+        if not chunk:
+            raise TeedException(
+                f"Error, unexpected end of file at byte {end - remaining}"
+            )
+
+        digest.update(chunk)
+        remaining -= len(chunk)
+
+    return digest.hexdigest()
+
+
+def split_by_byte_range(
+    file_path_or_uri: str,
+    output_dir_or_bucket: str,
+    subnetworks: list = [],
+    chunk_size: int = SPLIT_CHUNK_SIZE,
+) -> Generator[tuple, None, None]:
+    """Split a BulkCm file by SubNetwork copying the raw bytes of each SubNetwork
+
+    Alternative to split_by_subnetwork for large files. The SubNetwork byte ranges
+    are found by scan_subnetworks and copied as they're from the input to the
+    output files, with constant memory use. Each file is wrapped in the
+    original preamble, configData start and end tags and postamble.
+
+    Only the configData children SubNetworks are split, a nested SubNetwork
+    stays in its parent file, unlike split_by_subnetwork which also writes
+    it to its own file. The split SubNetworks must have an id, it names
+    their file. The encoding must be ASCII compatible, as UTF-8
+    or ISO-8859-1, and the XML isn't validated.
+
+    Parameters:
+        bulkcm file path (str): file_path
+        output directory (str): output_dir_or_bucket
         list of SubNetwork id's (list): subnetworks (if empty consider all SubNetwork's)
+        bytes read at a time (int): chunk_size
 
     Yields:
         Tuple with the SubNetwork id and file path: generator(sn_id, sn_file_path)
 
     Raise:
-        TeedException (inside the split_by_subnetwork call)
+        TeedException
     """
 
-    # handle input
-    if path.exists(file_path_or_uri):
-        # local file
-        file_path = file_path_or_uri
-    else:
-        # URI
-        # copy file to local filesystem for splitting
-        input_fs, file_path = fs.FileSystem.from_uri(file_path_or_uri)
-
-        # create destination local dir
-        output_dir = path.dirname(file_path)
-        os.makedirs(output_dir, exist_ok=True)
-
-        fs.copy_files(
-            file_path,
-            file_path,
-            source_filesystem=input_fs,
-            destination_filesystem=fs.LocalFileSystem(),
+    file_path = get_split_input(file_path_or_uri)
+    output_fs, output_dir = get_split_output(output_dir_or_bucket)
+
+    _, file_name_without_ext, file_ext = file_path_parse(file_path)
+
+    scan = scan_subnetworks(file_path, chunk_size)
+
+    # checked before any file is written
+    for sn in scan["subnetworks"]:
+        if sn["id"] is None and len(subnetworks) == 0:
+            raise TeedException(
+                f"Error, SubNetwork at byte {sn['range'][0]} has no id to name it's file"
+            )
+
+    with open(file_path, mode="rb") as in_stream:
+        for sn in scan["subnetworks"]:
+            if len(subnetworks) > 0 and sn["id"] not in subnetworks:
+                yield (sn["id"], None)
+                continue
+
+            sn_file_path = output_fs.normalize_path(
+                f"{output_dir}{path.sep}{file_name_without_ext}_{sn['id']}.{file_ext}"
+            )
+            configData = scan["configData"][sn["configData"]]
+
+            with output_fs.open_output_stream(sn_file_path, compression=None) as out:
+                copy_byte_range(in_stream, out, 0, scan["preamble"], chunk_size)
+                out.write(configData["start_tag"])
+                out.write(b"\n")
+                copy_byte_range(in_stream, out, *sn["range"], chunk_size)
+                out.write(b"\n")
+                out.write(configData["end_tag"])
+                copy_byte_range(
+                    in_stream, out, scan["postamble"], scan["size"], chunk_size
+                )
+
+            yield (sn["id"], sn_file_path)
+
+
+def split(
+    file_path_or_uri: str,
+    output_dir_or_bucket: str,
+    subnetworks: List[str] = [],
+    byte_range: bool = False,
+) -> None:
+    """Split a BulkCm file by SubNetwork element using the split_by_subnetwork function.
+
+    Write the SubNetwork(s) ElementTree to new file(s).
+
+    Calls the bulkcm.split_by_subnetwork function, or split_by_byte_range with byte_range, and
+
+    stores each SubNetwork id and file produced specific lists (sn_ids and sn_file_paths)
+
+    Parameters:
+        bulkcm file path (str): file_path
+        output directory (str): output_dir
+        list of SubNetwork id's (list): subnetworks (if empty consider all SubNetwork's)
+        copy the SubNetworks raw bytes, see split_by_byte_range (bool): byte_range
+    """
+
+    sn_ids = []
+    sn_file_paths = []
+
+    split_function = split_by_byte_range if byte_range else split_by_subnetwork
+
+    for sn_id, sn_file_path in split_function(
+        file_path_or_uri, output_dir_or_bucket, subnetworks
+    ):
+        sn_ids.append(sn_id)
+        sn_file_paths.append(sn_file_path)
+
+    return sn_ids, sn_file_paths
+
+
+# merge, the root element and fileHeader start tags and their attributes
+MERGE_ROOT_PATTERN = re.compile(rb"<(?:[\w.-]+:)?bulkCmConfigDataFile(?=[\s/>])[^>]*>")
+MERGE_HEADER_PATTERN = re.compile(rb"<(?:[\w.-]+:)?fileHeader(?=[\s/>])[^>]*>")
+MERGE_ATTRIBUTE_PATTERN = re.compile(rb"""([\w:.-]+)\s*=\s*(?:"([^"]*)"|'([^']*)')""")
+MERGE_HEADER_ATTRIBUTES = (b"fileFormatVersion", b"vendorName")
+
+
+def get_merge_header(file_path: str, scan: dict) -> dict:
+    """The encoding, namespaces and fileHeader attributes that must match to merge
+
+    Raise:
+        TeedException
+    """
+
+    if scan["preamble"] is None:
+        raise TeedException(f"Error, {file_path} has no configData")
+
+    with open(file_path, mode="rb") as stream:
+        preamble = stream.read(scan["preamble"])
+
+    def attributes(pattern):
+        match = pattern.search(preamble)
+        if match is None:
+            return {}
+
+        return {
+            name: double if double is not None else single
+            for name, double, single in MERGE_ATTRIBUTE_PATTERN.findall(match.group(0))
+        }
+
+    root = attributes(MERGE_ROOT_PATTERN)
+    header = attributes(MERGE_HEADER_PATTERN)
+
+    return {
+        "encoding": get_scan_encoding(file_path).upper(),
+        "namespaces": {k: v for k, v in root.items() if k.startswith(b"xmlns")},
+        "fileHeader": {k: header.get(k) for k in MERGE_HEADER_ATTRIBUTES},
+    }
+
+
+def merge(
+    input_paths: List[str],
+    output_file_path: str,
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    chunk_size: int = SPLIT_CHUNK_SIZE,
+) -> list:
+    """Merge BulkCm files, as the split files, into one BulkCm file
+
+    The inverse of split_by_byte_range. The SubNetwork byte ranges of each file,
+    found by scan_subnetworks, are copied as they're to the output, the XML
+    isn't parsed. The output has the first file header and footer. The
+    SubNetworks with the same configData, as the same dnPrefix, are placed
+    in a single configData element, in the input order.
+
+    The files must have compatible headers: the same encoding, root element
+    namespace declarations and fileHeader fileFormatVersion and vendorName.
+    A SubNetwork can't be in more than one file.
+
+    Parameters:
+        bulkcm files paths or URIs (list): input_paths
+        output BulkCm file path (str): output_file_path
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+        bytes read at a time (int): chunk_size
+
+    Returns:
+        the merged SubNetwork ids (list): sn_ids
+
+    Raise:
+        TeedException
+    """
+
+    if input_paths == []:
+        raise TeedException("Error, no files to merge")
+
+    inputs = []
+    header = None
+    seen = {}  # maps the (configData start tag, SubNetwork id) to it's file
+
+    for input_path in input_paths:
+        file_path = get_split_input(input_path)
+        scan = scan_subnetworks(file_path, chunk_size)
+
+        file_header = get_merge_header(file_path, scan)
+        if header is None:
+            header = file_header
+
+        for key in ("encoding", "namespaces", "fileHeader"):
+            if file_header[key] != header[key]:
+                raise TeedException(
+                    f"Error, {input_path} {key} {file_header[key]} doesn't match "
+                    f"{input_paths[0]} {header[key]}"
+                )
+
+        for sn in scan["subnetworks"]:
+            sn_key = (scan["configData"][sn["configData"]]["start_tag"], sn["id"])
+            if sn_key in seen:
+                raise TeedException(
+                    f"Error, SubNetwork {sn['id']} is in {seen[sn_key]} and {input_path}"
+                )
+            seen[sn_key] = input_path
+
+        inputs.append((file_path, scan))
+
+    sn_ids = []
+    first_path, first_scan = inputs[0]
+    config_data = None  # the open configData start and end tags
+
+    with output_fs.open_output_stream(output_file_path, compression=None) as out:
+        with open(first_path, mode="rb") as in_stream:
+            copy_byte_range(in_stream, out, 0, first_scan["preamble"], chunk_size)
+
+        for file_path, scan in inputs:
+            with open(file_path, mode="rb") as in_stream:
+                for sn in scan["subnetworks"]:
+                    sn_config_data = scan["configData"][sn["configData"]]
+
+                    if (
+                        config_data is None
+                        or sn_config_data["start_tag"] != config_data["start_tag"]
+                    ):
+                        if config_data is not None:
+                            out.write(b"\n")
+                            out.write(config_data["end_tag"])
+                        config_data = sn_config_data
+                        out.write(config_data["start_tag"])
+
+                    out.write(b"\n")
+                    copy_byte_range(in_stream, out, *sn["range"], chunk_size)
+                    sn_ids.append(sn["id"])
+
+        if config_data is None:
+            # no SubNetworks, an empty configData
+            config_data = first_scan["configData"][0]
+            out.write(config_data["start_tag"])
+
+        out.write(b"\n")
+        out.write(config_data["end_tag"])
+
+        with open(first_path, mode="rb") as in_stream:
+            copy_byte_range(
+                in_stream, out, first_scan["postamble"], first_scan["size"], chunk_size
+            )
+
+    return sn_ids
+
+
+# the managed objects parsed, or quarantined, as a whole by the fault tolerant parse
+QUARANTINE_UNITS = ("SubNetwork", "MeContext", "ManagedElement")
+
+
+def scan_units(
+    file_path: str, unit: str = "MeContext", chunk_size: int = SPLIT_CHUNK_SIZE
+) -> list:
+    """Scan a BulkCm file for the byte ranges of the unit class elements
+
+    As scan_subnetworks, the element start and end tags are located by
+    iter_scan_tags over the raw bytes. Nested units are part of their
+    parent range.
+
+    A unit lacking it's end tag ends before the end tag of one of it's
+    ancestors, or for the MeContext and ManagedElement units, which don't
+    contain each other, before the next unit start tag. Outside of the
+    units the elements must nest correctly, the document is otherwise
+    too damaged to skip the units.
+
+    Parameters:
+        bulkcm file path (str): file_path
+        unit class, one of QUARANTINE_UNITS (str): unit
+        bytes read at a time (int): chunk_size
+
+    Returns:
+        the units, {"dn": "MeContext=1", "range": (start, end), "error": None} (list): units
+
+    Raise:
+        TeedException
+    """
+
+    if unit not in QUARANTINE_UNITS:
+        raise TeedException(
+            f"Error, unknown unit {unit}, use one of {', '.join(QUARANTINE_UNITS)}"
         )
 
-    # handle output
-    if path.exists(output_dir_or_bucket):
-        # if the output_dir_or_bucket
-        # exists as a directory in the
-        # local filesystem
-        output_fs = fs.LocalFileSystem()
-        output_dir = output_dir_or_bucket
-    else:
-        # create the output filesystem from
-        # the output_dir_or_bucket URI
-        output_fs, output_dir = fs.FileSystem.from_uri(output_dir_or_bucket)
+    encoding = get_scan_encoding(file_path)
+    nested = unit == "SubNetwork"
 
-    # read file footer
-    footer = []
-    for line in reverse_readline(file_path, 1024):
-        line = line.strip()
-        if not (line.startswith("</configData")):
-            # footer
-            footer.append(line)
-        else:
-            # configData found, break loop
-            break
+    units = []
+    stack = []  # the open elements qualified names
+    current = None  # the open unit, stack[unit_depth] is it's qualified name
+    unit_depth = 0
+
+    def end_missing(end: int):
+        # the open unit lacks it's end tag, ends at end
+        current["range"] = (current["range"][0], end)
+        current["error"] = f"Error, {current['dn']} end tag missing"
+        units.append(current)
+        del stack[unit_depth:]
+
+    with open(file_path, mode="rb") as stream:
+        for start, end, closing, empty, qname, tag in iter_scan_tags(
+            stream, rb"[\w.:-]+", chunk_size
+        ):
+            is_unit = qname.rsplit(b":", 1)[-1] == unit.encode()
+
+            if not closing:
+                if is_unit and current is not None and not nested:
+                    # resynchronize, the previous unit lacks it's end tag
+                    end_missing(start)
+                    current = None
+
+                if is_unit and current is None:
+                    unit_id = SPLIT_ID_PATTERN.search(tag)
+                    unit_id = unit_id.group(1).decode(encoding) if unit_id else ""
+                    current = {
+                        "dn": f"{unit}={unit_id}",
+                        "range": (start, end),
+                        "error": None,
+                    }
+                    unit_depth = len(stack)
+                    if empty:
+                        units.append(current)
+                        current = None
+
+                if not empty:
+                    stack.append(qname)
+                continue
+
+            if current is not None:
+                if qname in stack[unit_depth:]:
+                    # the elements of the unit left open are reported by check_unit
+                    depth = len(stack) - 1 - stack[::-1].index(qname)
+                    del stack[depth:]
+                    if depth == unit_depth:
+                        current["range"] = (current["range"][0], end)
+                        units.append(current)
+                        current = None
+                    continue
+
+                if qname not in stack:
+                    # stray end tag, reported by check_unit
+                    continue
+
+                # an ancestor end tag, the unit lacks it's end tag
+                end_missing(start)
+                current = None
+
+            if not stack or stack[-1] != qname:
+                raise TeedException(
+                    f"Error, unexpected {qname.decode(encoding)} end tag at byte {start}"
+                )
+            stack.pop()
+
+    if current is not None:
+        raise TeedException(f"Error, {file_path} ends inside {current['dn']}")
+    if stack:
+        raise TeedException(
+            f"Error, {file_path} ends inside {stack[-1].decode(encoding)}"
+        )
+
+    return units
+
+
+def check_unit(
+    in_stream, encoding: str, start: int, end: int, chunk_size: int = SPLIT_CHUNK_SIZE
+):
+    """Check the bytes from start to end of in_stream are well-formed XML
+
+    The namespaces aren't processed, the prefixes may be declared by the ancestors.
+    The error is located by it's file byte offset.
+
+    Returns:
+        the error message, None if the XML is well-formed (str): error
+    """
+
+    parser = expat.ParserCreate(encoding)
+    wrapper = b"<unit>"
+
+    try:
+        parser.Parse(wrapper, False)
+
+        in_stream.seek(start)
+        remaining = end - start
+        while remaining > 0:
+            chunk = in_stream.read(min(chunk_size, remaining))
+            if not chunk:
+                return f"Error, unexpected end of file at byte {end - remaining}"
+
+            parser.Parse(chunk, False)
+            remaining -= len(chunk)
+
+        parser.Parse(b"</unit>", True)
+
+    except expat.ExpatError as e:
+        byte = min(start + parser.ErrorByteIndex - len(wrapper), end)
+        return f"{expat.ErrorString(e.code)}, byte {byte}"
+
+    return None
+
+
+def check_document(file_path: str, chunk_size: int = SPLIT_CHUNK_SIZE):
+    """Check a BulkCm file is well-formed XML, namespaces included
+
+    The expat parser runs without handlers, no Python code per element,
+    so the check costs a fraction of the parse.
+
+    Returns:
+        the error message, None if the XML is well-formed (str): error
+    """
+
+    parser = expat.ParserCreate(namespace_separator="}")
+
+    try:
+        with open(file_path, mode="rb") as in_stream:
+            while True:
+                chunk = in_stream.read(chunk_size)
+                if not chunk:
+                    break
 
-    # extract the fileFooter dateTime attribute
-    # <fileFooter dateTime="2017-10-04T00:39:15Z"/>
-    fileFooter = None
-    for line in footer:
-        if line.startswith("<fileFooter"):
-            dateTime = line[line.index('"') + 1 : line.rindex('"')]
-            fileFooter = {"attrib": {"dateTime": dateTime}}
-            break
+                parser.Parse(chunk, False)
 
-    _, file_name_without_ext, file_ext = file_path_parse(file_path)
+        parser.Parse(b"", True)
 
-    with open(file_path, mode="rb") as stream:
-        bulkCmConfigDataFile = None
-        configData = None
-        fileHeader = None
-        fileFooter = None
-        subnetwork_ids = []
+    except expat.ExpatError as e:
+        return f"{expat.ErrorString(e.code)}, line {e.lineno}, column {e.offset}"
 
-        try:
-            for event, element in etree.iterparse(
-                stream,
-                events=(
-                    "start",
-                    "end",
-                ),
-                tag=(
-                    "{*}bulkCmConfigDataFile",
-                    "{*}fileHeader",
-                    "{*}configData",
-                    "{*}SubNetwork",
-                    "{*}fileFooter",
-                ),
-                no_network=True,
-                remove_blank_text=True,
-                remove_comments=True,
-                remove_pis=True,
-                huge_tree=True,
-                recover=False,
-            ):
-                localName = etree.QName(element.tag).localname
+    return None
 
-                if event == "start" and localName == "SubNetwork":
-                    sn_id = element.attrib.get("id")
-                    subnetwork_ids.append(sn_id)
 
-                elif event == "end" and localName == "SubNetwork":
-                    # check if the subnetwork include filter
-                    # is used and if the subnetwork is to be
-                    # processed
-                    if len(subnetworks) > 0:
-                        sn_id = subnetwork_ids[-1]
-                        if sn_id not in subnetworks:
-                            subnetwork_ids.pop()
-                            element.clear(keep_tail=False)
+def quarantine_units(
+    file_path: str, unit: str = "MeContext", chunk_size: int = SPLIT_CHUNK_SIZE
+) -> list:
+    """The unit class elements of a BulkCm file that aren't well-formed XML
 
-                            yield (sn_id, None)
+    The units are found by scan_units and checked, one at a time, by check_unit.
 
-                            # move to the next iterparse event
-                            continue
+    Parameters:
+        bulkcm file path (str): file_path
+        unit class, one of QUARANTINE_UNITS (str): unit
+        bytes read at a time (int): chunk_size
 
-                    # subnetwork will be split to it's file
-                    sn_file_path = output_fs.normalize_path(
-                        f"{output_dir}{path.sep}{file_name_without_ext}_{'_'.join(subnetwork_ids)}.{file_ext}"
-                    )
+    Returns:
+        the corrupt units, {"dn": "MeContext=1", "range": (start, end), "error": "..."} (list): units
 
-                    subnetwork_writer(
-                        element,
-                        sn_file_path,
-                        subnetwork_ids,
-                        bulkCmConfigDataFile,
-                        fileHeader,
-                        configData,
-                        fileFooter,
-                        output_fs,
-                    )
+    Raise:
+        TeedException
+    """
 
-                    # yield the latest SubNetwork
-                    yield (subnetwork_ids.pop(), sn_file_path)
+    encoding = get_scan_encoding(file_path)
 
-                elif event == "start" and localName == "bulkCmConfigDataFile":
-                    doc_encoding = (element.getroottree()).docinfo.encoding
-                    encoding = (
-                        doc_encoding
-                        if doc_encoding is not None
-                        else get_xml_encoding(file_path)
-                    )
-                    bulkCmConfigDataFile = {
-                        "tag": element.tag,
-                        "attrib": element.attrib,
-                        "nsmap": element.nsmap,
-                        "encoding": encoding,
-                    }
+    corrupt = []
+    with open(file_path, mode="rb") as in_stream:
+        for unit_range in scan_units(file_path, unit, chunk_size):
+            if unit_range["error"] is None:
+                unit_range["error"] = check_unit(
+                    in_stream, encoding, *unit_range["range"], chunk_size
+                )
 
-                elif event == "start" and localName == "fileHeader":
-                    fileHeader = {
-                        "tag": element.tag,
-                        "attrib": deepcopy(element.attrib),
-                        "nsmap": element.nsmap,
-                    }
+            if unit_range["error"] is not None:
+                corrupt.append(unit_range)
 
-                elif event == "start" and localName == "configData":
-                    configData = {
-                        "tag": element.tag,
-                        "attrib": deepcopy(element.attrib),
-                        "nsmap": element.nsmap,
-                    }
+    return corrupt
 
-                if event == "end":
-                    element.clear(keep_tail=False)
 
-        except etree.XMLSyntaxError as e:
-            raise TeedException(e)
+# incremental parse, the SubNetworks hashes and the options of the last run
+INCREMENTAL_MANIFEST = "manifest.yml"
 
 
-def split(
-    file_path_or_uri: str, output_dir_or_bucket: str, subnetworks: List[str] = []
-) -> None:
-    """Split a BulkCm file by SubNetwork element using the split_by_subnetwork function.
+def parse_incremental(
+    file_path_or_uri: str,
+    output_dir_or_bucket: str,
+    output_format: str = "csv",
+    include_elements: list = [],
+    exclude_elements: list = [],
+    type_map: dict = None,
+    sample_size: int = 1000,
+    backend: str = "lxml",
+    batch_size: int = NODES_BATCH_SIZE,
+    where: list = [],
+    catalog: SchemaCatalog = None,
+    chunk_size: int = SPLIT_CHUNK_SIZE,
+) -> dict:
+    """Parse only the SubNetworks changed since the last run
 
-    Write the SubNetwork(s) ElementTree to new file(s).
+    Each configData child SubNetwork is parsed to it's own output
+    subdirectory, named after the SubNetwork id. The SubNetwork byte ranges
+    are found by scan_subnetworks, as in split_by_byte_range, and hashed.
 
-    Calls the bulkcm.split_by_subnetwork function and
+    The hashes are kept in the output directory manifest.yml. On the next
+    run a SubNetwork with the same hash keeps it's previous output, only the new
+    and changed SubNetworks are parsed, read in place from the file, and the
+    output of the SubNetworks no longer in the file is removed. Changing the
+    parse options parses all the SubNetworks again.
 
-    stores each SubNetwork id and file produced specific lists (sn_ids and sn_file_paths)
+    Before any output is deleted, the manifest is rewritten with only the
+    reused SubNetworks, an interrupted run parses the others again.
+
+    The file header and footer, as the dump dateTime, aren't part of the hashes.
+    The SubNetwork ids must be unique, usable as directory names, and the
+    encoding ASCII compatible.
 
     Parameters:
-        bulkcm file path (str): file_path
-        output directory (str): output_dir
-        list of SubNetwork id's (list): subnetworks (if empty consider all SubNetwork's)
+        bulkcm file path (str): file_path_or_uri
+        output directory (str): output_dir_or_bucket
+        output format, one of OUTPUT_FORMATS (str): output_format
+        elements to parse (list): include_elements
+        elements to ignore (list): exclude_elements
+        class -> attribute -> type name, parquet and arrow (dict): type_map
+        nodes used to infer the column types, parquet and arrow (int): sample_size
+        XML parser backend, lxml, expat or auto (str): backend
+        nodes sent to the output per batch (int): batch_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+        schema catalog naming the tables (teed.catalog.SchemaCatalog): catalog
+        bytes read at a time (int): chunk_size
+
+    Returns:
+        SubNetwork ids parsed, reused and removed (dict): {"parsed": [], "reused": [], "removed": []}
+
+    Raise:
+        TeedException
     """
 
-    sn_ids = []
-    sn_file_paths = []
+    file_path = get_split_input(file_path_or_uri)
+    output_fs, output_dir = get_split_output(output_dir_or_bucket)
 
-    for sn_id, sn_file_path in split_by_subnetwork(
-        file_path_or_uri, output_dir_or_bucket, subnetworks
-    ):
-        sn_ids.append(sn_id)
-        sn_file_paths.append(sn_file_path)
+    _, file_name_without_ext, file_ext = file_path_parse(file_path)
 
-    return sn_ids, sn_file_paths
+    options = {
+        "output_format": output_format,
+        "include_elements": list(include_elements),
+        "exclude_elements": list(exclude_elements),
+        "where": list(where),
+        "type_map": type_map,
+        "sample_size": sample_size,
+        "backend": backend,
+    }
+
+    manifest_path = output_fs.normalize_path(
+        f"{output_dir}{path.sep}{INCREMENTAL_MANIFEST}"
+    )
+    manifest = {"options": options, "subnetworks": {}}
+    if output_fs.get_file_info(manifest_path).type != fs.FileType.NotFound:
+        with output_fs.open_input_stream(manifest_path) as stream:
+            manifest = yaml.safe_load(TextIOWrapper(stream)) or manifest
+
+    previous = manifest["subnetworks"] if manifest.get("options") == options else {}
+
+    scan = scan_subnetworks(file_path, chunk_size)
+
+    sn_ids = [sn["id"] for sn in scan["subnetworks"]]
+    if None in sn_ids or len(set(sn_ids)) != len(sn_ids):
+        raise TeedException(
+            f"Error, incremental parse needs unique SubNetwork ids, {file_path} has {sn_ids}"
+        )
+
+    # the ids are directory names, removed or emptied
+    for sn_id in sn_ids + list(manifest["subnetworks"]):
+        if sn_id in ("", ".") or "/" in sn_id or "\\" in sn_id or ".." in sn_id:
+            raise TeedException(
+                f"Error, SubNetwork id {sn_id!r} isn't usable as a directory name"
+            )
+
+    def write_manifest(subnetworks: dict):
+        with output_fs.open_output_stream(manifest_path, compression=None) as out:
+            with TextIOWrapper(out) as tout:
+                yaml.safe_dump(
+                    {"file": file_path, "options": options, "subnetworks": subnetworks},
+                    tout,
+                    default_flow_style=False,
+                    sort_keys=False,
+                )
+
+    result = {"parsed": [], "reused": [], "removed": []}
+    subnetworks = {}
+
+    with open(file_path, mode="rb") as in_stream:
+        for sn in scan["subnetworks"]:
+            configData = scan["configData"][sn["configData"]]
+
+            # the configData attributes, as dnPrefix, are part of the SubNetwork
+            sn_hash = hashlib.blake2b(configData["start_tag"], digest_size=16)
+            sn_hash.update(hash_byte_range(in_stream, *sn["range"], chunk_size).encode())
+            subnetworks[sn["id"]] = {"hash": sn_hash.hexdigest()}
+
+            sn_dir = output_fs.normalize_path(f"{output_dir}{path.sep}{sn['id']}")
+            if (
+                previous.get(sn["id"], {}).get("hash") == subnetworks[sn["id"]]["hash"]
+                and output_fs.get_file_info(sn_dir).type == fs.FileType.Directory
+            ):
+                result["reused"].append(sn["id"])
+
+        # only the reused SubNetworks are valid while the others are rewritten
+        write_manifest({sn_id: subnetworks[sn_id] for sn_id in result["reused"]})
+
+        for sn in scan["subnetworks"]:
+            if sn["id"] in result["reused"]:
+                continue
+
+            configData = scan["configData"][sn["configData"]]
+            sn_dir = output_fs.normalize_path(f"{output_dir}{path.sep}{sn['id']}")
+            output_fs.create_dir(sn_dir)
+            output_fs.delete_dir_contents(sn_dir)
+
+            # the SubNetwork wrapped as in split_by_byte_range, read in place
+            reader = ByteRangeReader(
+                in_stream,
+                [
+                    (0, scan["preamble"]),
+                    configData["start_tag"] + b"\n",
+                    sn["range"],
+                    b"\n" + configData["end_tag"],
+                    (scan["postamble"], scan["size"]),
+                ],
+            )
+            sn_file_name = f"{file_name_without_ext}_{sn['id']}.{file_ext}"
+
+            stream = create_stream(
+                output_format,
+                sn_dir,
+                sn_file_name,
+                type_map,
+                sample_size,
+                output_fs,
+                catalog,
+            )
+            parse(
+                reader,
+                sn_dir,
+                stream,
+                include_elements,
+                exclude_elements,
+                output_fs,
+                backend=backend,
+                batch_size=batch_size,
+                file_name=sn_file_name,
+                where=where,
+            )
+
+            result["parsed"].append(sn["id"])
+
+    for sn_id in manifest["subnetworks"]:
+        if sn_id not in subnetworks:
+            sn_dir = output_fs.normalize_path(f"{output_dir}{path.sep}{sn_id}")
+            if output_fs.get_file_info(sn_dir).type == fs.FileType.Directory:
+                output_fs.delete_dir(sn_dir)
+
+            result["removed"].append(sn_id)
+
+    write_manifest(subnetworks)
+
+    return result
 
 
 @program.command(name="split")
@@ -705,6 +3660,11 @@ def split_program(
         "-s",
         help="SubNetworks id's to be split to file",
     ),
+    byte_range: bool = typer.Option(
+        False,
+        "--byte-range",
+        help="Copy the SubNetworks raw bytes, without parsing the XML",
+    ),
 ) -> None:
     """Split a BulkCm file by SubNetwork element
     using the split_by_subnetwork function.
@@ -717,6 +3677,7 @@ def split_program(
         bulkcm file path (str): file_path
         output directory (str): output_dir
         list of SubNetwork id's (list): subnetworks (if empty consider all SubNetwork's)
+        copy the SubNetworks raw bytes (bool): byte_range
     """
 
     sn_count = 0
@@ -727,7 +3688,9 @@ def split_program(
     start = datetime.now()
 
     try:
-        sn_ids, sn_file_paths = split(file_path_or_uri, output_dir_or_bucket, subnetworks)
+        sn_ids, sn_file_paths = split(
+            file_path_or_uri, output_dir_or_bucket, subnetworks, byte_range
+        )
         for i, sn_file_path in enumerate(sn_file_paths):
             sn_id = sn_ids[i]
 
@@ -752,6 +3715,407 @@ def split_program(
     print(f"Duration: {finish - start}")
 
 
+# write, the BulkCm namespaces and the class namespace prefixes
+CONFIG_DATA_NAMESPACE = (
+    "http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+)
+WRITE_NSMAP = {
+    None: CONFIG_DATA_NAMESPACE,
+    "xn": "http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm",
+    "un": "http://www.3gpp.org/ftp/specs/archive/32_series/32.645#utranNrm",
+    "vs": "urn:vsData",
+}
+GENERIC_NRM_CLASSES = (
+    "SubNetwork",
+    "ManagementNode",
+    "MeContext",
+    "ManagedElement",
+    "IRPAgent",
+    "VsDataContainer",
+)
+
+# the files written by the stream_to_* streams, {node_name}[-{node_hash}[-{part}]].{ext}
+TABLE_FILE_PATTERN = re.compile(
+    r"^(.+?)(?:-(?:[0-9a-f]{32}|v\d+)(?:-\d+)?)?\.(csv|parquet|arrow|arrows)$"
+)
+
+SORT_BUFFER_SIZE = 100000
+
+
+def read_table_rows(file_path: str) -> Generator[tuple, None, None]:
+    """Read the nodes of a CSV, Parquet or Arrow IPC file written by the stream_to_* streams
+
+    The node name is taken from the file name, the node path columns
+    are the columns up to the node name column. Null values are skipped.
+
+    Yields:
+        node dn, node name and node values (tuple, str, dict): (dn, node_name, node_values)
+    """
+
+    match = TABLE_FILE_PATTERN.match(path.basename(file_path))
+    if match is None:
+        raise TeedException(f"Error, {file_path} isn't a CSV, Parquet or Arrow file")
+
+    node_name, ext = match.groups()
+
+    def node(columns, row):
+        key_columns = get_key_columns(node_name, columns)
+        if key_columns == []:
+            raise TeedException(f"Error, {file_path} has no {node_name} column")
+
+        k = len(key_columns)
+        return (
+            tuple(zip(key_columns, row[:k])),
+            node_name,
+            {
+                column: format_value(value)
+                for column, value in zip(columns[k:], row[k:])
+                if value is not None
+            },
+        )
+
+    if ext == "csv":
+        with open(file_path, newline="") as csv_file:
+            reader = csv.reader(csv_file)
+            columns = next(reader, [])
+            for row in reader:
+                yield node(columns, row)
+
+        return
+
+    if ext == "parquet":
+        batches = pq.ParquetFile(file_path).iter_batches()
+    elif ext == "arrow":
+        reader = ipc.open_file(pa.memory_map(file_path, "r"))
+        batches = (reader.get_batch(i) for i in range(reader.num_record_batches))
+    else:
+        batches = ipc.open_stream(pa.memory_map(file_path, "r"))
+
+    for batch in batches:
+        columns = batch.schema.names
+        for row in zip(*(column.to_pylist() for column in batch.columns)):
+            yield node(columns, list(row))
+
+
+def sort_rows(
+    rows: Generator, temp_dir: str, sort_buffer_size: int = SORT_BUFFER_SIZE
+) -> Generator[tuple, None, None]:
+    """External sort of the (dn, node_name, node_values) rows by dn
+
+    The rows are sorted sort_buffer_size at a time and spilled to
+    temporary run files in temp_dir, the runs are then merged.
+    """
+
+    runs = []
+    buffer = []
+
+    def spill():
+        buffer.sort(key=lambda row: row[0])
+        run_path = path.join(temp_dir, f"run-{len(runs)}.pickle")
+        with open(run_path, "wb") as run_file:
+            for row in buffer:
+                pickle.dump(row, run_file, pickle.HIGHEST_PROTOCOL)
+        runs.append(run_path)
+        buffer.clear()
+
+    for row in rows:
+        buffer.append(row)
+        if len(buffer) >= sort_buffer_size:
+            spill()
+
+    if runs == []:
+        # fits in the buffer
+        buffer.sort(key=lambda row: row[0])
+        yield from buffer
+        return
+
+    if buffer != []:
+        spill()
+
+    def read_run(run_path):
+        with open(run_path, "rb") as run_file:
+            while True:
+                try:
+                    yield pickle.load(run_file)
+                except EOFError:
+                    break
+
+    yield from heapq.merge(*map(read_run, runs), key=lambda row: row[0])
+
+
+def is_sorted(rows: Generator) -> bool:
+    """Check if the (dn, node_name, node_values) rows are sorted by dn"""
+
+    previous = None
+    for dn, _, _ in rows:
+        if previous is not None and dn < previous:
+            return False
+        previous = dn
+
+    return True
+
+
+def write(
+    input_paths: list,
+    output_file_path: str,
+    dn_prefix: str = None,
+    metadata: dict = None,
+    nsmap: dict = None,
+    class_prefixes: dict = None,
+    vs_data_format_version: str = "1.0",
+    sort_buffer_size: int = SORT_BUFFER_SIZE,
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+) -> int:
+    """Write a BulkCm file from CSV, Parquet or Arrow IPC files, one per class
+
+    The inverse of parse with the stream_to_* streams: the file name is the
+    class name, optionally followed by the columns hash, the node path
+    columns precede the attribute columns. Directories are expanded
+    to the class files inside them.
+
+    The nodes are merged, sorted by DN, and written as nested elements.
+    A file already sorted by DN is streamed, otherwise it's sorted with an
+    external sort, sort_buffer_size rows at a time. The memory use is constant.
+
+    The SubNetwork, MeContext, ManagedElement ... elements are written in the
+    xn namespace, vsData classes as VsDataContainer elements, other classes
+    in the un namespace. class_prefixes overrides the class namespace prefix.
+
+    Parameters:
+        class files and directories (list): input_paths
+        output BulkCm file path (str): output_file_path
+        configData dnPrefix (str): dn_prefix
+        fileHeader and fileFooter attributes, as returned by parse (dict): metadata
+        namespace prefix -> URI, merged with WRITE_NSMAP (dict): nsmap
+        class name -> namespace prefix (dict): class_prefixes
+        vsDataFormatVersion of the VsDataContainer elements (str): vs_data_format_version
+        rows per external sort run (int): sort_buffer_size
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+
+    Returns:
+        number of nodes written (int): nodes
+
+    Raise:
+        TeedException
+    """
+
+    nsmap = {**WRITE_NSMAP, **(nsmap or {})}
+    class_prefixes = class_prefixes or {}
+    metadata = metadata or {}
+
+    file_paths = []
+    for input_path in input_paths:
+        if path.isdir(input_path):
+            file_paths.extend(
+                path.join(input_path, file_name)
+                for file_name in sorted(os.listdir(input_path))
+                if TABLE_FILE_PATTERN.match(file_name)
+            )
+        else:
+            file_paths.append(input_path)
+
+    def qname(prefix, localname):
+        return f"{{{nsmap[prefix]}}}{localname}"
+
+    def class_prefix(node_name):
+        if node_name in class_prefixes:
+            return class_prefixes[node_name]
+
+        return "xn" if node_name in GENERIC_NRM_CLASSES else "un"
+
+    def open_element(node_name, node_id):
+        if node_name.startswith("vsData"):
+            element = xf.element(qname("xn", "VsDataContainer"), id=node_id)
+        else:
+            element = xf.element(qname(class_prefix(node_name), node_name), id=node_id)
+
+        element.__enter__()
+        elements.append(element)
+
+    def write_text_element(tag, text):
+        with xf.element(tag):
+            xf.write(text)
+
+    def write_attributes(node_name, node_values):
+        # the elements are written through xf, declaring the namespaces only once
+        if node_name.startswith("vsData"):
+            prefix = class_prefixes.get(node_name, "vs")
+            with xf.element(qname("xn", "attributes")):
+                write_text_element(qname("xn", "vsDataType"), node_name)
+                write_text_element(
+                    qname("xn", "vsDataFormatVersion"), vs_data_format_version
+                )
+                with xf.element(qname(prefix, node_name)):
+                    for attribute, value in node_values.items():
+                        write_text_element(qname(prefix, attribute), value)
+        elif node_values != {}:
+            prefix = class_prefix(node_name)
+            with xf.element(qname(prefix, "attributes")):
+                for attribute, value in node_values.items():
+                    write_text_element(qname(prefix, attribute), value)
+
+    with tempfile.TemporaryDirectory() as temp_dir:
+        # the nodes of each file, sorted by dn
+        sorted_files = []
+        for i, file_path in enumerate(file_paths):
+            if is_sorted(read_table_rows(file_path)):
+                sorted_files.append(read_table_rows(file_path))
+            else:
+                run_dir = path.join(temp_dir, str(i))
+                os.mkdir(run_dir)
+                sorted_files.append(
+                    sort_rows(read_table_rows(file_path), run_dir, sort_buffer_size)
+                )
+
+        nodes = 0
+        elements = []  # open element context managers
+        open_dn = ()  # dn of the open elements
+
+        with output_fs.open_output_stream(output_file_path, compression=None) as out:
+            with etree.xmlfile(out, encoding="UTF-8") as xf:
+                xf.write_declaration()
+                with xf.element(qname(None, "bulkCmConfigDataFile"), nsmap=nsmap):
+                    header = {"fileFormatVersion": "32.615 V4.0"}
+                    for attribute in ("fileFormatVersion", "senderName", "vendorName"):
+                        if attribute in metadata:
+                            header[attribute] = metadata[attribute]
+                    with xf.element(qname(None, "fileHeader"), attrib=header):
+                        pass
+
+                    config_data = {} if dn_prefix is None else {"dnPrefix": dn_prefix}
+                    with xf.element(qname(None, "configData"), attrib=config_data):
+                        rows = heapq.merge(*sorted_files, key=lambda row: row[0])
+                        for dn, dn_rows in itertools.groupby(
+                            rows, key=lambda row: row[0]
+                        ):
+                            # the same node in several files, merge the values
+                            node_values = {}
+                            for _, node_name, values in dn_rows:
+                                node_values.update(values)
+
+                            # close the elements not in the node dn
+                            common = 0
+                            while (
+                                common < min(len(open_dn), len(dn))
+                                and open_dn[common] == dn[common]
+                            ):
+                                common += 1
+
+                            while len(elements) > common:
+                                elements.pop().__exit__(None, None, None)
+
+                            # open the ancestors without node and the node
+                            for class_name, node_id in dn[common:]:
+                                open_element(class_name, node_id)
+
+                            write_attributes(node_name, node_values)
+                            open_dn = dn
+                            nodes += 1
+
+                        while elements != []:
+                            elements.pop().__exit__(None, None, None)
+
+                    footer = {
+                        "dateTime": metadata.get(
+                            "dateTime", datetime.now().astimezone().isoformat()
+                        )
+                    }
+                    with xf.element(qname(None, "fileFooter"), attrib=footer):
+                        pass
+
+    return nodes
+
+
+@program.command(name="write")
+def write_program(
+    output_file_path: str,
+    input_paths: List[str],
+    dn_prefix: str = typer.Option(
+        None,
+        "--dn-prefix",
+        help="configData dnPrefix",
+    ),
+    sort_buffer_size: int = typer.Option(
+        SORT_BUFFER_SIZE,
+        "--sort-buffer-size",
+        help="Rows per external sort run, for the files not sorted by DN",
+    ),
+) -> None:
+    """Write a BulkCm file from CSV, Parquet or Arrow class files
+
+    The inverse of the parse command, the input paths are class files or directories.
+
+    Command-line program for bulkcm.write function
+
+    Parameters:
+        output BulkCm file path (str): output_file_path
+        class files and directories (list): input_paths
+        configData dnPrefix (str): dn_prefix
+        rows per external sort run (int): sort_buffer_size
+    """
+
+    print(f"Writing {output_file_path}")
+
+    start = datetime.now()
+
+    try:
+        nodes = write(
+            input_paths,
+            output_file_path,
+            dn_prefix=dn_prefix,
+            sort_buffer_size=sort_buffer_size,
+        )
+    except TeedException as e:
+        typer.secho(f"Error writing {output_file_path}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    finish = datetime.now()
+
+    print(f"Nodes written: #{nodes}")
+    print(f"Duration: {finish - start}")
+
+
+@program.command(name="merge")
+def merge_program(
+    output_file_path_or_uri: str,
+    input_paths: List[str],
+) -> None:
+    """Merge BulkCm files, as the split files, into one BulkCm file
+
+    The SubNetworks raw bytes are copied under the first file header and footer.
+
+    Command-line program for bulkcm.merge function
+
+    Parameters:
+        output BulkCm file path or URI (str): output_file_path_or_uri
+        bulkcm files paths or URIs (list): input_paths
+    """
+
+    print(f"Merging to {output_file_path_or_uri}")
+
+    start = datetime.now()
+
+    try:
+        # local output file or URI
+        if path.isdir(path.dirname(path.abspath(output_file_path_or_uri))):
+            output_fs = fs.LocalFileSystem()
+            output_file_path = path.abspath(output_file_path_or_uri)
+        else:
+            output_fs, output_file_path = fs.FileSystem.from_uri(output_file_path_or_uri)
+
+        sn_ids = merge(input_paths, output_file_path, output_fs)
+    except (TeedException, ArrowInvalid) as e:
+        typer.secho(f"Error merging to {output_file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+    finish = datetime.now()
+
+    print(f"SubNetwork merged: #{len(sn_ids)}")
+    print(f"Duration: {finish - start}")
+
+
 def probe(
     file_uri: str,
     elements: list = [
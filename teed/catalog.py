@@ -0,0 +1,201 @@
+import os
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from io import TextIOWrapper
+
+import pyarrow.fs as fs
+import yaml
+
+from teed import TeedException
+
+# seconds waited for the catalog lock file
+LOCK_TIMEOUT = 60
+
+
+class SchemaCatalog:
+    """Persistent catalog of the output tables schemas
+
+    Maps each distinct class and ordered columns to a stable table id,
+    {class}-v{version}, the class schema version numbered in the order
+    it's first seen. The ids are kept across runs, the same schema is always
+    written to the same file name, and the catalog records when each schema
+    was first and last seen.
+
+    The writers look the ids up in memory, the catalog file is read when
+    the catalog is created and written by save. Loaders can discover the
+    tables columns from the catalog, without reading the files headers.
+
+    The catalog is shared by concurrent runs. A new schema is registered
+    holding the {file_path}.lock lock file, in the local filesystem:
+    the catalog file is read again, merged, and written with the new id,
+    the runs never give the same id to different columns. save merges the
+    catalog file records too, an id given to different columns, by runs
+    writing to a filesystem without lock, raises a TeedException.
+
+    schemas:
+    - id: UtranCell-v1
+      class: UtranCell
+      columns: [SubNetwork, RncFunction, UtranCell, sc, pcpichpower]
+      first_seen: '2021-03-01T14:30:00'
+      last_seen: '2021-03-02T14:30:00'
+
+    Parameters:
+        catalog YAML file path (str): file_path
+        catalog filesystem (pyarrow.fs.FileSystem): catalog_fs
+    """
+
+    def __init__(self, file_path: str, catalog_fs: fs.FileSystem = fs.LocalFileSystem()):
+        self.file_path = file_path
+        self._fs = catalog_fs
+        self._schemas = {}  # maps the (class, columns) to it's schema record
+        self._versions = {}  # maps the class to it's last schema version
+        self._seen = datetime.now().isoformat(timespec="seconds")
+
+        self._merge(self._load())
+
+    def _load(self) -> list:
+        """The schema records of the catalog file"""
+
+        if self._fs.get_file_info(self.file_path).type == fs.FileType.NotFound:
+            return []
+
+        try:
+            with self._fs.open_input_stream(self.file_path) as stream:
+                catalog = yaml.safe_load(TextIOWrapper(stream)) or {}
+        except (OSError, yaml.YAMLError) as e:
+            raise TeedException(
+                f"Error, can't load the schema catalog {self.file_path}: {e}"
+            )
+
+        return catalog.get("schemas", [])
+
+    def _merge(self, schemas: list):
+        """Merge the schema records read from the catalog file
+
+        Raise:
+            TeedException if an id is given to different columns
+        """
+
+        ids = {schema["id"]: key for key, schema in self._schemas.items()}
+
+        for schema in schemas:
+            class_name = schema["class"]
+            key = (class_name, tuple(schema["columns"]))
+
+            if ids.get(schema["id"], key) != key:
+                raise TeedException(
+                    f"Error, schema catalog {self.file_path} conflict, "
+                    f"{schema['id']} has different columns"
+                )
+
+            current = self._schemas.get(key)
+            if current is None:
+                self._schemas[key] = schema
+                ids[schema["id"]] = key
+            elif current["id"] != schema["id"]:
+                raise TeedException(
+                    f"Error, schema catalog {self.file_path} conflict, "
+                    f"{current['id']} and {schema['id']} have the same columns"
+                )
+            else:
+                current["first_seen"] = min(current["first_seen"], schema["first_seen"])
+                current["last_seen"] = max(current["last_seen"], schema["last_seen"])
+
+            version = int(schema["id"].rsplit("-v", 1)[1])
+            self._versions[class_name] = max(self._versions.get(class_name, 0), version)
+
+    @contextmanager
+    def _lock(self):
+        """Hold the catalog lock file, only in the local filesystem"""
+
+        if not isinstance(self._fs, fs.LocalFileSystem):
+            yield
+            return
+
+        lock_path = f"{self.file_path}.lock"
+        deadline = time.monotonic() + LOCK_TIMEOUT
+        while True:
+            try:
+                os.close(os.open(lock_path, os.O_CREAT | os.O_EXCL | os.O_WRONLY))
+                break
+            except FileExistsError:
+                if time.monotonic() > deadline:
+                    raise TeedException(
+                        f"Error, schema catalog {self.file_path} locked, "
+                        f"remove {lock_path} if no run is using it"
+                    )
+                time.sleep(0.05)
+
+        try:
+            yield
+        finally:
+            os.remove(lock_path)
+
+    def __len__(self):
+        return len(self._schemas)
+
+    def table_id(self, class_name: str, columns: list) -> str:
+        """The stable id of the class table with these columns, registered if new"""
+
+        key = (class_name, tuple(columns))
+        schema = self._schemas.get(key)
+
+        if schema is None:
+            with self._lock():
+                # registered by a concurrent run
+                self._merge(self._load())
+                schema = self._schemas.get(key)
+
+                if schema is None:
+                    version = self._versions.get(class_name, 0) + 1
+                    self._versions[class_name] = version
+                    schema = {
+                        "id": f"{class_name}-v{version}",
+                        "class": class_name,
+                        "columns": list(columns),
+                        "first_seen": self._seen,
+                        "last_seen": self._seen,
+                    }
+                    self._schemas[key] = schema
+                    self._write()
+
+        if schema["last_seen"] != self._seen:
+            schema["last_seen"] = self._seen
+
+        return schema["id"]
+
+    def schemas(self, class_name: str = None) -> list:
+        """The schema records, of class_name if given"""
+
+        return [
+            schema
+            for schema in self._schemas.values()
+            if class_name is None or schema["class"] == class_name
+        ]
+
+    def save(self):
+        """Merge the catalog file records and write the catalog file
+
+        Raise:
+            TeedException
+        """
+
+        with self._lock():
+            self._merge(self._load())
+            self._write()
+
+    def _write(self):
+        """Write the catalog file, replacing it after the new content is written"""
+
+        temp_path = f"{self.file_path}.tmp"
+        with self._fs.open_output_stream(temp_path, compression=None) as stream:
+            with TextIOWrapper(stream) as text_stream:
+                yaml.safe_dump(
+                    {"schemas": list(self._schemas.values())},
+                    text_stream,
+                    default_flow_style=None,
+                    sort_keys=False,
+                )
+
+        self._fs.move(temp_path, self.file_path)
@@ -0,0 +1,430 @@
+import math
+import re
+
+import pyarrow as pa
+import pyarrow.fs as fs
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from teed import TeedException
+
+# map the type names, used in the type maps,
+# to the Arrow data types written in the output files
+TYPE_NAMES = {
+    "int": pa.int64(),
+    "float": pa.float64(),
+    "bool": pa.bool_(),
+    "string": pa.string(),
+}
+
+# Arrow IPC formats and their file extensions
+# file is the random access format, also known as Feather V2
+IPC_FORMATS = {"file": ".arrow", "stream": ".arrows"}
+
+INT_PATTERN = re.compile(r"^[+-]?\d+$")
+# decimal and exponent notation, without nan, inf or digit separators
+FLOAT_PATTERN = re.compile(r"^[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?$")
+BOOL_VALUES = {"true": True, "false": False}
+
+
+def is_int(value: str) -> bool:
+    """Check if value is a string representation of a 64 bit integer"""
+
+    return INT_PATTERN.match(value) is not None and -(2**63) <= int(value) < 2**63
+
+
+def is_float(value: str) -> bool:
+    """Check if value is a string representation of a finite float"""
+
+    return FLOAT_PATTERN.match(value) is not None and math.isfinite(float(value))
+
+
+def is_bool(value: str) -> bool:
+    """Check if value is a string representation of a boolean (true/false)"""
+
+    return value.lower() in BOOL_VALUES
+
+
+def infer_type(values: list) -> pa.DataType:
+    """Infer the Arrow data type of a column from a sample of its values
+
+    Empty strings and None are nulls and don't take part in the inference.
+
+    The candidates are tested from the narrowest to the widest:
+    integer, float, boolean and string. The first type that fits all
+    the values is returned. On conflict, or if there are only nulls,
+    the column falls back to string.
+
+    Parameters:
+        column values sample (list): values
+
+    Returns:
+        inferred type (pyarrow.DataType): data_type
+    """
+
+    values = [value for value in values if value is not None and value != ""]
+
+    if values == []:
+        return pa.string()
+
+    for data_type, test in (
+        (pa.int64(), is_int),
+        (pa.float64(), is_float),
+        (pa.bool_(), is_bool),
+    ):
+        if all(test(value) for value in values):
+            return data_type
+
+    return pa.string()
+
+
+def widen_type(values: list, data_type: pa.DataType) -> pa.DataType:
+    """The fallback type of a column whose values don't fit it's current type
+
+    An integer column widens to float, if possible, otherwise to string.
+    """
+
+    if data_type == pa.int64() and infer_type(values) == pa.float64():
+        return pa.float64()
+
+    return pa.string()
+
+
+def convert_values(values: list, data_type: pa.DataType) -> list:
+    """Convert string values to the python type matching data_type
+
+    Empty strings are converted to None, except in string columns.
+
+    Raises:
+        ValueError if a value doesn't fit the data_type
+    """
+
+    if data_type == pa.string():
+        return values
+
+    if data_type == pa.int64():
+        convert = int
+    elif data_type == pa.float64():
+        convert = float
+    else:
+
+        def convert(value):
+            return BOOL_VALUES[value.lower()]
+
+    try:
+        return [
+            None if value is None or value == "" else convert(value) for value in values
+        ]
+    except KeyError as e:
+        raise ValueError(e)
+
+
+def format_value(value) -> str:
+    """Format a python value as the string read by convert_values, None is empty"""
+
+    if value is None:
+        return ""
+
+    if isinstance(value, bool):
+        return "true" if value else "false"
+
+    if isinstance(value, float):
+        return repr(value)
+
+    return str(value)
+
+
+def type_name(data_type: pa.DataType) -> str:
+    """The type map name of an Arrow data type, string for the types not in TYPE_NAMES"""
+
+    for name, named_type in TYPE_NAMES.items():
+        if named_type == data_type:
+            return name
+
+    return "string"
+
+
+def load_type_map(type_map: dict) -> dict:
+    """Validate a user type map and translate its type names to Arrow types
+
+    The type map is a dict of dicts, the class name maps to the attributes
+    and these to type name: int, float, bool or string.
+
+    {"UtranCell": {"sc": "int", "pcpichpower": "float"}}
+
+    Raises:
+        TeedException on unknown type names
+    """
+
+    arrow_type_map = {}
+    for class_name, attributes in (type_map or {}).items():
+        arrow_type_map[class_name] = {}
+        for attribute, type_name in attributes.items():
+            if type_name not in TYPE_NAMES:
+                raise TeedException(
+                    f"Error, unknown type {type_name} for {class_name}.{attribute}, "
+                    f"use one of {', '.join(TYPE_NAMES)}"
+                )
+
+            arrow_type_map[class_name][attribute] = TYPE_NAMES[type_name]
+
+    return arrow_type_map
+
+
+class ColumnarTable:
+    """The column buffers and the writer of a single output table
+
+    Parameters:
+        table name, the class name (str): name
+        table columns names (list): columns
+        number of leading key columns, written as string, or int64 if they're int (int): key_columns
+    """
+
+    def __init__(self, name: str, columns: list, key_columns: int = 0):
+        self.name = name
+        self.columns = columns
+        self.key_columns = key_columns
+        self.types = None
+        self.writer = None
+        self.part = 0
+        self.values = [[] for _ in columns]
+
+    def __len__(self):
+        return len(self.values[0]) if self.values else 0
+
+    def append(self, row: list):
+        for i, value in enumerate(row):
+            self.values[i].append(value)
+
+    def schema(self) -> pa.Schema:
+        return pa.schema(
+            [pa.field(column, self.types[i]) for i, column in enumerate(self.columns)]
+        )
+
+
+class ColumnarWriter:
+    """Buffers rows per table and writes them as Arrow record batches
+
+    The type of each column is inferred from the first sample_size rows
+    of its table or taken from the type_map. Key columns (the node path)
+    are always strings.
+
+    When, after the sample, a value doesn't fit its column type, the
+    column falls back to a wider type. The current writer is closed and
+    the table continues in a new part with the widened schema.
+
+    The writers are created by the open_writer callable,
+
+    open_writer(table_name, table_key, part, schema) -> writer
+
+    returning an object with write_batch(record_batch) and close() methods
+    such as pyarrow.parquet.ParquetWriter or pyarrow.ipc.RecordBatchStreamWriter.
+
+    Parameters:
+        writer factory (callable): open_writer
+        rows per record batch (int): batch_size
+        rows used to infer the column types (int): sample_size
+        class -> attribute -> type name (dict): type_map
+    """
+
+    def __init__(
+        self,
+        open_writer,
+        batch_size: int = 65536,
+        sample_size: int = 1000,
+        type_map: dict = None,
+    ):
+        self._open_writer = open_writer
+        self._batch_size = batch_size
+        self._sample_size = min(sample_size, batch_size)
+        self._type_map = load_type_map(type_map)
+        self._tables = {}  # maps the table_key to it's ColumnarTable
+
+    def write(
+        self, table_key: str, table_name: str, columns: list, row: list, key_columns=0
+    ):
+        """Append a row to the table_key table, flushing it when a batch is complete"""
+
+        table = self._tables.get(table_key)
+        if table is None:
+            table = ColumnarTable(table_name, columns, key_columns)
+            self._tables[table_key] = table
+
+        table.append(row)
+
+        if len(table) >= (self._batch_size if table.types else self._sample_size):
+            self.flush(table_key)
+
+    def flush(self, table_key: str):
+        """Convert the table buffered values to a record batch and write it"""
+
+        table = self._tables[table_key]
+
+        if len(table) == 0:
+            return
+
+        if table.types is None:
+            table.types = self._infer_types(table)
+
+        arrays = []
+        for i, values in enumerate(table.values):
+            try:
+                arrays.append(
+                    pa.array(convert_values(values, table.types[i]), type=table.types[i])
+                )
+            except (ValueError, OverflowError, pa.ArrowInvalid):
+                # fallback on conflict, widen the column type
+                # and continue the table in a new part file
+                table.types[i] = widen_type(values, table.types[i])
+                arrays.append(
+                    pa.array(convert_values(values, table.types[i]), type=table.types[i])
+                )
+
+                if table.writer is not None:
+                    table.writer.close()
+                    table.writer = None
+                    table.part += 1
+
+        if table.writer is None:
+            table.writer = self._open_writer(
+                table.name, table_key, table.part, table.schema()
+            )
+
+        table.writer.write_batch(
+            pa.RecordBatch.from_arrays(arrays, schema=table.schema())
+        )
+        table.values = [[] for _ in table.columns]
+
+    def close(self):
+        """Flush the remaining rows and close all writers"""
+
+        for table_key, table in self._tables.items():
+            self.flush(table_key)
+
+            if table.writer is not None:
+                table.writer.close()
+
+        self._tables = {}
+
+    def _infer_types(self, table: ColumnarTable) -> list:
+        class_type_map = self._type_map.get(table.name, {})
+
+        types = []
+        for i, column in enumerate(table.columns):
+            if i < table.key_columns:
+                # integer surrogate keys, see bulkcm.BulkCmParser.with_mo_ids
+                is_key_int = all(
+                    value is None or isinstance(value, int) for value in table.values[i]
+                )
+                types.append(pa.int64() if is_key_int else pa.string())
+            elif column in class_type_map:
+                types.append(class_type_map[column])
+            else:
+                types.append(infer_type(table.values[i]))
+
+        return types
+
+
+class ParquetFileWriter:
+    """Parquet file writer, closes the output stream together with the writer"""
+
+    def __init__(self, file_path: str, schema: pa.Schema, output_fs: fs.FileSystem):
+        self._stream = output_fs.open_output_stream(file_path, compression=None)
+        self._writer = pq.ParquetWriter(self._stream, schema)
+
+    def write_batch(self, batch: pa.RecordBatch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._stream.close()
+
+
+class IpcFileWriter:
+    """Arrow IPC writer, closes the output stream together with the writer
+
+    The file format (Feather V2) can be memory mapped by the reader.
+    The stream format can also be written to pipes, read as the batches arrive.
+
+    Parameters:
+        output file path (str): file_path
+        record batches schema (pyarrow.Schema): schema
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+        IPC format, file or stream (str): ipc_format
+    """
+
+    def __init__(
+        self,
+        file_path: str,
+        schema: pa.Schema,
+        output_fs: fs.FileSystem,
+        ipc_format: str = "file",
+    ):
+        if ipc_format not in IPC_FORMATS:
+            raise TeedException(
+                f"Error, unknown IPC format {ipc_format}, use one of {', '.join(IPC_FORMATS)}"
+            )
+
+        self._stream = output_fs.open_output_stream(file_path, compression=None)
+        new_writer = ipc.new_file if ipc_format == "file" else ipc.new_stream
+        self._writer = new_writer(self._stream, schema)
+
+    def write_batch(self, batch: pa.RecordBatch):
+        self._writer.write_batch(batch)
+
+    def close(self):
+        self._writer.close()
+        self._stream.close()
+
+
+class BatchCollector:
+    """In memory writer, keeps the record batches written to it
+
+    Parameters:
+        record batches schema (pyarrow.Schema): schema
+    """
+
+    def __init__(self, schema: pa.Schema):
+        self.schema = schema
+        self.batches = []
+
+    def write_batch(self, batch: pa.RecordBatch):
+        self.batches.append(batch)
+
+    def close(self):
+        pass
+
+    def to_table(self) -> pa.Table:
+        return pa.Table.from_batches(self.batches, schema=self.schema)
+
+
+def concat_tables(tables: list) -> pa.Table:
+    """Concatenate tables with distinct columns into a single table
+
+    The result has the union of the columns, in order of appearance.
+    Columns missing from a table are null. A column with different types
+    in the tables is converted to string.
+    """
+
+    fields = {}
+    for table in tables:
+        for field in table.schema:
+            if field.name not in fields:
+                fields[field.name] = field.type
+            elif fields[field.name] != field.type:
+                fields[field.name] = pa.string()
+
+    schema = pa.schema([pa.field(name, data_type) for name, data_type in fields.items()])
+
+    unified = []
+    for table in tables:
+        columns = []
+        for field in schema:
+            if field.name in table.column_names:
+                columns.append(table.column(field.name).cast(field.type))
+            else:
+                columns.append(pa.nulls(table.num_rows, type=field.type))
+
+        unified.append(pa.Table.from_arrays(columns, schema=schema))
+
+    return pa.concat_tables(unified)
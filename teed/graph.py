@@ -0,0 +1,427 @@
+# python -m teed graph build data/bulkcm.xml data/bulkcm_graph.arrow
+
+from array import array
+from bisect import bisect_left
+from os import path
+from typing import Generator, List
+
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.fs as fs
+import pyarrow.ipc as ipc
+import typer
+
+from teed import TeedException, bulkcm
+from teed.index import get_dn_key
+
+program = typer.Typer()
+
+# neighbor relation classes and the attribute with the neighbor cell DN
+RELATION_CLASSES = (
+    "UtranRelation",
+    "GsmRelation",
+    "EUtranCellRelation",
+    "EUtranFreqRelation",
+    "NRCellRelation",
+)
+TARGET_ATTRIBUTE = "adjacentCell"
+
+
+def to_array(typecode: str, values: pa.Array) -> array:
+    """Copy the Arrow integer values, without nulls, to a python array
+
+    The values buffer is copied as is, without python objects per value.
+    The typecode item size must match the Arrow type bit width.
+    """
+
+    result = array(typecode)
+    if len(values) == 0:
+        return result
+
+    item_size = values.type.bit_width // 8
+    if result.itemsize != item_size:
+        raise TeedException(f"Error, {typecode} array doesn't match {values.type}")
+
+    data = values.buffers()[1]
+    result.frombytes(
+        data[values.offset * item_size : (values.offset + len(values)) * item_size]
+    )
+
+    return result
+
+
+def count_cells(cells: pa.Array, num_cells: int) -> pa.Array:
+    """The occurrences of each cell, 0 to num_cells - 1, in the cells array"""
+
+    counts = pc.value_counts(cells)
+    all_cells = pc.subtract(
+        pc.cumulative_sum(pc.fill_null(pa.nulls(num_cells, pa.int64()), 1)), 1
+    )
+    return pc.fill_null(
+        pc.take(
+            counts.field("counts"),
+            pc.index_in(all_cells, value_set=counts.field("values").cast(pa.int64())),
+        ),
+        0,
+    )
+
+
+class GraphBuilder:
+    """Builds the neighbor relations graph from the parsed relation nodes
+
+    The source cell of a relation is it's parent node, the target cell
+    the DN in the target_attribute value. Both are keyed by teed.index.get_dn_key
+    and numbered in the order they're found.
+
+    Parameters:
+        relation attribute with the target cell DN (str): target_attribute
+        ignore the DN before this class last occurrence (str): ignore_before
+    """
+
+    def __init__(
+        self, target_attribute: str = TARGET_ATTRIBUTE, ignore_before: str = "SubNetwork"
+    ):
+        self.target_attribute = target_attribute
+        self.ignore_before = ignore_before
+        self._cells = {}  # maps the cell DN key to it's id
+        self._sources = array("i")
+        self._targets = array("i")
+
+    def cell_id(self, dn: str) -> int:
+        key = get_dn_key(dn, self.ignore_before)
+        cell = self._cells.get(key)
+        if cell is None:
+            cell = len(self._cells)
+            self._cells[key] = cell
+
+        return cell
+
+    def add(self, node: dict):
+        """Add the relation node edge, ignores the nodes without target"""
+
+        target_dn = node["node_values"].get(self.target_attribute)
+        if not target_dn:
+            return
+
+        source_path = list(node["node_path"].items())[:-1]
+        source_dn = ",".join(f"{class_name}={id}" for class_name, id in source_path)
+
+        self._sources.append(self.cell_id(source_dn))
+        self._targets.append(self.cell_id(target_dn))
+
+    def build(self) -> "CellGraph":
+        """Sort the edges by source and target, dropping duplicates, into CSR form"""
+
+        edges = (
+            pa.table(
+                {
+                    "source": pa.array(self._sources, type=pa.int32()),
+                    "target": pa.array(self._targets, type=pa.int32()),
+                }
+            )
+            .group_by(["source", "target"])
+            .aggregate([])
+            .sort_by([("source", "ascending"), ("target", "ascending")])
+        )
+
+        # the offsets are the cumulative out degrees
+        degrees = count_cells(edges.column("source"), len(self._cells))
+        offsets = pa.concat_arrays(
+            [pa.array([0], type=pa.int64()), pc.cumulative_sum(degrees)]
+        )
+
+        neighbors = pa.ListArray.from_arrays(
+            offsets.cast(pa.int32()),
+            edges.column("target").combine_chunks(),
+        )
+
+        return CellGraph(
+            pa.table(
+                {
+                    "dn": pa.array(list(self._cells), type=pa.string()),
+                    "neighbors": neighbors,
+                }
+            ),
+            self.ignore_before,
+        )
+
+
+class CellGraph:
+    """The neighbor relations graph in compressed sparse row (CSR) form
+
+    A cell is an integer, the row of the graph table, with the cell DN
+    and it's neighbors list. The list column offsets and values are the
+    CSR offsets and targets arrays: the neighbors of cell are the targets
+    from offsets[cell] to offsets[cell + 1], sorted.
+
+    The single cell queries use the python arrays, the whole graph
+    statistics are computed on the Arrow arrays with pyarrow.compute.
+
+    Parameters:
+        graph table, dn and neighbors columns (pyarrow.Table): table
+        ignore the DN before this class last occurrence (str): ignore_before
+    """
+
+    def __init__(self, table: pa.Table, ignore_before: str = "SubNetwork"):
+        self.table = table
+        self.ignore_before = ignore_before
+
+        neighbors = table.column("neighbors").combine_chunks()
+
+        self._dns = table.column("dn").to_pylist()
+
+        # an offset of a sliced list array doesn't start at 0
+        offsets = neighbors.offsets.cast(pa.int64())
+        if len(offsets) == 0:
+            offsets = pa.array([0], type=pa.int64())
+        start, end = offsets[0].as_py(), offsets[-1].as_py()
+
+        self._offsets = pc.subtract(offsets, start) if start != 0 else offsets
+        self._targets = neighbors.values.slice(start, end - start).cast(pa.int32())
+
+        self.offsets = to_array("q", self._offsets)
+        self.targets = to_array("i", self._targets)
+
+        self._cells = None  # maps the DN key to it's cell, created on the first find
+
+    def __len__(self):
+        return len(self._dns)
+
+    @property
+    def num_edges(self) -> int:
+        return len(self.targets)
+
+    def dn(self, cell: int) -> str:
+        return self._dns[cell]
+
+    def find(self, dn: str) -> int:
+        """The cell of the distinguished name
+
+        Raise:
+            TeedException
+        """
+
+        if self._cells is None:
+            self._cells = {dn: cell for cell, dn in enumerate(self._dns)}
+
+        cell = self._cells.get(get_dn_key(dn, self.ignore_before))
+        if cell is None:
+            raise TeedException(f"Error, {dn} isn't in the graph")
+
+        return cell
+
+    def neighbors(self, cell: int) -> array:
+        """The neighbor cells of cell, sorted"""
+
+        return self.targets[self.offsets[cell] : self.offsets[cell + 1]]
+
+    def degree(self, cell: int) -> int:
+        return self.offsets[cell + 1] - self.offsets[cell]
+
+    def _in_degrees(self) -> pa.Array:
+        return count_cells(self._targets, len(self))
+
+    def _out_degrees(self) -> pa.Array:
+        return pc.subtract(self._offsets[1:], self._offsets[:-1])
+
+    def in_degrees(self) -> array:
+        """The number of relations targeting each cell"""
+
+        return to_array("q", self._in_degrees())
+
+    def degree_stats(self, incoming: bool = False) -> dict:
+        """The out, or in, degree statistics: min, max, mean and median"""
+
+        degrees = self._in_degrees() if incoming else self._out_degrees()
+
+        if len(degrees) == 0:
+            return {"min": 0, "max": 0, "mean": 0.0, "median": 0.0}
+
+        min_max = pc.min_max(degrees)
+        return {
+            "min": min_max["min"].as_py(),
+            "max": min_max["max"].as_py(),
+            "mean": pc.mean(degrees).as_py(),
+            "median": pc.quantile(degrees, q=0.5)[0].as_py(),
+        }
+
+    def has_edge(self, source: int, target: int) -> bool:
+        """Check if there's a relation from source to target, binary search"""
+
+        start, end = self.offsets[source], self.offsets[source + 1]
+        i = bisect_left(self.targets, target, start, end)
+
+        return i < end and self.targets[i] == target
+
+    def is_reciprocal(self, source: int, target: int) -> bool:
+        return self.has_edge(source, target) and self.has_edge(target, source)
+
+    def _non_reciprocal(self) -> pa.Table:
+        # the edges anti joined with the reversed edges on (source, target)
+        sources = pc.list_parent_indices(
+            pa.ListArray.from_arrays(self._offsets.cast(pa.int32()), self._targets)
+        ).cast(pa.int32())
+
+        edges = pa.table({"source": sources, "target": self._targets})
+        reversed_edges = pa.table({"source": self._targets, "target": sources})
+
+        return edges.join(
+            reversed_edges, keys=["source", "target"], join_type="left anti"
+        ).sort_by([("source", "ascending"), ("target", "ascending")])
+
+    def non_reciprocal(self) -> Generator[tuple, None, None]:
+        """Yield the (source, target) relations without the target to source relation"""
+
+        edges = self._non_reciprocal()
+        yield from zip(
+            to_array("i", edges.column("source").combine_chunks()),
+            to_array("i", edges.column("target").combine_chunks()),
+        )
+
+    def reciprocity(self) -> float:
+        """The ratio of relations with a reciprocal relation"""
+
+        if self.num_edges == 0:
+            return 0.0
+
+        return 1 - self._non_reciprocal().num_rows / self.num_edges
+
+    def save(self, file_path: str, output_fs: fs.FileSystem = fs.LocalFileSystem()):
+        """Write the graph to an Arrow IPC file"""
+
+        schema = self.table.schema.with_metadata({"ignore_before": self.ignore_before})
+
+        with output_fs.open_output_stream(file_path, compression=None) as stream:
+            with ipc.new_file(stream, schema) as writer:
+                writer.write_table(self.table.replace_schema_metadata(schema.metadata))
+
+    @classmethod
+    def load(
+        cls, file_path: str, input_fs: fs.FileSystem = fs.LocalFileSystem()
+    ) -> "CellGraph":
+        """Read a graph previously written by CellGraph.save"""
+
+        try:
+            with input_fs.open_input_file(file_path) as input_file:
+                table = ipc.open_file(input_file).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid) as e:
+            raise TeedException(f"Error, can't load graph {file_path}: {e}")
+
+        metadata = table.schema.metadata or {}
+        ignore_before = metadata.get(b"ignore_before", b"SubNetwork").decode()
+
+        return cls(table.replace_schema_metadata(None), ignore_before)
+
+
+def build(
+    file_uri_or_stream,
+    relation_classes: list = RELATION_CLASSES,
+    target_attribute: str = TARGET_ATTRIBUTE,
+    ignore_before: str = "SubNetwork",
+    backend: str = "lxml",
+    where: list = [],
+) -> CellGraph:
+    """Build the neighbor relations graph of a BulkCm file
+
+    Only the relation classes are parsed, the cells are the relations
+    parents and targets, including the external cells.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        neighbor relation classes (list): relation_classes
+        relation attribute with the target cell DN (str): target_attribute
+        ignore the DN before this class last occurrence (str): ignore_before
+        XML parser backend, lxml, expat or auto (str): backend
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        the neighbor relations graph (CellGraph): graph
+
+    Raise:
+        TeedException
+    """
+
+    builder = GraphBuilder(target_attribute, ignore_before)
+
+    def stream_to_builder():
+        while True:
+            item = yield
+            for node in item:
+                builder.add(node)
+
+    target = bulkcm.BulkCmParser(
+        stream_to_builder(),
+        list(relation_classes),
+        ["*"],
+        batch_size=bulkcm.NODES_BATCH_SIZE,
+        where=where,
+    )
+
+    with bulkcm.open_input(file_uri_or_stream) as input_stream:
+        bulkcm.parse_target(input_stream, target, backend)
+
+    return builder.build()
+
+
+@program.command(name="build")
+def build_program(
+    file_path_or_uri: str,
+    graph_file_path: str,
+    relation_classes: List[str] = typer.Option(
+        list(RELATION_CLASSES),
+        "--relation-class",
+        "-rc",
+        help="Neighbor relation class",
+    ),
+    target_attribute: str = typer.Option(
+        TARGET_ATTRIBUTE,
+        "--target-attribute",
+        help="Relation attribute with the neighbor cell DN",
+    ),
+    ignore_before: str = typer.Option(
+        "SubNetwork",
+        "--ignore-before",
+        help="Ignore the DN before this class last occurrence",
+    ),
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+) -> None:
+    """Build the neighbor relations graph of a BulkCm file
+
+    Command-line program for graph.build function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        graph Arrow file path (str): graph_file_path
+        neighbor relation classes (list): relation_classes
+        relation attribute with the target cell DN (str): target_attribute
+        ignore the DN before this class last occurrence (str): ignore_before
+        XML parser backend, lxml, expat or auto (str): backend
+    """
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    try:
+        graph = build(
+            file_uri, relation_classes, target_attribute, ignore_before, backend
+        )
+        graph.save(graph_file_path)
+        print(f"Cells: {len(graph)}, relations: {graph.num_edges}")
+        print(f"Out degree: {graph.degree_stats()}")
+        print(f"In degree: {graph.degree_stats(incoming=True)}")
+    except TeedException as e:
+        typer.secho(f"Error building the graph of {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+
+if __name__ == "__main__":
+    program()
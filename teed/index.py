@@ -0,0 +1,269 @@
+# python -m teed index build data/bulkcm.xml data/bulkcm_index.arrow -a ManagedElement.userLabel
+
+from os import path
+from typing import List
+
+import pyarrow as pa
+import pyarrow.fs as fs
+import pyarrow.ipc as ipc
+import typer
+
+from teed import TeedException, bulkcm
+
+program = typer.Typer()
+
+# the index DN column name
+DN_COLUMN = "DN"
+
+# prefix of the vendor specific classes, vsDataUtranCell extends UtranCell
+VS_DATA_PREFIX = "vsData"
+
+
+def get_dn_key(dn: str, ignore_before: str = "SubNetwork") -> str:
+    """The DN lookup key, the DN from the last ignore_before component
+
+    The BulkCm and the Meas files don't share the same DN prefix,
+    the key ignores the DN components before the last ignore_before class,
+    the same simplification used by meas.consume_ldn_natural_key_to_parquet.
+    The vendor specific classes are keyed by the class they extend.
+
+    DC=a1,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1
+    -> SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1
+
+    Parameters:
+        distinguished name, A=a,B=b,C=c (str): dn
+        ignore the DN before this class last occurrence (str): ignore_before
+
+    Returns:
+        the DN lookup key (str): key
+    """
+
+    components = []
+    for component in dn.split(","):
+        class_name, _, node_id = component.strip().partition("=")
+        if class_name == ignore_before:
+            components = []
+
+        if class_name.startswith(VS_DATA_PREFIX):
+            class_name = class_name[len(VS_DATA_PREFIX) :]
+
+        components.append(f"{class_name}={node_id}")
+
+    return ",".join(components)
+
+
+class DnIndex:
+    """DN keyed index of BulkCm attributes
+
+    A sorted Arrow table, one row per DN key and one string column per
+    attribute, with a hash lookup from the DN key to the row values.
+
+    The index is built once from a BulkCm file, saved to an Arrow IPC file
+    and loaded, by the meas consumers, to append the configuration
+    attributes of the measured objects to the counters rows.
+
+    Parameters:
+        index table, the DN column followed by the attribute columns (pyarrow.Table): table
+        ignore the DN before this class last occurrence (str): ignore_before
+    """
+
+    def __init__(self, table: pa.Table, ignore_before: str = "SubNetwork"):
+        self.table = table
+        self.ignore_before = ignore_before
+        self.attributes = table.column_names[1:]
+
+        # maps the DN key to it's attributes values
+        columns = [table.column(column).to_pylist() for column in table.column_names]
+        self._rows = dict(zip(columns[0], zip(*columns[1:])))
+
+    def __len__(self):
+        return self.table.num_rows
+
+    def __contains__(self, dn: str):
+        return get_dn_key(dn, self.ignore_before) in self._rows
+
+    def lookup(self, dn: str) -> dict:
+        """The attributes of dn, None if dn isn't indexed"""
+
+        values = self._rows.get(get_dn_key(dn, self.ignore_before))
+
+        return None if values is None else dict(zip(self.attributes, values))
+
+    def values(self, nedn: str, ldn: str) -> list:
+        """The attributes values of a measured object, None if it isn't indexed
+
+        Parameters:
+            network element distinguished name (str): nedn
+            measured object distinguished name, within the context of the NEDN (str): ldn
+
+        Returns:
+            the values, in the attributes order (list): values
+        """
+
+        values = self._rows.get(get_dn_key(f"{nedn},{ldn}", self.ignore_before))
+
+        return [None] * len(self.attributes) if values is None else list(values)
+
+    def save(self, file_path: str, output_fs: fs.FileSystem = fs.LocalFileSystem()):
+        """Write the index to an Arrow IPC file"""
+
+        schema = self.table.schema.with_metadata({"ignore_before": self.ignore_before})
+
+        with output_fs.open_output_stream(file_path, compression=None) as stream:
+            with ipc.new_file(stream, schema) as writer:
+                writer.write_table(self.table.replace_schema_metadata(schema.metadata))
+
+    @classmethod
+    def load(
+        cls, file_path: str, input_fs: fs.FileSystem = fs.LocalFileSystem()
+    ) -> "DnIndex":
+        """Read an index previously written by DnIndex.save"""
+
+        try:
+            with input_fs.open_input_file(file_path) as input_file:
+                table = ipc.open_file(input_file).read_all()
+        except (FileNotFoundError, pa.ArrowInvalid) as e:
+            raise TeedException(f"Error, can't load DN index {file_path}: {e}")
+
+        metadata = table.schema.metadata or {}
+        ignore_before = metadata.get(b"ignore_before", b"SubNetwork").decode()
+
+        return cls(table.replace_schema_metadata(None), ignore_before)
+
+
+def parse_attribute(attribute: str) -> tuple:
+    """Split a Class.attribute into it's class and attribute names
+
+    Raise:
+        TeedException
+    """
+
+    class_name, _, attribute_name = attribute.partition(".")
+    if class_name == "" or attribute_name == "":
+        raise TeedException(
+            f"Error, invalid attribute {attribute}, expected Class.attribute"
+        )
+
+    return class_name, attribute_name
+
+
+def build(
+    file_uri_or_stream,
+    attributes: list,
+    ignore_before: str = "SubNetwork",
+    where: list = [],
+) -> DnIndex:
+    """Build the DN index of the attributes of a BulkCm file
+
+    Each attribute is a Class.attribute, UtranCell.uarfcnDl, the index
+    has a column per attribute name. The attributes of the classes sharing
+    a DN key, UtranCell and vsDataUtranCell, are merged in the same row.
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri_or_stream
+        indexed attributes, Class.attribute (list): attributes
+        ignore the DN before this class last occurrence (str): ignore_before
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        the DN index (DnIndex): index
+
+    Raise:
+        TeedException
+    """
+
+    # maps the class name to it's indexed attributes and their column
+    class_attributes = {}
+    columns = []
+    for attribute in attributes:
+        class_name, attribute_name = parse_attribute(attribute)
+        if attribute_name not in columns:
+            columns.append(attribute_name)
+
+        class_attributes.setdefault(class_name, []).append(
+            (attribute_name, columns.index(attribute_name))
+        )
+
+    if columns == []:
+        raise TeedException("Error, no attributes to index")
+
+    rows = {}  # maps the DN key to it's values
+    for mo in bulkcm.iter_nodes(
+        file_uri_or_stream,
+        include_elements=list(class_attributes),
+        exclude_elements=["*"],
+        where=where,
+    ):
+        node_values = dict(mo.attributes)
+        values = rows.setdefault(
+            get_dn_key(mo.dn_string, ignore_before), [None] * len(columns)
+        )
+        for attribute_name, i in class_attributes.get(mo.class_name, []):
+            if attribute_name in node_values:
+                values[i] = node_values[attribute_name]
+
+    dns = sorted(rows)
+    table = pa.table(
+        [pa.array(dns, type=pa.string())]
+        + [
+            pa.array([rows[dn][i] for dn in dns], type=pa.string())
+            for i in range(len(columns))
+        ],
+        names=[DN_COLUMN] + columns,
+    )
+
+    return DnIndex(table, ignore_before)
+
+
+@program.command(name="build")
+def build_program(
+    file_path_or_uri: str,
+    index_file_path: str,
+    attributes: List[str] = typer.Option(
+        ...,
+        "--attribute",
+        "-a",
+        help="Indexed attribute, Class.attribute",
+    ),
+    ignore_before: str = typer.Option(
+        "SubNetwork",
+        "--ignore-before",
+        help="Ignore the DN before this class last occurrence",
+    ),
+    where: List[str] = typer.Option(
+        [],
+        "--where",
+        "-w",
+        help="Predicate, Class=pattern or Class.attribute=pattern",
+    ),
+) -> None:
+    """Build the DN index of BulkCm attributes, used to enrich meas counters
+
+    Command-line program for index.build function
+
+    Parameters:
+        bulkcm file path (str): local file path or PyArrow URI
+        index Arrow file path (str): index_file_path
+        indexed attributes, Class.attribute (list): attributes
+        ignore the DN before this class last occurrence (str): ignore_before
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+    """
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    try:
+        index = build(file_uri, attributes, ignore_before, where)
+        index.save(index_file_path)
+        print(f"Indexed {len(index)} DNs in {index_file_path}")
+    except TeedException as e:
+        typer.secho(f"Error indexing {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+
+if __name__ == "__main__":
+    program()
@@ -18,12 +18,15 @@
 import csv
 import glob
 import hashlib
+import inspect
 from collections import OrderedDict
 import os
 import signal
 import time
+import traceback
+from contextlib import nullcontext
 from datetime import datetime, timedelta
-from multiprocessing import Lock, Process, Queue, set_start_method
+from multiprocessing import Event, Lock, Process, Queue, set_start_method
 
 from os import path
 from queue import Empty
@@ -36,7 +39,11 @@ import pyarrow.fs as fs
 # import yaml
 from lxml import etree
 
-from teed import TeedException, get_xml_encoding
+from teed import TeedException, get_xml_encoding, is_buffer, open_buffer
+from teed.catalog import SchemaCatalog
+from teed.columnar import IPC_FORMATS, ColumnarWriter, IpcFileWriter
+from teed.index import DnIndex
+from teed.sqlite import SqliteLoader
 
 program = typer.Typer()
 
@@ -63,138 +70,246 @@ def produce(queue: Queue, plock: Lock, pathname: str, recursive=False):
         print(f"Producer starting {os.getpid()}")
 
     for file_path in glob.iglob(pathname, recursive=recursive):
-        with open(file_path, mode="rb") as stream:
-            with plock:
-                print(f"Parsing {file_path}")
-
-            metadata = {"file_path": file_path}
-
-            for _, element in etree.iterparse(
-                stream,
-                events=("end",),
-                tag=(
-                    "{*}mfh",
-                    "{*}md",
-                    "{*}mff",
-                ),
-                no_network=True,
-                remove_blank_text=True,
-                remove_comments=True,
-                remove_pis=True,
-                huge_tree=True,
-                recover=False,
-            ):
-                localName = etree.QName(element.tag).localname
-
-                if localName == "md":
-                    # <md>
-                    #     <neid>
-                    #         <neun>RNC Telecomville</neun>
-                    #         <nedn>DC=a1.companyNN.com,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1</nedn>
-                    #     </neid>
-                    #     <mi>
-                    #     ...
-                    neid = element.find("neid")
-                    if neid is not None:
-                        # neun = neid.find("neun").text
-                        nedn = neid.find("nedn").text
-
-                    for mi in element.iterfind("mi"):
-                        table = {}
-                        # <mi>
-                        #   <mts>20210301141430</mts>
-                        #   <gp>900</gp>
-                        ts = mi.find("mts").text[:14]
-                        gp = mi.find("gp").text
-
-                        datetime_ts = datetime.strptime(ts, "%Y%m%d%H%M%S")
-                        time_gp = timedelta(seconds=float(gp))
-                        meas_ts = (datetime_ts - time_gp).strftime("%Y%m%d%H%M%S")
-
-                        table["ts"] = ts
-                        table["gp"] = gp
-
-                        # ...
-                        # <mt>attTCHSeizures</mt>
-                        # <mt>succTCHSeizures</mt>
-                        # <mt>attImmediateAssignProcs</mt>
-                        # <mt>succImmediateAssignProcs</mt>
-                        # ...
-                        mts = []
-                        for mt in mi.iterfind("mt"):
-                            mts.append(mt.text)
-
-                        table["mts"] = mts
-
-                        # ...
-                        # <mv>
-                        #     <moid>RncFunction=RF-1,UtranCell=Gbg-997</moid>
-                        #     <r>234</r>
-                        #     <r>345</r>
-                        #     <r>567</r>
-                        #     <r>789</r>
-                        # </mv>
-                        # ...
-                        table["rows"] = []
-                        for mv in mi.iterfind("mv"):
-                            ldn = mv.find("moid").text
-                            row = [meas_ts, nedn, ldn]
-                            for r in mv.iterfind("r"):
-                                row.append(r.text)
-
-                            table["rows"].append(row)
-
-                        # if there're rows in table
-                        # place it in the queue
-                        if table["rows"] != [] and mts != []:
-                            table_name = (ldn.split(",")[-1]).split("=")[0]  # UtranCell
-                            with plock:
-                                print(f"Placing {table_name}")
-
-                            queue.put(table)
-                        else:
-                            # ignoring this mi
-                            with plock:
-                                print("Warning, ignoring mi element due to lack of data")
-                                print(f"Number of mt's: #{len(mts)}")
-                                print(f"First mt: {mts[0]}")
-
-                elif localName == "mfh":
-                    # <mfh>
-                    #     <ffv>32.401 V5.0</ffv>
-                    #     <sn>DC=a1.companyNN.com,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1</sn>
-                    #     <st>RNC</st>
-                    #     <vn>Company NN</vn>
-                    #     <cbt>20210301141500</cbt>
-                    # </mfh>
-                    doc_encoding = (element.getroottree()).docinfo.encoding
-                    encoding = (
-                        doc_encoding
-                        if doc_encoding is not None
-                        else get_xml_encoding(file_path)
-                    )
+        produce_file(queue, plock, file_path)
+
+    # place a DONE signal in the queue
+    # the consumer will continue to execute
+    # until this item/signal is received
+    queue.put("DONE")
 
-                    metadata["encoding"] = encoding
 
-                    for child in element:
-                        metadata[child.tag] = child.text
+def produce_paths(paths: Queue, queue: Queue, plock: Lock, stop: Event):
+    """Producer process, parse the Meas/Mdc files pulled from the paths work queue
+
+    Several producers share the work queue, each file is parsed by one of them.
+    On receiving the DONE item of the work queue place a DONE signal in the queue,
+    the consumer counts one DONE per producer.
+
+    On an error place a STOP signal in the queue and set stop,
+    the other producers stop before their next file.
+    """
+
+    with plock:
+        print(f"Producer starting {os.getpid()}")
+
+    try:
+        while not stop.is_set():
+            file_path = paths.get()
+
+            if file_path == "DONE":
+                queue.put("DONE")
+                return
+
+            produce_file(queue, plock, file_path)
+
+    except KeyboardInterrupt:
+        # the parent process stops the consumer
+        pass
+
+    except Exception as e:
+        with plock:
+            if isinstance(e, (TeedException, etree.XMLSyntaxError)):
+                print(e)
+            else:
+                print(traceback.format_exc())
+
+        stop.set()
+        queue.put("STOP")
 
-                elif localName == "mff":
-                    # <mff>
-                    #   <ts>20210301143000</ts>
-                    # </mff>
-                    for child in element:
-                        metadata[child.tag] = child.text
+        # the consumer reads up to the STOP item
+        return
 
-                element.clear(keep_tail=False)
+    # stopped, don't wait for the consumer to read the items left
+    queue.cancel_join_thread()
+
+
+def produce_buffers(queue: Queue, plock: Lock, buffers: list):
+    """Parse in memory Meas/Mdc files
+
+    Identical to produce, but the files are read from memory,
+    bytes, bytearray, memoryview or binary file-like objects,
+    without copies or temporary files.
+    """
+
+    with plock:
+        print(f"Producer starting {os.getpid()}")
+
+    for i, buffer in enumerate(buffers):
+        produce_file(queue, plock, buffer, name=f"buffer #{i}")
 
     # place a DONE signal in the queue
-    # the consumer will continue to execute
-    # until this item/signal is received
     queue.put("DONE")
 
 
-def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
+def open_meas(file_path_or_buffer):
+    """Open a Meas/Mdc file path or in memory data for binary reading"""
+
+    if isinstance(file_path_or_buffer, str):
+        return open(file_path_or_buffer, mode="rb")
+
+    if is_buffer(file_path_or_buffer):
+        return open_buffer(file_path_or_buffer)
+
+    # the caller owns the file-like object
+    return nullcontext(file_path_or_buffer)
+
+
+def produce_file(queue: Queue, plock: Lock, file_path_or_buffer, name: str = None):
+    """Parse a Meas/Mdc file, from its path or from memory
+
+    For each measData/md element create a table item
+
+    and place it in the queue.
+
+    Parameters:
+        the items queue (Queue): queue
+        print lock (Lock): plock
+        file path or in memory data (str | bytes | memoryview | BinaryIO): file_path_or_buffer
+        name used in the messages and metadata, defaults to the file path (str): name
+    """
+
+    name = file_path_or_buffer if name is None else name
+
+    with open_meas(file_path_or_buffer) as stream:
+        with plock:
+            print(f"Parsing {name}")
+
+        metadata = {"file_path": name}
+
+        for _, element in etree.iterparse(
+            stream,
+            events=("end",),
+            tag=(
+                "{*}mfh",
+                "{*}md",
+                "{*}mff",
+            ),
+            no_network=True,
+            remove_blank_text=True,
+            remove_comments=True,
+            remove_pis=True,
+            huge_tree=True,
+            recover=False,
+        ):
+            localName = etree.QName(element.tag).localname
+
+            if localName == "md":
+                # <md>
+                #     <neid>
+                #         <neun>RNC Telecomville</neun>
+                #         <nedn>DC=a1.companyNN.com,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1</nedn>
+                #     </neid>
+                #     <mi>
+                #     ...
+                neid = element.find("neid")
+                if neid is not None:
+                    # neun = neid.find("neun").text
+                    nedn = neid.find("nedn").text
+
+                for mi in element.iterfind("mi"):
+                    table = {}
+                    # <mi>
+                    #   <mts>20210301141430</mts>
+                    #   <gp>900</gp>
+                    ts = mi.find("mts").text[:14]
+                    gp = mi.find("gp").text
+
+                    datetime_ts = datetime.strptime(ts, "%Y%m%d%H%M%S")
+                    time_gp = timedelta(seconds=float(gp))
+                    meas_ts = (datetime_ts - time_gp).strftime("%Y%m%d%H%M%S")
+
+                    table["ts"] = ts
+                    table["gp"] = gp
+
+                    # ...
+                    # <mt>attTCHSeizures</mt>
+                    # <mt>succTCHSeizures</mt>
+                    # <mt>attImmediateAssignProcs</mt>
+                    # <mt>succImmediateAssignProcs</mt>
+                    # ...
+                    mts = []
+                    for mt in mi.iterfind("mt"):
+                        mts.append(mt.text)
+
+                    table["mts"] = mts
+
+                    # ...
+                    # <mv>
+                    #     <moid>RncFunction=RF-1,UtranCell=Gbg-997</moid>
+                    #     <r>234</r>
+                    #     <r>345</r>
+                    #     <r>567</r>
+                    #     <r>789</r>
+                    # </mv>
+                    # ...
+                    table["rows"] = []
+                    for mv in mi.iterfind("mv"):
+                        ldn = mv.find("moid").text
+                        row = [meas_ts, nedn, ldn]
+                        for r in mv.iterfind("r"):
+                            row.append(r.text)
+
+                        table["rows"].append(row)
+
+                    # if there're rows in table
+                    # place it in the queue
+                    if table["rows"] != [] and mts != []:
+                        table_name = (ldn.split(",")[-1]).split("=")[0]  # UtranCell
+                        with plock:
+                            print(f"Placing {table_name}")
+
+                        queue.put(table)
+                    else:
+                        # ignoring this mi
+                        with plock:
+                            print("Warning, ignoring mi element due to lack of data")
+                            print(f"Number of mt's: #{len(mts)}")
+                            print(f"First mt: {mts[0]}")
+
+            elif localName == "mfh":
+                # <mfh>
+                #     <ffv>32.401 V5.0</ffv>
+                #     <sn>DC=a1.companyNN.com,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1</sn>
+                #     <st>RNC</st>
+                #     <vn>Company NN</vn>
+                #     <cbt>20210301141500</cbt>
+                # </mfh>
+                # file-like objects can't be read twice
+                # they rely on the document encoding
+                doc_encoding = (element.getroottree()).docinfo.encoding
+                encoding = (
+                    doc_encoding
+                    if doc_encoding is not None
+                    or not (
+                        isinstance(file_path_or_buffer, str)
+                        or is_buffer(file_path_or_buffer)
+                    )
+                    else get_xml_encoding(file_path_or_buffer)
+                )
+
+                metadata["encoding"] = encoding
+
+                for child in element:
+                    metadata[child.tag] = child.text
+
+            elif localName == "mff":
+                # <mff>
+                #   <ts>20210301143000</ts>
+                # </mff>
+                for child in element:
+                    metadata[child.tag] = child.text
+
+            element.clear(keep_tail=False)
+
+
+def consume_to_csv(
+    queue: Queue,
+    lock: Lock,
+    output_dir_or_bucket: str,
+    dn_index: str = None,
+    catalog: str = None,
+    producers: int = 1,
+):
     """Serialize tables received from queue to CSV file.
 
     Place the CSV file in the output dir (output_dir_or_bucket).
@@ -208,10 +323,24 @@ def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
     ST = measurement start time (YYYYMMDDHHMMSS)
     NEDN = network element distinguished name (A=a,B=b,C=c)
     LDN = measured object distinguished name, within the context of the NEDN (A=a,B=b,C=c)
+
+    With a DN index the configuration attributes of the measured object
+    are appended to the counters, the attribute columns follow the counter columns.
+
+    With a schema catalog the files are named after the catalog table id,
+    {table_name}-{gp}-v{version}.csv, stable across runs, instead of the columns hash.
+
+    dn_index: str -> DN index file path, written by teed.index.DnIndex.save
+    catalog: str -> schema catalog YAML file path, see teed.catalog.SchemaCatalog
+    producers: int -> number of producers, ends after receiving the DONE of each
     """
 
     writers = {}  # maps the node_key to it's writer
 
+    index = None if dn_index is None else DnIndex.load(dn_index)
+    index_columns = [] if index is None else index.attributes
+    schema_catalog = None if catalog is None else SchemaCatalog(catalog)
+
     with lock:
         print(f"Consumer starting {os.getpid()}")
 
@@ -219,9 +348,13 @@ def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
         try:
             item = queue.get(block=True, timeout=0.05)
 
-            # exit while loop on receiving DONE item
+            # exit while loop on receiving the DONE item of every producer
             if item == "DONE":
-                break
+                producers -= 1
+                if producers == 0:
+                    break
+
+                continue
 
             if item == "STOP":
                 with lock:
@@ -231,15 +364,16 @@ def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
 
             moid = item["rows"][0][2]  # RncFunction=RF-1,UtranCell=Gbg-997
             table_name = (moid.split(",")[-1]).split("=")[0]  # UtranCell
-            columns_values = item["mts"]
+            columns_values = item["mts"] + index_columns
             gp = item["gp"]
 
-            table_hash = hashlib.md5("".join(columns_values).encode()).hexdigest()
-            table_key = f"{table_name}_{gp}_{table_hash}"
+            if schema_catalog is None:
+                table_hash = hashlib.md5("".join(columns_values).encode()).hexdigest()
+                table_key = f"{table_name}-{gp}-{table_hash}"
+            else:
+                table_key = schema_catalog.table_id(f"{table_name}-{gp}", columns_values)
 
-            csv_path = path.normpath(
-                f"{output_dir_or_bucket}{path.sep}{table_name}-{gp}-{table_hash}.csv"
-            )
+            csv_path = path.normpath(f"{output_dir_or_bucket}{path.sep}{table_key}.csv")
 
             if not (path.exists(csv_path)):
                 # create new file
@@ -276,6 +410,9 @@ def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
 
             # serialize rows to csv file
             for row in item["rows"]:
+                if index is not None:
+                    row = row + index.values(row[1], row[2])
+
                 writer.writerow(row)
 
             # flush the data to disk
@@ -293,8 +430,13 @@ def consume_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
         except Empty:
             continue
 
+    if schema_catalog is not None:
+        schema_catalog.save()
+
 
-def consume_ldn_natural_key_to_csv(queue: Queue, lock: Lock, output_dir_or_bucket: str):
+def consume_ldn_natural_key_to_csv(
+    queue: Queue, lock: Lock, output_dir_or_bucket: str, producers: int = 1
+):
     """Serialize tables received from queue to CSV file.
 
     Place the CSV file in the output dir (output_dir_or_bucket).
@@ -306,6 +448,8 @@ def consume_ldn_natural_key_to_csv(queue: Queue, lock: Lock, output_dir_or_bucke
     The CSV contain at least one columns: ST
 
     ST = measurement start time (YYYYMMDDHHMMSS)
+
+    producers: int -> number of producers, ends after receiving the DONE of each
     """
 
     writers = {}  # maps the node_key to it's writer
@@ -317,9 +461,13 @@ def consume_ldn_natural_key_to_csv(queue: Queue, lock: Lock, output_dir_or_bucke
         try:
             item = queue.get(block=True, timeout=0.05)
 
-            # exit while loop on receiving DONE item
+            # exit while loop on receiving the DONE item of every producer
             if item == "DONE":
-                break
+                producers -= 1
+                if producers == 0:
+                    break
+
+                continue
 
             if item == "STOP":
                 with lock:
@@ -420,6 +568,7 @@ def consume_ldn_natural_key_to_parquet(
     node_expression=None,
     node_partition_by=False,
     output_fs=fs.LocalFileSystem(),
+    producers: int = 1,
 ):
     """Serialize tables received from queue to Parquet file.
 
@@ -444,6 +593,7 @@ def consume_ldn_natural_key_to_parquet(
     node_expression: str -> use expression to calculate the node key and replace the nedn with it (reduces amount of data)
     node_partition_by: bool -> partition by node if True
     output_fs: pyarrow.fs.FileSystem -> pyarrow Filesystem to output the dataset
+    producers: int -> number of producers, ends after receiving the DONE of each
     """
 
     if node_partition_by and not (node_expression):
@@ -516,9 +666,13 @@ def consume_ldn_natural_key_to_parquet(
         try:
             item = queue.get(block=True, timeout=0.05)
 
-            # exit while loop on receiving DONE item
+            # exit while loop on receiving the DONE item of every producer
             if item == "DONE":
-                break
+                producers -= 1
+                if producers == 0:
+                    break
+
+                continue
 
             if item == "STOP":
                 with lock:
@@ -657,6 +811,265 @@ def consume_ldn_natural_key_to_parquet(
             continue
 
 
+def consume_to_arrow(
+    queue: Queue,
+    lock: Lock,
+    output_dir_or_bucket: str,
+    ipc_format: str = "file",
+    sample_size: int = 1000,
+    batch_size: int = 65536,
+    output_fs=fs.LocalFileSystem(),
+    dn_index: str = None,
+    catalog: str = None,
+    producers: int = 1,
+):
+    """Serialize tables received from queue to Arrow IPC files.
+
+    Identical to the consume_to_csv method, the files have the same name
+    and columns: ST, NEDN, LDN and the counters.
+
+    But writes Arrow record batches, to the file format (Feather V2, .arrow)
+    or to the stream format (.arrows). The file format can be memory mapped
+    by the reader. The stream format can be read while it's written,
+    a named pipe (FIFO) previously created with the file name receives the batches.
+
+    The counter columns are typed, the type is inferred from the first rows.
+
+    Take notice: files are truncated, not appended, when the consumer starts.
+
+    ipc_format: str -> IPC format, file or stream
+    sample_size: int -> rows used to infer the counters types
+    batch_size: int -> rows per record batch
+    output_fs: pyarrow.fs.FileSystem -> pyarrow Filesystem to output the files
+    dn_index: str -> DN index file path, appends the indexed attributes as in consume_to_csv
+    catalog: str -> schema catalog YAML file path, names the files as in consume_to_csv
+    producers: int -> number of producers, ends after receiving the DONE of each
+    """
+
+    if ipc_format not in IPC_FORMATS:
+        raise TeedException(f"Error, unknown IPC format {ipc_format}")
+
+    def open_writer(table_name, table_key, part, schema):
+        suffix = "" if part == 0 else f"-{part}"
+        ipc_path = output_fs.normalize_path(
+            f"{output_dir_or_bucket}{path.sep}{table_key}{suffix}{IPC_FORMATS[ipc_format]}"
+        )
+
+        with lock:
+            print(f"Created {ipc_path}")
+
+        return IpcFileWriter(ipc_path, schema, output_fs, ipc_format)
+
+    with lock:
+        print(f"Consumer starting {os.getpid()}")
+
+    index = None if dn_index is None else DnIndex.load(dn_index)
+    index_columns = [] if index is None else index.attributes
+    schema_catalog = None if catalog is None else SchemaCatalog(catalog)
+
+    writer = ColumnarWriter(open_writer, batch_size, sample_size)
+
+    try:
+        while True:
+            try:
+                item = queue.get(block=True, timeout=0.05)
+
+                # exit while loop on receiving the DONE item of every producer
+                if item == "DONE":
+                    producers -= 1
+                    if producers == 0:
+                        break
+
+                    continue
+
+                if item == "STOP":
+                    with lock:
+                        print("Stop received!")
+
+                    break
+
+                moid = item["rows"][0][2]  # RncFunction=RF-1,UtranCell=Gbg-997
+                table_name = (moid.split(",")[-1]).split("=")[0]  # UtranCell
+                columns_values = item["mts"] + index_columns
+                gp = item["gp"]
+
+                if schema_catalog is None:
+                    table_hash = hashlib.md5("".join(columns_values).encode()).hexdigest()
+                    table_key = f"{table_name}-{gp}-{table_hash}"
+                else:
+                    table_key = schema_catalog.table_id(
+                        f"{table_name}-{gp}", columns_values
+                    )
+                columns = ["ST", "NEDN", "LDN"] + columns_values
+
+                for row in item["rows"]:
+                    if index is not None:
+                        row = row + index.values(row[1], row[2])
+
+                    writer.write(table_key, table_name, columns, row, key_columns=3)
+
+            except KeyboardInterrupt:
+                with lock:
+                    print("KeyboardInterrupt received, stopping!")
+
+                break
+
+            except Empty:
+                continue
+
+    finally:
+        writer.close()
+
+        if schema_catalog is not None:
+            schema_catalog.save()
+
+
+def consume_to_sqlite(
+    queue: Queue,
+    lock: Lock,
+    output_dir_or_bucket: str,
+    db_name: str = "meas.sqlite",
+    batch_size: int = 50000,
+    pragmas: dict = None,
+    dn_index: str = None,
+    producers: int = 1,
+):
+    """Serialize tables received from queue to a SQLite database.
+
+    Place the database file, db_name, in the output dir (output_dir_or_bucket).
+
+    Creates a table per measured object class and granularity period, UtranCell_900.
+    Tables and columns are created if they don't exist, data is appended.
+
+    The tables contain at least three columns, in this exact order: ST, NEDN and LDN.
+    An index over these columns is created after the load.
+
+    The counter columns have INTEGER affinity.
+
+    db_name: str -> SQLite database file name
+    batch_size: int -> rows per insert batch
+    pragmas: dict -> pragmas applied to the connection, default to teed.sqlite.DEFAULT_PRAGMAS
+    dn_index: str -> DN index file path, appends the indexed attributes as in consume_to_csv
+    producers: int -> number of producers, ends after receiving the DONE of each
+    """
+
+    index = None if dn_index is None else DnIndex.load(dn_index)
+    index_columns = [] if index is None else index.attributes
+
+    with lock:
+        print(f"Consumer starting {os.getpid()}")
+
+    db_path = path.normpath(f"{output_dir_or_bucket}{path.sep}{db_name}")
+    loader = SqliteLoader(db_path, batch_size, pragmas)
+
+    try:
+        while True:
+            try:
+                item = queue.get(block=True, timeout=0.05)
+
+                # exit while loop on receiving the DONE item of every producer
+                if item == "DONE":
+                    producers -= 1
+                    if producers == 0:
+                        break
+
+                    continue
+
+                if item == "STOP":
+                    with lock:
+                        print("Stop received!")
+
+                    break
+
+                moid = item["rows"][0][2]  # RncFunction=RF-1,UtranCell=Gbg-997
+                table_name = (moid.split(",")[-1]).split("=")[0]  # UtranCell
+                columns = ["ST", "NEDN", "LDN"] + item["mts"] + index_columns
+
+                for row in item["rows"]:
+                    if index is not None:
+                        row = row + index.values(row[1], row[2])
+
+                    loader.insert(
+                        f"{table_name}_{item['gp']}",
+                        columns,
+                        row,
+                        key_columns=3,
+                        value_type="INTEGER",
+                    )
+
+            except KeyboardInterrupt:
+                with lock:
+                    print("KeyboardInterrupt received, stopping!")
+
+                break
+
+            except Empty:
+                continue
+
+    finally:
+        loader.close()
+
+        with lock:
+            print(f"Loaded {db_path}")
+
+
+# consumer of each output format
+CONSUMERS = {
+    "csv": consume_to_csv,
+    "arrow": consume_to_arrow,
+    "sqlite": consume_to_sqlite,
+}
+
+
+def produce_parallel(
+    queue: Queue, lock: Lock, stop: Event, pathname: str, recursive: bool, producers: int
+):
+    """Start the producer processes and feed them the file paths from pathname glob
+
+    Returns when all the producers have ended. A producer that died
+    without it's DONE signal, killed for example, stops the consumer.
+    """
+
+    # file paths work queue
+    paths = Queue()
+
+    producer_procs = [
+        Process(
+            target=produce_paths,
+            name=f"producer-{i}",
+            args=(paths, queue, lock, stop),
+        )
+        for i in range(producers)
+    ]
+    for producer_proc in producer_procs:
+        producer_proc.start()
+
+    try:
+        for file_path in glob.iglob(pathname, recursive=recursive):
+            if stop.is_set():
+                break
+
+            paths.put(file_path)
+
+        # a DONE signal per producer
+        for _ in producer_procs:
+            paths.put("DONE")
+
+    finally:
+        for producer_proc in producer_procs:
+            producer_proc.join()
+
+        # the paths left by stopped producers aren't read
+        paths.cancel_join_thread()
+
+        for producer_proc in producer_procs:
+            if producer_proc.exitcode != 0:
+                print(f"Producer {producer_proc.name} exit code {producer_proc.exitcode}")
+                stop.set()
+                queue.put("STOP")
+                break
+
+
 def handler_stop(signum, frame):
     """Stop signal handler"""
 
@@ -669,6 +1082,7 @@ def parse(
     recursive: bool = False,
     consume=consume_to_csv,
     consume_kwargs={},
+    producers: int = 1,
 ):
     """Go through the files in pathname, extracts data
 
@@ -678,6 +1092,19 @@ def parse(
 
     The producer, the parent process, waits for the consumer to finish.
 
+    Instead of a pathname glob, a list of in memory files can be given:
+    bytes, bytearray, memoryview or binary file-like objects.
+    They're parsed in place, no temporary files are written.
+
+    With producers > 1 the pathname files are parsed in parallel by producer
+    processes pulling the file paths from a work queue, see produce_paths,
+    and the consumer receives the producers count in it's producers argument.
+    A consume without a producers argument gets the files parsed by the parent
+    process only. The in memory files are always parsed by the parent process.
+
+    Raise:
+        TeedException if the consumer process failed
+
     This method is based on the example found in:
 
     https://stackoverflow.com/questions/11515944/how-to-use-multiprocessing-queue-in-python
@@ -691,9 +1118,20 @@ def parse(
     # control resource access using a lock
     lock = Lock()
 
+    # stops the producer processes
+    stop = Event()
+
     # Use signal handler
     signal.signal(signal.SIGTERM, handler_stop)
 
+    parallel = producers > 1 and isinstance(pathname, str)
+    if parallel and "producers" not in inspect.signature(consume).parameters:
+        print(f"Consumer {consume.__name__} has no producers argument, one producer used")
+        parallel = False
+
+    if parallel:
+        consume_kwargs = {**consume_kwargs, "producers": producers}
+
     try:
         # the consumer process
         consumer_proc = None
@@ -711,25 +1149,65 @@ def parse(
 
         # Go through the files retreived from pathname
         # and start producing items to the queue
-        produce(queue, lock, pathname)
+        if parallel:
+            produce_parallel(queue, lock, stop, pathname, recursive, producers)
+        elif isinstance(pathname, str):
+            produce(queue, lock, pathname, recursive)
+        else:
+            produce_buffers(queue, lock, pathname)
 
         # wait for child processes to end
         consumer_proc.join()
     except KeyboardInterrupt:
+        stop.set()
         queue.put("STOP")
 
-    except TeedException as e:
+    except (TeedException, etree.XMLSyntaxError) as e:
+        stop.set()
         queue.put("STOP")
         print(e)
 
     # Wait for the consumer to end
     consumer_proc.join()
 
+    if consumer_proc.exitcode != 0:
+        # nobody reads the items left in the queue
+        queue.cancel_join_thread()
+        raise TeedException(
+            f"Error, consumer {consume.__name__} exit code {consumer_proc.exitcode}"
+        )
+
     print("Producer and consumer done, exiting.")
 
 
 @program.command(name="parse")
-def parse_program(pathname: str, output_dir: str, recursive: bool = False) -> None:
+def parse_program(
+    pathname: str,
+    output_dir: str,
+    recursive: bool = False,
+    output_format: str = typer.Option(
+        "csv",
+        "--output-format",
+        "-of",
+        help="Output files format: csv, arrow or sqlite",
+    ),
+    dn_index: str = typer.Option(
+        None,
+        "--dn-index",
+        help="DN index file, appends its BulkCm attributes to the counters",
+    ),
+    catalog: str = typer.Option(
+        None,
+        "--catalog",
+        help="Schema catalog YAML file, names the csv and arrow tables with stable ids",
+    ),
+    producers: int = typer.Option(
+        1,
+        "--producers",
+        "-p",
+        help="Producer processes parsing the files in parallel",
+    ),
+) -> None:
     """Parse Mdc files returned by pathname glob and
 
     place it's content in output local filesystem directory CSV files.
@@ -740,11 +1218,40 @@ def parse_program(pathname: str, output_dir: str, recursive: bool = False) -> No
         meas/mdc pathname glob (str): pathname
         search files recursively in subdirectories (bool): recursive
         output directory (str): output_dir
+        output files format, csv, arrow or sqlite (str): output_format
+        DN index file path, built by teed index build (str): dn_index
+        schema catalog YAML file path, csv and arrow (str): catalog
+        producer processes parsing the files in parallel (int): producers
     """
 
     try:
+        if producers < 1:
+            raise TeedException(f"Error, invalid number of producers {producers}")
+
+        if output_format not in CONSUMERS:
+            raise TeedException(f"Error, unknown output format {output_format}")
+
+        if dn_index is not None and not path.exists(dn_index):
+            raise TeedException(f"Error, DN index {dn_index} doesn't exist")
+
+        consume_kwargs = {} if dn_index is None else {"dn_index": dn_index}
+        if catalog is not None:
+            if output_format not in ("csv", "arrow"):
+                raise TeedException(
+                    "Error, the schema catalog needs the csv or arrow format"
+                )
+
+            consume_kwargs["catalog"] = catalog
+
         start = time.perf_counter()
-        parse(pathname, output_dir, recursive)
+        parse(
+            pathname,
+            output_dir,
+            recursive,
+            consume=CONSUMERS[output_format],
+            consume_kwargs=consume_kwargs,
+            producers=producers,
+        )
         duration = time.perf_counter() - start
         print(f"Duration(s): {duration}")
     except TeedException as e:
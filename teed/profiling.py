@@ -0,0 +1,256 @@
+import hashlib
+import math
+from array import array
+
+from teed.columnar import is_float, is_int
+
+# sketches default sizes, the memory per attribute is about
+# 2 ** HLL_PRECISION bytes plus CMS_DEPTH * CMS_WIDTH * 4 bytes
+HLL_PRECISION = 11
+CMS_WIDTH = 1024
+CMS_DEPTH = 4
+TOP_K = 10
+
+HASH_MASK = (1 << 64) - 1
+
+
+def hash_value(value: str) -> int:
+    """Stable 64 bit hash of value, the same in every process"""
+
+    return int.from_bytes(
+        hashlib.blake2b(value.encode("utf-8", "surrogatepass"), digest_size=8).digest(),
+        "little",
+    )
+
+
+class HyperLogLog:
+    """HyperLogLog distinct values counter
+
+    Estimates the number of distinct values in 2 ** precision bytes,
+    the standard error is 1.04 / sqrt(2 ** precision), 2.3% by default.
+    Small cardinalities use linear counting and are almost exact.
+
+    Parameters:
+        registers bits, 4 to 16 (int): precision
+    """
+
+    def __init__(self, precision: int = HLL_PRECISION):
+        self.precision = precision
+        self.registers = bytearray(1 << precision)
+
+    def add(self, value_hash: int):
+        bits = 64 - self.precision
+        index = value_hash >> bits
+        rank = bits - (value_hash & ((1 << bits) - 1)).bit_length() + 1
+
+        if rank > self.registers[index]:
+            self.registers[index] = rank
+
+    def merge(self, other: "HyperLogLog"):
+        self.registers = bytearray(map(max, self.registers, other.registers))
+
+    def count(self) -> int:
+        m = len(self.registers)
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / sum(2.0**-register for register in self.registers)
+
+        zeros = self.registers.count(0)
+        if estimate <= 2.5 * m and zeros > 0:
+            # linear counting
+            estimate = m * math.log(m / zeros)
+
+        return round(estimate)
+
+
+class CountMinSketch:
+    """Count-min sketch of the values frequency
+
+    The estimates are never lower than the true counts, and are over
+    by at most 2 / width of the total count with probability 1 - 1 / 2 ** depth.
+
+    Parameters:
+        counters per row (int): width
+        rows, one hash function each (int): depth
+    """
+
+    def __init__(self, width: int = CMS_WIDTH, depth: int = CMS_DEPTH):
+        self.width = width
+        self.depth = depth
+        self.counters = array("I", [0]) * (width * depth)
+
+    def _indexes(self, value_hash: int):
+        # double hashing, the row hashes derived from the 64 bit hash halves
+        h1 = value_hash & 0xFFFFFFFF
+        h2 = value_hash >> 32
+        for row in range(self.depth):
+            yield row * self.width + (h1 + row * h2) % self.width
+
+    def add(self, value_hash: int, count: int = 1) -> int:
+        """Add count to the value, returns the value estimate"""
+
+        estimate = None
+        for i in self._indexes(value_hash):
+            self.counters[i] += count
+            if estimate is None or self.counters[i] < estimate:
+                estimate = self.counters[i]
+
+        return estimate
+
+    def estimate(self, value_hash: int) -> int:
+        return min(self.counters[i] for i in self._indexes(value_hash))
+
+
+class TopK:
+    """The k most frequent values, counted by a count-min sketch
+
+    Only k candidate values are kept, a new value replaces the
+    least frequent candidate when it's estimate is higher.
+
+    Parameters:
+        number of values (int): k
+        count-min sketch counters per row (int): width
+        count-min sketch rows (int): depth
+    """
+
+    def __init__(self, k: int = TOP_K, width: int = CMS_WIDTH, depth: int = CMS_DEPTH):
+        self.k = k
+        self.sketch = CountMinSketch(width, depth)
+        self.candidates = {}  # maps the value to it's estimate
+
+    def add(self, value: str, value_hash: int):
+        estimate = self.sketch.add(value_hash)
+
+        if value in self.candidates or len(self.candidates) < self.k:
+            self.candidates[value] = estimate
+            return
+
+        least = min(self.candidates, key=self.candidates.get)
+        if estimate > self.candidates[least]:
+            del self.candidates[least]
+            self.candidates[value] = estimate
+
+    def top(self) -> list:
+        """The (value, estimated count) pairs, most frequent first"""
+
+        return sorted(self.candidates.items(), key=lambda item: (-item[1], item[0]))
+
+
+class AttributeProfile:
+    """Bounded memory statistics of a (class, attribute) values
+
+    Parameters:
+        HyperLogLog precision (int): precision
+        number of top values (int): k
+        count-min sketch counters per row (int): width
+        count-min sketch rows (int): depth
+    """
+
+    def __init__(
+        self,
+        precision: int = HLL_PRECISION,
+        k: int = TOP_K,
+        width: int = CMS_WIDTH,
+        depth: int = CMS_DEPTH,
+    ):
+        self.count = 0
+        self.empty = 0
+        self.numeric = 0
+        self.min = None
+        self.max = None
+        self.distinct = HyperLogLog(precision)
+        self.top = TopK(k, width, depth)
+
+    def add(self, value: str):
+        self.count += 1
+
+        if value is None or value.strip() == "":
+            self.empty += 1
+            return
+
+        value_hash = hash_value(value)
+        self.distinct.add(value_hash)
+        self.top.add(value, value_hash)
+
+        if is_int(value):
+            number = int(value)
+        elif is_float(value):
+            number = float(value)
+        else:
+            return
+
+        self.numeric += 1
+        if self.min is None or number < self.min:
+            self.min = number
+        if self.max is None or number > self.max:
+            self.max = number
+
+
+class Profiler:
+    """Profiles the attributes of the parsed nodes, in one pass with bounded memory
+
+    Per class it counts the nodes, per (class, attribute) the distinct values,
+    with a HyperLogLog, the top values, with a count-min sketch,
+    the null and empty ratios and, if all the values are numbers, the min and max.
+
+    A node without the attribute counts as null.
+
+    Parameters:
+        HyperLogLog precision (int): precision
+        number of top values (int): k
+        count-min sketch counters per row (int): width
+        count-min sketch rows (int): depth
+    """
+
+    def __init__(
+        self,
+        precision: int = HLL_PRECISION,
+        k: int = TOP_K,
+        width: int = CMS_WIDTH,
+        depth: int = CMS_DEPTH,
+    ):
+        self._sketch_sizes = (precision, k, width, depth)
+        self._nodes = {}  # maps the class to it's nodes count
+        self._profiles = {}  # maps the class to it's attributes profiles
+
+    def add(self, node: dict):
+        node_name = node["node_name"]
+        self._nodes[node_name] = self._nodes.get(node_name, 0) + 1
+
+        profiles = self._profiles.setdefault(node_name, {})
+        for attribute, value in node["node_values"].items():
+            profile = profiles.get(attribute)
+            if profile is None:
+                profile = AttributeProfile(*self._sketch_sizes)
+                profiles[attribute] = profile
+
+            profile.add(value)
+
+    def report(self) -> dict:
+        """The profile report, by class and attribute
+
+        {"UtranCell": {"nodes": 2, "attributes": {"sc": {"distinct": 2, "null_ratio": 0.0,
+        "empty_ratio": 0.0, "top": [{"value": "111", "count": 1}, ...], "min": 111, "max": 222}}}}
+        """
+
+        report = {}
+        for node_name, nodes in self._nodes.items():
+            attributes = {}
+            for attribute, profile in self._profiles[node_name].items():
+                filled = profile.count - profile.empty
+                all_numeric = filled > 0 and profile.numeric == filled
+
+                attributes[attribute] = {
+                    "distinct": profile.distinct.count(),
+                    "null_ratio": round((nodes - profile.count) / nodes, 6),
+                    "empty_ratio": round(profile.empty / nodes, 6),
+                    "top": [
+                        {"value": value, "count": count}
+                        for value, count in profile.top.top()
+                    ],
+                    "min": profile.min if all_numeric else None,
+                    "max": profile.max if all_numeric else None,
+                }
+
+            report[node_name] = {"nodes": nodes, "attributes": attributes}
+
+        return report
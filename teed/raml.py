@@ -0,0 +1,315 @@
+# python -m teed raml parse data/raml.xml data
+# python -m teed raml parse data/raml.xml data --output-format parquet
+
+from os import path
+from typing import Generator, List
+
+import pyarrow.fs as fs
+import typer
+
+from teed import TeedException, bulkcm
+from teed.bulkcm import BulkCmParser, get_localname
+
+program = typer.Typer()
+
+
+def get_node_path(dist_name: str) -> dict:
+    """The node path of a RAML distName, class -> id
+
+    PLMN-PLMN/RNC-1/WBTS-2/WCEL-3 -> {"PLMN": "PLMN", "RNC": "1", "WBTS": "2", "WCEL": "3"}
+    """
+
+    node_path = {}
+    for component in dist_name.split("/"):
+        class_name, _, node_id = component.partition("-")
+        node_path[class_name] = node_id
+
+    return node_path
+
+
+class RamlParser(BulkCmParser):
+    """The parser target object that receives
+
+    etree parse events for RAML parsing
+
+    RAML 2.0 is the XML configuration dump of Nokia networks:
+
+    <raml version="2.0" xmlns="raml20.xsd">
+      <cmData type="actual">
+        <header>
+          <log dateTime="2011-05-18T10:00:00" action="created" appInfo="ActualExporter"/>
+        </header>
+        <managedObject class="WCEL" version="RN6.0" distName="PLMN-PLMN/RNC-1/WBTS-2/WCEL-3" id="1234">
+          <p name="name">Cell 3</p>
+          <list name="URAId"><p>1</p><p>2</p></list>
+          <list name="AdjsList"><item><p name="AdjsCI">100</p><p name="AdjsLAC">200</p></item></list>
+        </managedObject>
+      </cmData>
+    </raml>
+
+    Each managedObject is a node, its class the node name, the distName
+    components the node path and the p elements the node values.
+    A list of values is joined by ";", the items of a list are joined by ";"
+    and their name=value pairs by ",": AdjsCI=100,AdjsLAC=200
+
+    The managedObject operation attribute, in plan files, is the node_modifier.
+
+    The nodes are sent in the BulkCmParser node protocol, to the same streams,
+    with the same elements filters, predicates and batches.
+    The excluded managedObjects, or not matching a DN predicate, aren't processed.
+
+    Parameters:
+        nodes stream (Generator): stream
+        classes to parse (list): include_elements
+        classes to ignore (list): exclude_elements
+        nodes per send, 0 sends one node at a time (int): batch_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+    """
+
+    def __init__(
+        self,
+        stream: Generator,
+        include_elements: list = [],
+        exclude_elements: list = [],
+        batch_size: int = 0,
+        where: list = [],
+    ):
+        super().__init__(stream, include_elements, exclude_elements, batch_size, where)
+
+        # the managedObject node, p name, list values and list item being parsed
+        self._node = None
+        self._is_p = False
+        self._p_name = None
+        self._list_name = None
+        self._list_values = None
+        self._item = None
+
+    def start(self, tag, attrib):
+        if self._skip_depth > 0:
+            self._skip_depth += 1
+            return
+
+        localname = get_localname(tag)
+
+        if localname == "p":
+            # <p name="AdminCellState">1</p>
+            self._is_p = True
+            self._p_name = attrib.get("name")
+            self._text = []
+
+        elif localname == "managedObject":
+            # <managedObject class="WCEL" distName="PLMN-PLMN/RNC-1/WBTS-2/WCEL-3">
+            class_name = attrib.get("class")
+            node_path = get_node_path(attrib.get("distName", ""))
+
+            if self._is_excluded(class_name) or not all(
+                predicate.match(node_path[dn_class_name])
+                for dn_class_name, predicates in self._dn_predicates.items()
+                if dn_class_name in node_path
+                for predicate in predicates
+            ):
+                # skip the managedObject
+                self._skip_depth = 1
+                return
+
+            self._node = {
+                "node_name": class_name,
+                "node_path": node_path,
+                "node_values": {},
+            }
+
+            modifier = attrib.get("operation")
+            if modifier is not None:
+                self._node["node_modifier"] = modifier
+
+        elif localname == "list":
+            # <list name="URAId">
+            self._list_name = attrib.get("name")
+            self._list_values = []
+
+        elif localname == "item":
+            self._item = []
+
+        elif localname in ("cmData", "log"):
+            # <cmData type="actual" scope="all">
+            # <log dateTime="2011-05-18T10:00:00" action="created" appInfo="ActualExporter">
+            self._metadata.update(attrib)
+
+    def end(self, tag):
+        if self._skip_depth > 0:
+            self._skip_depth -= 1
+            return
+
+        localname = get_localname(tag)
+
+        if localname == "p":
+            value = "".join(self._text).strip()
+            self._text = []
+
+            if self._item is not None:
+                self._item.append(f"{self._p_name}={value}")
+            elif self._list_values is not None:
+                self._list_values.append(value)
+            elif self._node is not None:
+                self._node["node_values"][self._p_name] = value
+
+            self._is_p = False
+
+        elif localname == "item":
+            self._list_values.append(",".join(self._item))
+            self._item = None
+
+        elif localname == "list":
+            if self._node is not None:
+                self._node["node_values"][self._list_name] = ";".join(self._list_values)
+            self._list_values = None
+
+        elif localname == "managedObject":
+            if self._matches(self._node):
+                self._send(self._node)
+            self._node = None
+
+    def data(self, data):
+        # only the p elements text is kept
+        if self._is_p and self._skip_depth == 0:
+            self._text.append(data)
+
+    def _is_excluded(self, class_name: str) -> bool:
+        if class_name in self._exclude_elements:
+            return True
+
+        return "*" in self._exclude_elements and class_name not in self._include_elements
+
+
+def parse(
+    file_uri: str,
+    output_dir_or_bucket: str,
+    stream: Generator,
+    include_elements: list = [],
+    exclude_elements: list = [],
+    output_fs: fs.FileSystem = fs.LocalFileSystem(),
+    backend: str = "lxml",
+    batch_size: int = 0,
+    file_name: str = None,
+    where: list = [],
+) -> tuple:
+    """Parse RAML file and place it's content in output directories files
+
+    bulkcm.parse with the RamlParser target, see bulkcm.parse
+
+    Parameters:
+        file_uri or in memory data (str | bytes | memoryview | BinaryIO): file_uri
+        output directory (str): output_dir_or_bucket
+        send parsed nodes to stream (Generator): stream
+        classes to parse (list): include_elements
+        classes to ignore (list): exclude_elements
+        output filesystem (pyarrow.fs.FileSystem): output_fs
+        XML parser backend, lxml, expat or auto (str): backend
+        nodes sent to stream per batch, 0 sends one node at a time (int): batch_size
+        in memory data file name, names the metadata file (str): file_name
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+
+    Returns:
+        raml metadata and parsing duration (dict, timedelta): (metadata, duration)
+    """
+
+    return bulkcm.parse(
+        file_uri,
+        output_dir_or_bucket,
+        stream,
+        include_elements,
+        exclude_elements,
+        output_fs,
+        backend,
+        batch_size,
+        file_name,
+        where,
+        target_class=RamlParser,
+    )
+
+
+@program.command(name="parse")
+def parse_program(
+    file_path_or_uri: str,
+    output_dir: str,
+    include_elements: List[str] = typer.Option(
+        [],
+        "--include-element",
+        "-ie",
+        help="Parse class",
+    ),
+    exclude_elements: List[str] = typer.Option(
+        [],
+        "--exlude-element",
+        "-ee",
+        help="Ignore class",
+    ),
+    output_format: str = typer.Option(
+        "csv",
+        "--output-format",
+        "-of",
+        help="Output files format: csv, parquet, arrow, sqlite or tree",
+    ),
+    backend: str = typer.Option(
+        "lxml",
+        "--backend",
+        "-b",
+        help="XML parser backend: lxml, expat or auto",
+    ),
+    batch_size: int = typer.Option(
+        bulkcm.NODES_BATCH_SIZE,
+        "--batch-size",
+        help="Nodes sent to the output per batch, 0 sends one node at a time",
+    ),
+    where: List[str] = typer.Option(
+        [],
+        "--where",
+        "-w",
+        help="Predicate, Class=pattern or Class.attribute=pattern",
+    ),
+) -> None:
+    """Parse RAML file and place it's content in output directories files
+
+    Command-line program for raml.parse function
+
+    Parameters:
+        raml file path (str): local file path or PyArrow URI
+        output directory (str): output_dir
+        classes to parse (list): include_elements
+        classes to ignore (list): exclude_elements
+        output files format, csv, parquet, arrow, sqlite or tree (str): output_format
+        XML parser backend, lxml, expat or auto (str): backend
+        nodes sent to the output per batch (int): batch_size
+        predicates, Class=pattern or Class.attribute=pattern (list): where
+    """
+
+    print(f"Parsing {file_path_or_uri}")
+
+    # check if file_path_or_uri is a local file path of a URI
+    if path.exists(file_path_or_uri):
+        file_uri = f"file://{path.abspath(file_path_or_uri)}"
+    else:
+        file_uri = file_path_or_uri
+
+    try:
+        stream = bulkcm.create_stream(output_format, output_dir, file_path_or_uri)
+
+        _, duration = parse(
+            file_uri,
+            output_dir,
+            stream,
+            include_elements,
+            exclude_elements,
+            backend=backend,
+            batch_size=batch_size,
+            where=where,
+        )
+        print(f"Duration: {duration}")
+    except TeedException as e:
+        typer.secho(f"Error parsing {file_path_or_uri}")
+        typer.secho(str(e), err=True, fg=typer.colors.RED, bold=True)
+        exit(1)
+
+
+if __name__ == "__main__":
+    program()
@@ -0,0 +1,169 @@
+import sqlite3
+
+# pragmas tuned for bulk loading
+# the database is a parsing output, it can be rebuilt from the source files
+# so we trade durability for speed: no journal sync and no fsync
+# the journal is kept in memory, a failed batch ROLLBACK is undefined without it
+DEFAULT_PRAGMAS = {
+    "journal_mode": "MEMORY",
+    "synchronous": "OFF",
+    "temp_store": "MEMORY",
+    "locking_mode": "EXCLUSIVE",
+    "cache_size": -262144,  # 256 MiB
+}
+
+
+def quote(identifier: str) -> str:
+    """Quote a SQLite identifier (table or column name)"""
+
+    return '"' + identifier.replace('"', '""') + '"'
+
+
+class SqliteLoader:
+    """Bulk loads rows into a SQLite database, one table per class or schema
+
+    Rows are buffered per table and columns and inserted in batches
+    with executemany, each batch inside an explicit transaction. A failed
+    batch is rolled back, which needs a journal: journal_mode not OFF.
+
+    Tables are created on the first row, columns missing from
+    an existing table are added. After the load an index is created
+    on the key columns of each table.
+
+    Parameters:
+        SQLite database file path (str): db_path
+        rows per insert batch (int): batch_size
+        pragmas applied to the connection (dict): pragmas
+    """
+
+    def __init__(self, db_path: str, batch_size: int = 50000, pragmas: dict = None):
+        self._batch_size = batch_size
+        self._connection = sqlite3.connect(db_path, isolation_level=None)
+
+        for pragma, value in (DEFAULT_PRAGMAS if pragmas is None else pragmas).items():
+            self._connection.execute(f"PRAGMA {pragma}={value}")
+
+        # maps the table name to it's columns and key columns
+        self._tables = {}
+        for (table_name,) in self._connection.execute(
+            "SELECT name FROM sqlite_master WHERE type='table'"
+        ):
+            columns = [
+                row[1]
+                for row in self._connection.execute(
+                    f"PRAGMA table_info({quote(table_name)})"
+                )
+            ]
+            self._tables[table_name] = {"columns": columns, "keys": []}
+
+        # maps the (table name, columns) to it's insert statement and rows
+        self._batches = {}
+
+    def insert(
+        self,
+        table_name: str,
+        columns: list,
+        row: list,
+        key_columns: int = 0,
+        value_type: str = "",
+    ):
+        """Buffer a row, insert the rows when the batch is complete
+
+        Parameters:
+            table name (str): table_name
+            columns names (list): columns
+            row values (list): row
+            number of leading key columns, indexed after the load (int): key_columns
+            declared type of the non key columns, sets their affinity (str): value_type
+        """
+
+        batch_key = (table_name, tuple(columns))
+        batch = self._batches.get(batch_key)
+
+        if batch is None:
+            self._prepare_table(table_name, columns, row, key_columns, value_type)
+            statement = (
+                f"INSERT INTO {quote(table_name)} "
+                f"({', '.join(quote(column) for column in columns)}) "
+                f"VALUES ({', '.join('?' for _ in columns)})"
+            )
+            batch = {"statement": statement, "rows": []}
+            self._batches[batch_key] = batch
+
+        batch["rows"].append(row)
+
+        if len(batch["rows"]) >= self._batch_size:
+            self._flush(batch)
+
+    def close(self):
+        """Insert the remaining rows, create the key indexes and close the database"""
+
+        for batch in self._batches.values():
+            self._flush(batch)
+
+        self._batches = {}
+
+        self._connection.execute("BEGIN")
+        for table_name, table in self._tables.items():
+            if table["keys"] != []:
+                self._connection.execute(
+                    f"CREATE INDEX IF NOT EXISTS {quote(table_name + '_key')} "
+                    f"ON {quote(table_name)} "
+                    f"({', '.join(quote(column) for column in table['keys'])})"
+                )
+        self._connection.execute("COMMIT")
+
+        self._connection.execute("PRAGMA optimize")
+        self._connection.close()
+
+    def _prepare_table(self, table_name, columns, row, key_columns, value_type):
+        """Create the table or add the columns it lacks
+
+        The key columns are TEXT, or INTEGER for the integer surrogate keys
+        """
+
+        def column_definition(i, column):
+            if i < key_columns:
+                is_key_int = row[i] is None or isinstance(row[i], int)
+                declared_type = "INTEGER" if is_key_int else "TEXT"
+            else:
+                declared_type = value_type
+            return f"{quote(column)} {declared_type}".strip()
+
+        table = self._tables.get(table_name)
+
+        if table is None:
+            self._connection.execute(
+                f"CREATE TABLE {quote(table_name)} "
+                f"({', '.join(column_definition(i, c) for i, c in enumerate(columns))})"
+            )
+            table = {"columns": list(columns), "keys": list(columns[:key_columns])}
+            self._tables[table_name] = table
+
+        else:
+            for i, column in enumerate(columns):
+                if column not in table["columns"]:
+                    self._connection.execute(
+                        f"ALTER TABLE {quote(table_name)} "
+                        f"ADD COLUMN {column_definition(i, column)}"
+                    )
+                    table["columns"].append(column)
+
+            if table["keys"] == []:
+                table["keys"] = list(columns[:key_columns])
+
+    def _flush(self, batch):
+        if batch["rows"] == []:
+            return
+
+        self._connection.execute("BEGIN")
+        try:
+            self._connection.executemany(batch["statement"], batch["rows"])
+        except Exception:
+            # leave no open transaction, the next statements would fail on it
+            self._connection.execute("ROLLBACK")
+            raise
+
+        self._connection.execute("COMMIT")
+
+        batch["rows"] = []
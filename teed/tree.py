@@ -0,0 +1,259 @@
+from array import array
+from bisect import bisect_left, bisect_right
+
+import pyarrow as pa
+import pyarrow.fs as fs
+import pyarrow.ipc as ipc
+
+from teed import TeedException
+
+# the parent of the root nodes
+NO_PARENT = -1
+
+
+class TreeBuilder:
+    """Builds the containment tree from the parsed nodes paths
+
+    The nodes are received in any order, the BulkCm parser sends
+    the children before their parent. The ancestors missing from the
+    parsed nodes, excluded classes, are added from the node path.
+
+    builder = TreeBuilder()
+    builder.add({"SubNetwork": "1", "ManagedElement": "2"})
+    tree = builder.build()
+    """
+
+    def __init__(self):
+        self._nodes = {}  # maps the node path, as (class, id) pairs, to it's builder id
+        self._classes = []
+        self._ids = []
+        self._children = []
+        self._roots = []
+
+    def __len__(self):
+        return len(self._ids)
+
+    def add(self, node_path: dict) -> int:
+        """Add the node, and it's ancestors, returning the node builder id"""
+
+        key = ()
+        node = NO_PARENT
+        for class_name, node_id in node_path.items():
+            key += ((class_name, node_id),)
+            child = self._nodes.get(key)
+
+            if child is None:
+                child = len(self._ids)
+                self._nodes[key] = child
+                self._classes.append(class_name)
+                self._ids.append(node_id)
+                self._children.append([])
+                (self._roots if node == NO_PARENT else self._children[node]).append(child)
+
+            node = child
+
+        return node
+
+    def build(self) -> "MoTree":
+        """Number the nodes in pre-order and return the tree"""
+
+        classes, ids, parents, depths, posts = [], [], [], [], []
+
+        # iterative depth first traversal
+        # a node is numbered when entered (pre-order) and when left (post-order)
+        stack = [(root, NO_PARENT, 0, False) for root in reversed(self._roots)]
+        post = 0
+        while stack != []:
+            node, parent, depth, leaving = stack.pop()
+
+            if leaving:
+                posts[node] = post
+                post += 1
+                continue
+
+            pre = len(ids)
+            classes.append(self._classes[node])
+            ids.append(self._ids[node])
+            parents.append(parent)
+            depths.append(depth)
+            posts.append(None)
+
+            stack.append((pre, parent, depth, True))
+            stack.extend(
+                (child, pre, depth + 1, False) for child in reversed(self._children[node])
+            )
+
+        return MoTree(
+            pa.table(
+                {
+                    "class": pa.array(classes, type=pa.string()).dictionary_encode(),
+                    "id": pa.array(ids, type=pa.string()),
+                    "parent": pa.array(parents, type=pa.int32()),
+                    "depth": pa.array(depths, type=pa.int32()),
+                    "post": pa.array(posts, type=pa.int32()),
+                }
+            )
+        )
+
+
+class MoTree:
+    """The managed objects containment tree in array form
+
+    A node is an integer, it's pre-order number, the row of the tree table.
+    Each row has the node class, dictionary encoded, it's id, the parent node,
+    -1 for the roots, the depth and the post-order number.
+
+    The descendants of a node are the contiguous rows after it,
+    their number is post - pre + depth. A node is an ancestor of
+    another if it's pre-order is lower and it's post-order higher.
+    The nodes of each class are kept sorted, the class nodes of a subtree
+    are found by binary search.
+
+    Parameters:
+        tree table, class, id, parent, depth and post columns (pyarrow.Table): table
+    """
+
+    def __init__(self, table: pa.Table):
+        self.table = table
+
+        class_column = table.column("class").combine_chunks()
+        self.class_names = class_column.dictionary.to_pylist()
+        self._classes = array("i", class_column.indices.to_pylist())
+        self._ids = table.column("id").to_pylist()
+        self._parents = array("i", table.column("parent").to_pylist())
+        self._depths = array("i", table.column("depth").to_pylist())
+        self._posts = array("i", table.column("post").to_pylist())
+
+        # maps the class name to it's nodes, in pre-order
+        self._class_nodes = {class_name: array("i") for class_name in self.class_names}
+        for node, class_index in enumerate(self._classes):
+            self._class_nodes[self.class_names[class_index]].append(node)
+
+        self._dns = None  # maps the DN to it's node, created on the first find
+
+    def __len__(self):
+        return len(self._ids)
+
+    def class_name(self, node: int) -> str:
+        return self.class_names[self._classes[node]]
+
+    def parent(self, node: int) -> int:
+        return self._parents[node]
+
+    def size(self, node: int) -> int:
+        """The number of descendants of node"""
+
+        return self._posts[node] - node + self._depths[node]
+
+    def is_ancestor(self, ancestor: int, node: int) -> bool:
+        return ancestor < node and self._posts[node] < self._posts[ancestor]
+
+    def ancestors(self, node: int) -> list:
+        """The ancestors of node, from it's parent to the root"""
+
+        nodes = []
+        node = self._parents[node]
+        while node != NO_PARENT:
+            nodes.append(node)
+            node = self._parents[node]
+
+        return nodes
+
+    def children(self, node: int) -> list:
+        nodes = []
+        child = node + 1
+        end = node + self.size(node)
+        while child <= end:
+            nodes.append(child)
+            child += self.size(child) + 1
+
+        return nodes
+
+    def descendants(self, node: int, class_name: str = None):
+        """The descendants of node, of class_name if given
+
+        Returns:
+            the descendant nodes (range | array): nodes
+        """
+
+        end = node + self.size(node)
+
+        if class_name is None:
+            return range(node + 1, end + 1)
+
+        class_nodes = self._class_nodes.get(class_name, array("i"))
+        return class_nodes[
+            bisect_right(class_nodes, node) : bisect_right(class_nodes, end)
+        ]
+
+    def nodes(self, class_name: str) -> array:
+        """The nodes of class_name, in pre-order"""
+
+        return self._class_nodes.get(class_name, array("i"))
+
+    def count(self, class_name: str, per_class: str) -> dict:
+        """Count the class_name nodes in the subtree of each per_class node
+
+        tree.count("UtranCell", "SubNetwork") -> {"SubNetwork=1": 120, ...}
+
+        Returns:
+            the count by per_class node DN (dict): counts
+        """
+
+        class_nodes = self._class_nodes.get(class_name, array("i"))
+
+        return {
+            self.dn(node): bisect_right(class_nodes, node + self.size(node))
+            - bisect_left(class_nodes, node + 1)
+            for node in self.nodes(per_class)
+        }
+
+    def dn(self, node: int) -> str:
+        """The distinguished name of node, SubNetwork=1,ManagedElement=2"""
+
+        return ",".join(
+            f"{self.class_name(rdn)}={self._ids[rdn]}"
+            for rdn in reversed([node] + self.ancestors(node))
+        )
+
+    def find(self, dn: str) -> int:
+        """The node of the distinguished name
+
+        Raise:
+            TeedException
+        """
+
+        if self._dns is None:
+            # the nodes are in pre-order, the parent DN is known before it's children
+            dns = []
+            for node in range(len(self)):
+                parent = self._parents[node]
+                rdn = f"{self.class_name(node)}={self._ids[node]}"
+                dns.append(rdn if parent == NO_PARENT else f"{dns[parent]},{rdn}")
+
+            self._dns = {dn: node for node, dn in enumerate(dns)}
+
+        node = self._dns.get(dn)
+        if node is None:
+            raise TeedException(f"Error, {dn} isn't in the tree")
+
+        return node
+
+    def save(self, file_path: str, output_fs: fs.FileSystem = fs.LocalFileSystem()):
+        """Write the tree to an Arrow IPC file"""
+
+        with output_fs.open_output_stream(file_path, compression=None) as stream:
+            with ipc.new_file(stream, self.table.schema) as writer:
+                writer.write_table(self.table)
+
+    @classmethod
+    def load(
+        cls, file_path: str, input_fs: fs.FileSystem = fs.LocalFileSystem()
+    ) -> "MoTree":
+        """Read a tree previously written by MoTree.save"""
+
+        try:
+            with input_fs.open_input_file(file_path) as input_file:
+                return cls(ipc.open_file(input_file).read_all())
+        except (FileNotFoundError, pa.ArrowInvalid) as e:
+            raise TeedException(f"Error, can't load tree {file_path}: {e}")
@@ -0,0 +1,92 @@
+import os
+
+from teed import TeedException, bulkcm
+from teed.tree import NO_PARENT, MoTree, TreeBuilder
+
+
+def create_tree() -> MoTree:
+    builder = TreeBuilder()
+
+    # the children are added before their parents, as sent by the parser
+    for node_path in [
+        {"SubNetwork": "1", "MeContext": "A", "UtranCell": "1"},
+        {"SubNetwork": "1", "MeContext": "A", "UtranCell": "2"},
+        {"SubNetwork": "1", "MeContext": "A"},
+        {"SubNetwork": "1", "MeContext": "B", "RncFunction": "1", "UtranCell": "3"},
+        {"SubNetwork": "1"},
+        {"SubNetwork": "2", "MeContext": "C", "UtranCell": "4"},
+    ]:
+        builder.add(node_path)
+
+    return builder.build()
+
+
+def test_tree_queries():
+    """Test the MoTree queries"""
+
+    tree = create_tree()
+
+    assert len(tree) == 10
+    assert [tree.dn(node) for node in range(len(tree))] == [
+        "SubNetwork=1",
+        "SubNetwork=1,MeContext=A",
+        "SubNetwork=1,MeContext=A,UtranCell=1",
+        "SubNetwork=1,MeContext=A,UtranCell=2",
+        "SubNetwork=1,MeContext=B",
+        "SubNetwork=1,MeContext=B,RncFunction=1",
+        "SubNetwork=1,MeContext=B,RncFunction=1,UtranCell=3",
+        "SubNetwork=2",
+        "SubNetwork=2,MeContext=C",
+        "SubNetwork=2,MeContext=C,UtranCell=4",
+    ]
+
+    me_b = tree.find("SubNetwork=1,MeContext=B")
+    cell = tree.find("SubNetwork=1,MeContext=B,RncFunction=1,UtranCell=3")
+
+    assert tree.class_name(me_b) == "MeContext"
+    assert list(tree.descendants(me_b)) == [me_b + 1, cell]
+    assert [tree.dn(node) for node in tree.descendants(0, "UtranCell")] == [
+        "SubNetwork=1,MeContext=A,UtranCell=1",
+        "SubNetwork=1,MeContext=A,UtranCell=2",
+        "SubNetwork=1,MeContext=B,RncFunction=1,UtranCell=3",
+    ]
+    assert tree.ancestors(cell) == [me_b + 1, me_b, 0]
+    assert tree.parent(0) == NO_PARENT
+    assert tree.is_ancestor(me_b, cell)
+    assert not tree.is_ancestor(tree.find("SubNetwork=1,MeContext=A"), cell)
+    assert [tree.dn(node) for node in tree.children(0)] == [
+        "SubNetwork=1,MeContext=A",
+        "SubNetwork=1,MeContext=B",
+    ]
+    assert tree.count("UtranCell", "SubNetwork") == {"SubNetwork=1": 3, "SubNetwork=2": 1}
+    assert tree.count("UtranCell", "MeContext") == {
+        "SubNetwork=1,MeContext=A": 2,
+        "SubNetwork=1,MeContext=B": 1,
+        "SubNetwork=2,MeContext=C": 1,
+    }
+
+    try:
+        tree.find("SubNetwork=3")
+        assert False
+    except TeedException:
+        pass
+
+
+def test_tree_output(tmp_path):
+    """Test the tree output format and MoTree.save/load"""
+
+    file_uri = f"file://{os.path.abspath('data/bulkcm_with_utrancell.xml')}"
+    stream = bulkcm.create_stream("tree", str(tmp_path), file_uri)
+    bulkcm.parse(file_uri, str(tmp_path), stream, batch_size=bulkcm.NODES_BATCH_SIZE)
+
+    tree = MoTree.load(str(tmp_path / "bulkcm_with_utrancell_tree.arrow"))
+    in_memory_tree, _ = bulkcm.parse_to_tree(file_uri)
+
+    assert tree.table.equals(in_memory_tree.table)
+    assert tree.count("vsDataRncHandOver", "ManagedElement") == {
+        "SubNetwork=1,ManagedElement=2": 1
+    }
+    assert tree.ancestors(tree.find("SubNetwork=1,ManagedElement=2,RncFunction=3")) == [
+        1,
+        0,
+    ]
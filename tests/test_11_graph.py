@@ -0,0 +1,85 @@
+from teed import TeedException, graph
+
+BULKCM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm"
+    xmlns:un="http://www.3gpp.org/ftp/specs/archive/32_series/32.645#utranNrm">
+    <configData dnPrefix="DC=a1.companyNN.com">
+        <xn:SubNetwork id="1">
+            <xn:ManagedElement id="1">
+                <un:RncFunction id="1">
+                    <un:UtranCell id="A">
+                        <un:UtranRelation id="1">
+                            <un:attributes>
+                                <un:adjacentCell>DC=a1.companyNN.com,SubNetwork=1,ManagedElement=1,RncFunction=1,UtranCell=B</un:adjacentCell>
+                            </un:attributes>
+                        </un:UtranRelation>
+                        <un:UtranRelation id="2">
+                            <un:attributes>
+                                <un:adjacentCell>SubNetwork=1,ManagedElement=1,RncFunction=1,UtranCell=C</un:adjacentCell>
+                            </un:attributes>
+                        </un:UtranRelation>
+                        <un:UtranRelation id="3">
+                            <un:attributes>
+                                <un:adjacentCell>SubNetwork=1,ExternalUtranCell=X</un:adjacentCell>
+                            </un:attributes>
+                        </un:UtranRelation>
+                    </un:UtranCell>
+                    <un:UtranCell id="B">
+                        <un:UtranRelation id="1">
+                            <un:attributes>
+                                <un:adjacentCell>SubNetwork=1,ManagedElement=1,RncFunction=1,UtranCell=A</un:adjacentCell>
+                            </un:attributes>
+                        </un:UtranRelation>
+                        <un:UtranRelation id="2">
+                            <un:attributes>
+                                <un:adjacentCell>SubNetwork=1,ManagedElement=1,RncFunction=1,UtranCell=A</un:adjacentCell>
+                            </un:attributes>
+                        </un:UtranRelation>
+                    </un:UtranCell>
+                    <un:UtranCell id="C"/>
+                </un:RncFunction>
+            </xn:ManagedElement>
+        </xn:SubNetwork>
+    </configData>
+</bulkCmConfigDataFile>
+"""
+
+CELL = "SubNetwork=1,ManagedElement=1,RncFunction=1,UtranCell="
+
+
+def test_graph(tmp_path):
+    """Test graph.build, the CellGraph queries and CellGraph.save/load"""
+
+    graph_path = str(tmp_path / "graph.arrow")
+    graph.build(BULKCM).save(graph_path)
+    cell_graph = graph.CellGraph.load(graph_path)
+
+    a, b, c = (cell_graph.find(f"{CELL}{cell}") for cell in "ABC")
+    x = cell_graph.find("DC=a1.companyNN.com,SubNetwork=1,ExternalUtranCell=X")
+
+    # the duplicate B -> A relation is dropped
+    assert len(cell_graph) == 4
+    assert cell_graph.num_edges == 4
+    assert list(cell_graph.neighbors(a)) == sorted([b, c, x])
+    assert list(cell_graph.neighbors(b)) == [a]
+    assert list(cell_graph.neighbors(c)) == []
+    assert cell_graph.dn(x) == "SubNetwork=1,ExternalUtranCell=X"
+
+    assert cell_graph.degree(a) == 3
+    assert list(cell_graph.in_degrees()) == [1, 1, 1, 1]
+    assert cell_graph.degree_stats() == {"min": 0, "max": 3, "mean": 1.0, "median": 0.5}
+    assert cell_graph.degree_stats(incoming=True)["max"] == 1
+
+    assert cell_graph.has_edge(a, c)
+    assert not cell_graph.has_edge(c, a)
+    assert cell_graph.is_reciprocal(a, b)
+    assert not cell_graph.is_reciprocal(a, c)
+    assert sorted(cell_graph.non_reciprocal()) == sorted([(a, c), (a, x)])
+    assert cell_graph.reciprocity() == 0.5
+
+    try:
+        cell_graph.find(f"{CELL}D")
+        assert False
+    except TeedException:
+        pass
@@ -0,0 +1,83 @@
+import os
+
+from teed import bulkcm
+from teed.profiling import CountMinSketch, HyperLogLog, TopK, hash_value
+
+
+def test_sketches():
+    """Test the HyperLogLog, CountMinSketch and TopK sketches"""
+
+    hll = HyperLogLog()
+    for i in range(100000):
+        hll.add(hash_value(str(i % 50000)))
+
+    # the standard error is 2.3%
+    assert abs(hll.count() - 50000) < 50000 * 0.07
+
+    small = HyperLogLog()
+    for value in ["a", "b", "c", "a"]:
+        small.add(hash_value(value))
+    assert small.count() == 3
+
+    hll.merge(small)
+    assert abs(hll.count() - 50003) < 50003 * 0.07
+
+    sketch = CountMinSketch(width=64, depth=4)
+    for i in range(1000):
+        sketch.add(hash_value(str(i % 10)))
+
+    # the count-min estimates never undercount
+    assert all(sketch.estimate(hash_value(str(i))) >= 100 for i in range(10))
+
+    top = TopK(2)
+    for value in ["x"] * 50 + ["y"] * 30 + [str(i) for i in range(100)] + ["z"] * 10:
+        top.add(value, hash_value(value))
+
+    assert [value for value, _ in top.top()] == ["x", "y"]
+
+
+def test_profile():
+    """Test bulkcm.profile"""
+
+    report, metadata = bulkcm.profile(
+        f"file://{os.path.abspath('data/bulkcm.xml')}",
+        include_elements=["ManagedElement"],
+        exclude_elements=["*"],
+        top_k=1,
+    )
+
+    assert metadata == {}
+    assert list(report) == ["ManagedElement"]
+    assert report["ManagedElement"]["nodes"] == 2
+
+    attributes = report["ManagedElement"]["attributes"]
+    assert attributes["managedElementType"] == {
+        "distinct": 1,
+        "null_ratio": 0.0,
+        "empty_ratio": 0.0,
+        "top": [{"value": "RNC", "count": 2}],
+        "min": None,
+        "max": None,
+    }
+    assert attributes["userLabel"]["distinct"] == 2
+
+    xml = b"""<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <configData><xn:SubNetwork id="1">
+        <xn:MeContext id="1"><xn:attributes><xn:x>10</xn:x><xn:y>a</xn:y></xn:attributes></xn:MeContext>
+        <xn:MeContext id="2"><xn:attributes><xn:x>-2.5</xn:x><xn:y></xn:y></xn:attributes></xn:MeContext>
+        <xn:MeContext id="3"><xn:attributes><xn:x>7</xn:x></xn:attributes></xn:MeContext>
+        <xn:MeContext id="4"><xn:attributes><xn:x>7</xn:x></xn:attributes></xn:MeContext>
+    </xn:SubNetwork></configData>
+</bulkCmConfigDataFile>"""
+
+    report, _ = bulkcm.profile(
+        xml, include_elements=["MeContext"], exclude_elements=["*"]
+    )
+    attributes = report["MeContext"]["attributes"]
+
+    assert attributes["x"]["distinct"] == 3
+    assert (attributes["x"]["min"], attributes["x"]["max"]) == (-2.5, 10)
+    assert attributes["x"]["top"][0] == {"value": "7", "count": 2}
+    assert (attributes["y"]["null_ratio"], attributes["y"]["empty_ratio"]) == (0.5, 0.25)
+    assert attributes["y"]["min"] is None
@@ -0,0 +1,126 @@
+import csv
+import os
+
+import yaml
+
+from teed import TeedException, bulkcm
+from teed.catalog import SchemaCatalog
+
+
+def test_table_ids(tmp_path):
+    """Test the SchemaCatalog ids are stable across runs"""
+
+    catalog_path = str(tmp_path / "catalog.yml")
+
+    catalog = SchemaCatalog(catalog_path)
+    assert len(catalog) == 0
+    assert (
+        catalog.table_id("UtranCell", ["SubNetwork", "UtranCell", "sc"]) == "UtranCell-v1"
+    )
+    assert (
+        catalog.table_id("UtranCell", ["SubNetwork", "UtranCell", "sc"]) == "UtranCell-v1"
+    )
+    # the columns order is part of the schema
+    assert (
+        catalog.table_id("UtranCell", ["SubNetwork", "sc", "UtranCell"]) == "UtranCell-v2"
+    )
+    assert catalog.table_id("MeContext", ["SubNetwork", "MeContext"]) == "MeContext-v1"
+    catalog.save()
+
+    catalog = SchemaCatalog(catalog_path)
+    assert len(catalog) == 3
+    assert (
+        catalog.table_id("UtranCell", ["SubNetwork", "sc", "UtranCell"]) == "UtranCell-v2"
+    )
+    assert catalog.table_id("UtranCell", ["SubNetwork", "UtranCell"]) == "UtranCell-v3"
+    assert [schema["id"] for schema in catalog.schemas("UtranCell")] == [
+        "UtranCell-v1",
+        "UtranCell-v2",
+        "UtranCell-v3",
+    ]
+    catalog.save()
+
+    with open(catalog_path, "r") as yaml_file:
+        schemas = yaml.safe_load(yaml_file)["schemas"]
+
+    assert schemas[0]["columns"] == ["SubNetwork", "UtranCell", "sc"]
+    assert schemas[0]["first_seen"] <= schemas[0]["last_seen"]
+    assert not os.path.exists(f"{catalog_path}.tmp")
+
+    with open(catalog_path, "w") as yaml_file:
+        yaml_file.write("schemas: [")
+
+    try:
+        SchemaCatalog(catalog_path)
+        assert False
+    except TeedException as e:
+        assert str(e).startswith(f"Error, can't load the schema catalog {catalog_path}")
+
+
+def test_parse_with_catalog(tmp_path):
+    """Test bulkcm.parse naming the csv files with the catalog ids"""
+
+    catalog_path = str(tmp_path / "catalog.yml")
+
+    for _ in range(2):
+        stream = bulkcm.BulkCmParser.stream_to_csv(
+            str(tmp_path), catalog=SchemaCatalog(catalog_path)
+        )
+        bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream)
+
+    catalog = SchemaCatalog(catalog_path)
+    assert [schema["id"] for schema in catalog.schemas("ManagedElement")] == [
+        "ManagedElement-v1"
+    ]
+
+    with open(tmp_path / "ManagedElement-v1.csv", newline="") as csv_file:
+        assert [row["userLabel"] for row in csv.DictReader(csv_file)] == [
+            "Paris RN1",
+            "Paris RN2",
+        ]
+
+    assert bulkcm.TABLE_FILE_PATTERN.match("ManagedElement-v1.csv").group(1) == (
+        "ManagedElement"
+    )
+
+
+def test_shared_catalog(tmp_path):
+    """Test concurrent SchemaCatalog runs sharing the catalog file"""
+
+    catalog_path = str(tmp_path / "catalog.yml")
+
+    first = SchemaCatalog(catalog_path)
+    second = SchemaCatalog(catalog_path)
+
+    # the new schemas are registered in the catalog file, the ids don't clash
+    assert first.table_id("UtranCell", ["SubNetwork", "UtranCell"]) == "UtranCell-v1"
+    assert second.table_id("UtranCell", ["SubNetwork", "sc"]) == "UtranCell-v2"
+    assert second.table_id("UtranCell", ["SubNetwork", "UtranCell"]) == "UtranCell-v1"
+    assert first.table_id("MeContext", ["MeContext"]) == "MeContext-v1"
+
+    # each save merges the other run schemas
+    second.save()
+    first.save()
+    assert [schema["id"] for schema in SchemaCatalog(catalog_path).schemas()] == [
+        "UtranCell-v1",
+        "UtranCell-v2",
+        "MeContext-v1",
+    ]
+    assert not os.path.exists(f"{catalog_path}.lock")
+
+    # an id given to other columns, by a run without the lock file
+    with open(catalog_path) as yaml_file:
+        catalog = yaml.safe_load(yaml_file)
+    catalog["schemas"][0]["columns"] = ["SubNetwork", "other"]
+    with open(catalog_path, "w") as yaml_file:
+        yaml.safe_dump(catalog, yaml_file)
+
+    try:
+        first.save()
+        assert False
+    except TeedException as e:
+        assert str(e) == (
+            f"Error, schema catalog {catalog_path} conflict, "
+            "UtranCell-v1 has different columns"
+        )
+    assert not os.path.exists(f"{catalog_path}.lock")
@@ -1,11 +1,13 @@
 import csv
+import io
 import os
 
+import pyarrow as pa
 import pyarrow.fs as fs
 import yaml
 from lxml import etree
 
-from teed import bulkcm
+from teed import TeedException, bulkcm
 
 
 def test_probe():
@@ -480,3 +482,1109 @@ def test_parse_output_to_csv_local_filesystem():
                 "abcMax": "34",
             }
         ]
+
+
+def test_parse_output_to_parquet_local_filesystem(tmp_path):
+    """Test bulkcm.parse with BulkCmParser.stream_to_parquet"""
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    # infer the attribute types
+    stream = bulkcm.BulkCmParser.stream_to_parquet(str(tmp_path))
+    bulkcm.parse(os.path.abspath("data/bulkcm_with_utrancell.xml"), str(tmp_path), stream)
+
+    table = pq.read_table(
+        tmp_path / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"
+    )
+    assert table.schema == pa.schema(
+        [
+            pa.field("SubNetwork", pa.string()),
+            pa.field("ManagedElement", pa.string()),
+            pa.field("RncFunction", pa.string()),
+            pa.field("vsDataUtranCell", pa.string()),
+            pa.field("sc", pa.int64()),
+            pa.field("pcpichpower", pa.int64()),
+        ]
+    )
+    assert table.to_pylist() == [
+        {
+            "SubNetwork": "1",
+            "ManagedElement": "2",
+            "RncFunction": "3",
+            "vsDataUtranCell": "Cell4",
+            "sc": 111,
+            "pcpichpower": 222,
+        }
+    ]
+
+    # user supplied type map
+    stream = bulkcm.BulkCmParser.stream_to_parquet(
+        str(tmp_path), type_map={"vsDataUtranCell": {"pcpichpower": "float"}}
+    )
+    bulkcm.parse(os.path.abspath("data/bulkcm_with_utrancell.xml"), str(tmp_path), stream)
+
+    table = pq.read_table(
+        tmp_path / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"
+    )
+    assert table.schema.field("sc").type == pa.int64()
+    assert table.schema.field("pcpichpower").type == pa.float64()
+    assert table.column("pcpichpower").to_pylist() == [222.0]
+
+    # the string attributes remain strings
+    stream = bulkcm.BulkCmParser.stream_to_parquet(str(tmp_path))
+    bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream)
+
+    table = pq.read_table(
+        tmp_path / "ManagedElement-2ce5d8fae91842f854b00844e05fdd6b.parquet"
+    )
+    assert set(table.schema.types) == {pa.string()}
+    assert table.column("userLabel").to_pylist() == ["Paris RN1", "Paris RN2"]
+
+
+def test_parse_output_to_sqlite(tmp_path):
+    """Test bulkcm.parse with BulkCmParser.stream_to_sqlite"""
+
+    import sqlite3
+
+    db_path = str(tmp_path / "bulkcm.sqlite")
+
+    stream = bulkcm.BulkCmParser.stream_to_sqlite(db_path, batch_size=1)
+    bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream)
+
+    # the vsDataRncHandOver in this file has a different node path
+    # the columns it lacks are added to the existing table
+    stream = bulkcm.BulkCmParser.stream_to_sqlite(db_path)
+    bulkcm.parse(
+        os.path.abspath("data/bulkcm_with_vsdatacontainer.xml"), str(tmp_path), stream
+    )
+    stream = bulkcm.BulkCmParser.stream_to_sqlite(db_path)
+    bulkcm.parse(os.path.abspath("data/bulkcm_with_utrancell.xml"), str(tmp_path), stream)
+
+    connection = sqlite3.connect(db_path)
+
+    assert connection.execute(
+        'SELECT "SubNetwork", "ManagedElement", "userLabel" FROM "ManagedElement"'
+    ).fetchall() == [
+        ("1", "1", "Paris RN1"),
+        ("1", "2", "Paris RN2"),
+        ("1", "2", None),
+        ("1", "2", None),
+    ]
+
+    assert connection.execute(
+        'SELECT "vsDataUtranCell", "vsDataRncHandOver", "abcMin", "abcMax" '
+        'FROM "vsDataRncHandOver"'
+    ).fetchall() == [(None, "4", "12", "34"), ("Cell4", "5", "12", "34")]
+
+    # the node path is indexed
+    assert connection.execute(
+        "SELECT name FROM sqlite_master WHERE type='index' AND tbl_name='ManagedElement'"
+    ).fetchall() == [("ManagedElement_key",)]
+
+    connection.close()
+
+
+def test_parse_output_to_arrow(tmp_path):
+    """Test bulkcm.parse with BulkCmParser.stream_to_arrow"""
+
+    import pyarrow as pa
+    import pyarrow.ipc as ipc
+
+    # file format, memory mapped
+    stream = bulkcm.BulkCmParser.stream_to_arrow(str(tmp_path))
+    bulkcm.parse(os.path.abspath("data/bulkcm_with_utrancell.xml"), str(tmp_path), stream)
+
+    with pa.memory_map(
+        str(tmp_path / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.arrow")
+    ) as source:
+        table = ipc.open_file(source).read_all()
+
+    assert table.schema.field("sc").type == pa.int64()
+    assert table.to_pylist() == [
+        {
+            "SubNetwork": "1",
+            "ManagedElement": "2",
+            "RncFunction": "3",
+            "vsDataUtranCell": "Cell4",
+            "sc": 111,
+            "pcpichpower": 222,
+        }
+    ]
+
+    # stream format
+    stream = bulkcm.BulkCmParser.stream_to_arrow(str(tmp_path), ipc_format="stream")
+    bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream)
+
+    with ipc.open_stream(
+        str(tmp_path / "ManagedElement-2ce5d8fae91842f854b00844e05fdd6b.arrows")
+    ) as reader:
+        table = reader.read_all()
+
+    assert table.column("ManagedElement").to_pylist() == ["1", "2"]
+
+
+def test_parse_to_arrow():
+    """Test bulkcm.parse_to_arrow"""
+
+    import pyarrow as pa
+
+    # from an URI
+    tables, metadata = bulkcm.parse_to_arrow(
+        os.path.abspath("data/bulkcm_with_utrancell.xml")
+    )
+
+    assert metadata == {}
+    assert sorted(tables) == [
+        "ManagedElement",
+        "RncFunction",
+        "SubNetwork",
+        "vsDataRncHandOver",
+        "vsDataUtranCell",
+    ]
+    assert tables["vsDataRncHandOver"].to_pylist() == [
+        {
+            "SubNetwork": "1",
+            "ManagedElement": "2",
+            "RncFunction": "3",
+            "vsDataUtranCell": "Cell4",
+            "vsDataRncHandOver": "5",
+            "abcMin": 12,
+            "abcMax": 34,
+        }
+    ]
+
+    # from a file-like object, using the include/exclude filters
+    with open("data/bulkcm_with_header_footer.xml", "rb") as stream:
+        tables, metadata = bulkcm.parse_to_arrow(
+            stream,
+            include_elements=["ManagedElement"],
+            exclude_elements=["*"],
+        )
+
+    assert metadata["vendorName"] == "Company NN"
+    assert list(tables) == ["ManagedElement"]
+    assert tables["ManagedElement"].num_rows == 2
+    assert tables["ManagedElement"].schema.field("userLabel").type == pa.string()
+
+
+def test_parse_backends():
+    """Test bulkcm.parse_target and bulkcm.benchmark with the lxml and expat backends"""
+
+    for file_name in [
+        "data/bulkcm.xml",
+        "data/bulkcm_with_header_footer.xml",
+        "data/bulkcm_with_utrancell.xml",
+        "data/bulkcm_with_vsdatacontainer.xml",
+    ]:
+        lxml_tables, lxml_metadata = bulkcm.parse_to_arrow(
+            os.path.abspath(file_name), backend="lxml"
+        )
+        expat_tables, expat_metadata = bulkcm.parse_to_arrow(
+            os.path.abspath(file_name), backend="expat"
+        )
+
+        auto_tables, auto_metadata = bulkcm.parse_to_arrow(
+            os.path.abspath(file_name), backend="auto"
+        )
+
+        assert lxml_metadata == expat_metadata == auto_metadata
+        assert (
+            {k: t.to_pylist() for k, t in lxml_tables.items()}
+            == {k: t.to_pylist() for k, t in expat_tables.items()}
+            == {k: t.to_pylist() for k, t in auto_tables.items()}
+        )
+
+    # invalid XML file
+    try:
+        bulkcm.parse_to_arrow(os.path.abspath("data/tag_mismatch.xml"), backend="expat")
+        assert False
+    except TeedException as e:
+        assert str(e) == "mismatched tag, line 15, column 49"
+
+    # unknown backend
+    try:
+        bulkcm.parse_to_arrow(os.path.abspath("data/bulkcm.xml"), backend="sax")
+        assert False
+    except TeedException as e:
+        assert (
+            str(e) == "Error, unknown parser backend sax, use one of lxml, expat or auto"
+        )
+
+    durations = bulkcm.benchmark(os.path.abspath("data/bulkcm.xml"))
+    assert list(durations) == ["lxml", "expat"]
+
+    # the auto backend is chosen on a sample, cut at any byte, read again by the parse
+    with open("data/bulkcm.xml", "rb") as xml_file:
+        data = xml_file.read()
+    assert bulkcm.choose_backend(data[:100]) in bulkcm.BACKENDS
+    assert bulkcm.choose_backend(b"<a></b>") == "lxml"
+
+    reader = bulkcm.PrefixedReader(data[:100], io.BytesIO(data[100:]))
+    assert reader.read(30) + reader.read(100) + reader.read() == data
+
+
+def test_parse_batched(tmp_path):
+    """Test bulkcm.parse sending node batches to the stream"""
+
+    # batch aware stream
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(tmp_path))
+    bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream, batch_size=2)
+
+    with open(
+        tmp_path / "ManagedElement-2ce5d8fae91842f854b00844e05fdd6b.csv", newline=""
+    ) as csv_file:
+        assert [row["userLabel"] for row in csv.DictReader(csv_file)] == [
+            "Paris RN1",
+            "Paris RN2",
+        ]
+
+    # single node stream through the unbatched adapter
+    nodes = []
+
+    def stream_to_list():
+        try:
+            while True:
+                node = yield
+                nodes.append(node["node_name"])
+        finally:
+            nodes.append("closed")
+
+    stream = bulkcm.BulkCmParser.unbatched(stream_to_list())
+    bulkcm.parse(os.path.abspath("data/bulkcm.xml"), str(tmp_path), stream, batch_size=3)
+
+    assert nodes == [
+        "SubNetwork",
+        "ManagementNode",
+        "ManagedElement",
+        "ManagedElement",
+        "closed",
+    ]
+
+
+def test_parse_buffers(tmp_path):
+    """Test bulkcm.parse and bulkcm.parse_to_arrow with in memory data"""
+
+    from teed import get_xml_encoding
+
+    with open("data/bulkcm_with_header_footer.xml", "rb") as bulkcm_file:
+        data = bulkcm_file.read()
+
+    assert get_xml_encoding(memoryview(data)) == "UTF-8"
+
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(tmp_path))
+    metadata, _ = bulkcm.parse(
+        memoryview(data), str(tmp_path), stream, file_name="in_memory.xml"
+    )
+
+    assert metadata["vendorName"] == "Company NN"
+    assert os.path.exists(tmp_path / "in_memory_metadata.yml")
+    assert os.path.exists(
+        tmp_path / "ManagedElement-2ce5d8fae91842f854b00844e05fdd6b.csv"
+    )
+
+    tables, _ = bulkcm.parse_to_arrow(bytearray(data))
+    assert tables["ManagedElement"].num_rows == 2
+
+
+def test_iter_nodes():
+    """Test bulkcm.iter_nodes"""
+
+    nodes = bulkcm.iter_nodes(
+        os.path.abspath("data/bulkcm_with_utrancell.xml"),
+        include_elements=["vsDataUtranCell", "vsDataRncHandOver"],
+        exclude_elements=["*"],
+        chunk_size=64,
+    )
+
+    mo = next(nodes)
+    assert mo == bulkcm.ManagedObject(
+        "vsDataUtranCell",
+        (
+            ("SubNetwork", "1"),
+            ("ManagedElement", "2"),
+            ("RncFunction", "3"),
+            ("vsDataUtranCell", "Cell4"),
+        ),
+        (("sc", "111"), ("pcpichpower", "222")),
+    )
+    assert (
+        mo.dn_string
+        == "SubNetwork=1,ManagedElement=2,RncFunction=3,vsDataUtranCell=Cell4"
+    )
+
+    assert [mo.class_name for mo in nodes] == ["vsDataRncHandOver"]
+
+    # the metadata is the generator return value
+    nodes = bulkcm.iter_nodes(os.path.abspath("data/bulkcm_with_header_footer.xml"))
+    try:
+        while True:
+            next(nodes)
+    except StopIteration as e:
+        assert e.value["vendorName"] == "Company NN"
+
+    # invalid XML file
+    try:
+        list(bulkcm.iter_nodes(os.path.abspath("data/tag_mismatch.xml")))
+        assert False
+    except TeedException as e:
+        assert str(e).startswith(
+            "Opening and ending tag mismatch: abx line 15 and abcMax"
+        )
+
+
+def test_parse_where():
+    """Test the bulkcm predicates"""
+
+    file_uri = os.path.abspath("data/bulkcm.xml")
+
+    def dns(where):
+        return [mo.dn_string for mo in bulkcm.iter_nodes(file_uri, where=where)]
+
+    # attribute predicate, other classes aren't filtered
+    assert dns(["ManagedElement.locationName=Conc*"]) == [
+        "SubNetwork=1",
+        "SubNetwork=1,ManagementNode=1",
+        "SubNetwork=1,ManagedElement=2",
+    ]
+    assert dns(["ManagedElement.locationName!=Conc*", "ManagementNode.userLabel=x"]) == [
+        "SubNetwork=1",
+        "SubNetwork=1,ManagedElement=1",
+    ]
+
+    # DN component predicate, skips the subtree
+    assert dns(["SubNetwork=2"]) == []
+    assert dns(["ManagedElement=[2-9]"]) == [
+        "SubNetwork=1",
+        "SubNetwork=1,ManagementNode=1",
+        "SubNetwork=1,ManagedElement=2",
+    ]
+
+    # the vsData classes predicates
+    vs_data_uri = os.path.abspath("data/bulkcm_with_utrancell.xml")
+
+    def vs_data_dns(where):
+        return [
+            mo.dn_string
+            for mo in bulkcm.iter_nodes(
+                vs_data_uri, ["vsDataUtranCell", "vsDataRncHandOver"], ["*"], where=where
+            )
+        ]
+
+    cell = "SubNetwork=1,ManagedElement=2,RncFunction=3,vsDataUtranCell=Cell4"
+    assert vs_data_dns(["vsDataUtranCell=Cell*"]) == [cell, f"{cell},vsDataRncHandOver=5"]
+    assert vs_data_dns(["vsDataUtranCell!=Cell4"]) == []
+    assert vs_data_dns(["vsDataRncHandOver!=5"]) == [cell]
+    assert vs_data_dns(["vsDataUtranCell.sc=999"]) == [f"{cell},vsDataRncHandOver=5"]
+
+    # invalid predicate
+    try:
+        bulkcm.BulkCmParser(iter([None]), where=["ManagedElement"])
+        assert False
+    except TeedException as e:
+        assert str(e).startswith("Error, invalid predicate ManagedElement")
+
+
+def test_parse_mo_ids(tmp_path):
+    """Test the BulkCmParser.with_mo_ids integer surrogate keys"""
+
+    xml = b"""<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm"
+    xmlns:un="http://www.3gpp.org/ftp/specs/archive/32_series/32.645#utranNrm">
+    <configData><xn:SubNetwork id="1">
+        <xn:MeContext id="A">
+            <un:UtranCell id="1"><xn:attributes><un:sc>111</un:sc></xn:attributes></un:UtranCell>
+            <un:UtranCell id="2"><xn:attributes><un:sc>222</un:sc></xn:attributes></un:UtranCell>
+        </xn:MeContext>
+        <xn:MeContext id="B">
+            <un:UtranCell id="3"><xn:attributes><un:sc>333</un:sc></xn:attributes></un:UtranCell>
+        </xn:MeContext>
+    </xn:SubNetwork></configData>
+</bulkCmConfigDataFile>"""
+
+    nodes = []
+
+    def stream_to_list():
+        while True:
+            item = yield
+            nodes.extend(item)
+
+    stream = bulkcm.BulkCmParser.with_mo_ids(stream_to_list())
+    bulkcm.parse(
+        xml,
+        str(tmp_path),
+        stream,
+        include_elements=["UtranCell"],
+        exclude_elements=["*"],
+        batch_size=10,
+    )
+
+    # the ids follow the document order, the ancestors are in the dictionary
+    assert [
+        (
+            node["node_path"]["mo_id"],
+            node["node_path"]["parent_mo_id"],
+            node["node_values"],
+        )
+        for node in nodes
+        if node["node_name"] == bulkcm.MO_DN_TABLE
+    ] == [
+        (0, None, {"dn": "SubNetwork=1"}),
+        (1, 0, {"dn": "SubNetwork=1,MeContext=A"}),
+        (2, 1, {"dn": "SubNetwork=1,MeContext=A,UtranCell=1"}),
+        (3, 1, {"dn": "SubNetwork=1,MeContext=A,UtranCell=2"}),
+        (4, 0, {"dn": "SubNetwork=1,MeContext=B"}),
+        (5, 4, {"dn": "SubNetwork=1,MeContext=B,UtranCell=3"}),
+    ]
+    assert [
+        (node["node_path"], node["node_values"])
+        for node in nodes
+        if node["node_name"] == "UtranCell"
+    ] == [
+        ({"mo_id": 2, "parent_mo_id": 1}, {"sc": "111"}),
+        ({"mo_id": 3, "parent_mo_id": 1}, {"sc": "222"}),
+        ({"mo_id": 5, "parent_mo_id": 4}, {"sc": "333"}),
+    ]
+
+    # integer key columns
+    stream = bulkcm.create_stream("arrow", str(tmp_path), "cells.xml", mo_ids=True)
+    bulkcm.parse(xml, str(tmp_path), stream)
+
+    tables = {
+        bulkcm.TABLE_FILE_PATTERN.match(file_name).group(1): file_name
+        for file_name in os.listdir(tmp_path)
+        if file_name.endswith(".arrow")
+    }
+    with pa.memory_map(str(tmp_path / tables["UtranCell"])) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    assert table.column_names == ["mo_id", "parent_mo_id", "sc"]
+    assert table.schema.field("mo_id").type == pa.int64()
+
+    with pa.memory_map(str(tmp_path / tables[bulkcm.MO_DN_TABLE])) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    assert table.column_names == ["mo_id", "parent_mo_id", "class", "id", "dn"]
+    assert table.column("id").to_pylist() == ["1", "A", "1", "2", "B", "3"]
+
+
+def test_split_by_byte_range(tmp_path):
+    """Test bulkcm.split_by_byte_range"""
+
+    parser = etree.XMLParser(remove_blank_text=True)
+
+    for file_name in ("bulkcm", "bulkcm_with_header_footer", "bulkcm_with_utrancell"):
+        file_path = f"data/{file_name}.xml"
+
+        sns = list(bulkcm.split_by_byte_range(file_path, str(tmp_path), chunk_size=16))
+        assert sns == [("1", f"{tmp_path}{os.path.sep}{file_name}_1.xml")]
+
+        # same content as the input, there's only a SubNetwork
+        source = etree.parse(file_path, parser=parser)
+        target = etree.parse(sns[0][1], parser=parser)
+        assert etree.tostring(source) == etree.tostring(target)
+
+    # ignored SubNetwork
+    assert bulkcm.split(
+        "data/bulkcm.xml", str(tmp_path), subnetworks=["2"], byte_range=True
+    ) == (["1"], [None])
+
+    # UTF-16 files aren't supported
+    utf16_file_path = tmp_path / "utf16.xml"
+    with open("data/bulkcm.xml", encoding="utf-8") as source:
+        xml = source.read().replace("UTF-8", "UTF-16")
+    utf16_file_path.write_text(xml, encoding="utf-16")
+
+    try:
+        list(bulkcm.split_by_byte_range(str(utf16_file_path), str(tmp_path)))
+        assert False
+    except TeedException as e:
+        assert str(e).startswith("Error, byte range split requires an ASCII compatible")
+
+    # a nested SubNetwork stays in it's parent file, a SubNetwork needs an id
+    nested_file_path = tmp_path / "nested.xml"
+    with open("data/bulkcm.xml", encoding="utf-8") as source:
+        xml = source.read().replace(
+            "</xn:SubNetwork>", '<xn:SubNetwork id="2"/></xn:SubNetwork><xn:SubNetwork/>'
+        )
+    nested_file_path.write_text(xml)
+
+    assert bulkcm.split(
+        str(nested_file_path), str(tmp_path), subnetworks=["1"], byte_range=True
+    ) == (["1", None], [f"{tmp_path}{os.path.sep}nested_1.xml", None])
+    assert b'<xn:SubNetwork id="2"/>' in (tmp_path / "nested_1.xml").read_bytes()
+
+    try:
+        list(bulkcm.split_by_byte_range(str(nested_file_path), str(tmp_path)))
+        assert False
+    except TeedException as e:
+        assert str(e).startswith("Error, SubNetwork at byte ")
+        assert str(e).endswith(" has no id to name it's file")
+
+
+def test_scan_subnetworks_chunk_boundary(tmp_path):
+    """Test bulkcm.scan_subnetworks skips the SubNetwork tags out of the markup"""
+
+    file_path = tmp_path / "dump.xml"
+    file_path.write_text("""<?xml version="1.0" encoding="UTF-8"?>
+<?fake <xn:SubNetwork id="PI">?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <configData dnPrefix="a>b">
+        <!-- a <xn:SubNetwork id="comment"> and a < -->
+        <xn:SubNetwork id="1"><xn:attributes><xn:userLabel>a</xn:userLabel>
+        </xn:attributes><xn:ManagedElement id="1" userLabel="a/>b"/>
+        <![CDATA[ </xn:SubNetwork> ]]></xn:SubNetwork>
+        <!-- </xn:SubNetwork> --><xn:SubNetwork id="2"/>
+    </configData>
+</bulkCmConfigDataFile>""")
+
+    # the chunk boundaries fall inside the comments, CDATA and attribute values
+    expected = bulkcm.scan_subnetworks(str(file_path))
+    assert [sn["id"] for sn in expected["subnetworks"]] == ["1", "2"]
+    for chunk_size in range(1, 64):
+        assert bulkcm.scan_subnetworks(str(file_path), chunk_size) == expected
+
+
+def test_merge(tmp_path):
+    """Test bulkcm.merge of the split files"""
+
+    subnetworks = "".join(
+        f"""<xn:SubNetwork id="{sn_id}"><xn:ManagedElement id="1"><xn:attributes>
+        <xn:userLabel>{sn_id}</xn:userLabel></xn:attributes></xn:ManagedElement>
+        </xn:SubNetwork>""" for sn_id in "ABC"
+    )
+    file_path = tmp_path / "dump.xml"
+    file_path.write_text(f"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <fileHeader fileFormatVersion="32.615 V4.5" vendorName="Company NN"/>
+    <configData dnPrefix="DC=a1.companyNN.com">{subnetworks}</configData>
+    <fileFooter dateTime="2021-03-01T00:00:00Z"/>
+</bulkCmConfigDataFile>""")
+    split_dir = tmp_path / "split"
+    split_dir.mkdir()
+
+    split_paths = [
+        sn_file_path
+        for _, sn_file_path in bulkcm.split_by_byte_range(str(file_path), str(split_dir))
+    ]
+    merged_path = str(tmp_path / "merged.xml")
+    assert bulkcm.merge(split_paths, merged_path, chunk_size=16) == ["A", "B", "C"]
+
+    # the same content as the split file
+    parser = etree.XMLParser(remove_blank_text=True)
+    assert etree.tostring(etree.parse(merged_path, parser=parser)) == etree.tostring(
+        etree.parse(str(file_path), parser=parser)
+    )
+
+    # a SubNetwork can't be merged twice
+    try:
+        bulkcm.merge([split_paths[0], str(file_path)], merged_path)
+        assert False
+    except TeedException as e:
+        assert str(e) == f"Error, SubNetwork A is in {split_paths[0]} and {file_path}"
+
+    # incompatible headers
+    other_path = tmp_path / "other.xml"
+    other_path.write_text(
+        (split_dir / "dump_A.xml").read_text().replace("Company NN", "Company MM")
+    )
+    try:
+        bulkcm.merge([split_paths[1], str(other_path)], merged_path)
+        assert False
+    except TeedException as e:
+        assert str(e).startswith(f"Error, {other_path} fileHeader")
+
+
+def test_parse_incremental(tmp_path):
+    """Test bulkcm.parse_incremental"""
+
+    def write_dump(file_path, date_time, labels):
+        subnetworks = "".join(
+            f"""<xn:SubNetwork id="{sn_id}"><xn:ManagedElement id="1"><xn:attributes>
+            <xn:userLabel>{label}</xn:userLabel></xn:attributes></xn:ManagedElement>
+            </xn:SubNetwork>""" for sn_id, label in labels.items()
+        )
+        file_path.write_text(f"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <fileHeader fileFormatVersion="32.615 V4.5" vendorName="Company NN"/>
+    <configData dnPrefix="DC=a1.companyNN.com">{subnetworks}</configData>
+    <fileFooter dateTime="{date_time}"/>
+</bulkCmConfigDataFile>""")
+
+    def labels(sn_id):
+        files = os.listdir(output_dir / sn_id)
+        assert f"dump_{sn_id}_metadata.yml" in files
+
+        file_name = [f for f in files if f.startswith("ManagedElement")][0]
+        with open(output_dir / sn_id / file_name, newline="") as csv_file:
+            return [row["userLabel"] for row in csv.DictReader(csv_file)]
+
+    dump_path = tmp_path / "dump.xml"
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    write_dump(dump_path, "2021-03-01T00:00:00Z", {"A": "a", "B": "b", "C": "c"})
+    assert bulkcm.parse_incremental(str(dump_path), str(output_dir)) == {
+        "parsed": ["A", "B", "C"],
+        "reused": [],
+        "removed": [],
+    }
+    assert [labels(sn_id) for sn_id in "ABC"] == [["a"], ["b"], ["c"]]
+
+    # the footer dateTime isn't part of the hashes
+    write_dump(dump_path, "2021-03-02T00:00:00Z", {"A": "a", "B": "b2", "D": "d"})
+    assert bulkcm.parse_incremental(str(dump_path), str(output_dir)) == {
+        "parsed": ["B", "D"],
+        "reused": ["A"],
+        "removed": ["C"],
+    }
+    assert [labels(sn_id) for sn_id in "ABD"] == [["a"], ["b2"], ["d"]]
+    assert not os.path.exists(output_dir / "C")
+
+    with open(output_dir / bulkcm.INCREMENTAL_MANIFEST) as yaml_file:
+        manifest = yaml.safe_load(yaml_file)
+    assert list(manifest["subnetworks"]) == ["A", "B", "D"]
+
+    # other options parse all the SubNetworks
+    assert bulkcm.parse_incremental(
+        str(dump_path), str(output_dir), output_format="arrow"
+    )["parsed"] == ["A", "B", "D"]
+    assert bulkcm.parse_incremental(
+        str(dump_path), str(output_dir), output_format="arrow", sample_size=10
+    )["parsed"] == ["A", "B", "D"]
+
+    # an interrupted run parses the SubNetwork again, even unchanged since
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"A": "a", "B": "b2</xn:x>", "D": "d"})
+    try:
+        bulkcm.parse_incremental(str(dump_path), str(output_dir))
+        assert False
+    except TeedException:
+        pass
+
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"A": "a", "B": "b2", "D": "d"})
+    bulkcm.parse_incremental(str(dump_path), str(output_dir))
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"A": "a", "B": "b2</xn:x>", "D": "d"})
+    try:
+        bulkcm.parse_incremental(str(dump_path), str(output_dir))
+        assert False
+    except TeedException:
+        pass
+
+    with open(output_dir / bulkcm.INCREMENTAL_MANIFEST) as yaml_file:
+        assert list(yaml.safe_load(yaml_file)["subnetworks"]) == ["A", "D"]
+
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"A": "a", "B": "b2", "D": "d"})
+    assert bulkcm.parse_incremental(str(dump_path), str(output_dir)) == {
+        "parsed": ["B"],
+        "reused": ["A", "D"],
+        "removed": [],
+    }
+    assert labels("B") == ["b2"]
+
+    # the SubNetwork ids are directory names
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"../A": "a"})
+    try:
+        bulkcm.parse_incremental(str(dump_path), str(output_dir))
+        assert False
+    except TeedException as e:
+        assert str(e) == "Error, SubNetwork id '../A' isn't usable as a directory name"
+
+    # the SubNetwork ids must be unique
+    write_dump(dump_path, "2021-03-03T00:00:00Z", {"A": "a"})
+    dump_path.write_text(
+        dump_path.read_text().replace(
+            "</configData>",
+            """
+    <xn:SubNetwork id="A"/></configData>""",
+        )
+    )
+
+    try:
+        bulkcm.parse_incremental(str(dump_path), str(output_dir))
+        assert False
+    except TeedException as e:
+        assert str(e).startswith("Error, incremental parse needs unique SubNetwork ids")
+
+
+def test_parse_quarantine(tmp_path):
+    """Test bulkcm.parse skipping the malformed units"""
+
+    file_path = tmp_path / "corrupt.xml"
+    file_path.write_text("""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <configData dnPrefix="DC=a1.companyNN.com"><xn:SubNetwork id="1">
+        <xn:MeContext id="A"><xn:attributes><xn:x>1</xn:x></xn:attributes></xn:MeContext>
+        <xn:MeContext id="B"><xn:attributes><xn:x>2</xn:y></xn:attributes></xn:MeContext>
+        <xn:MeContext id="C"><xn:attributes><xn:x>3</xn:x></xn:attributes>
+        <xn:MeContext id="D"><xn:attributes><xn:x>4</xn:x></xn:attributes></xn:MeContext>
+    </xn:SubNetwork></configData>
+</bulkCmConfigDataFile>""")
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    # without quarantine the parse fails
+    try:
+        stream = bulkcm.BulkCmParser.stream_to_csv(str(tmp_path))
+        bulkcm.parse(str(file_path), str(tmp_path), stream)
+        assert False
+    except TeedException:
+        pass
+
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(output_dir))
+    metadata, _ = bulkcm.parse(
+        str(file_path), str(output_dir), stream, quarantine="MeContext"
+    )
+
+    content = file_path.read_bytes()
+    quarantined = metadata["quarantine"]
+    assert [unit["dn"] for unit in quarantined] == ["MeContext=B", "MeContext=C"]
+    assert quarantined[0]["error"].startswith("mismatched tag, byte ")
+    assert quarantined[1]["error"] == "Error, MeContext=C end tag missing"
+    start, end = quarantined[0]["range"]
+    assert content[start:end].startswith(b'<xn:MeContext id="B">')
+    assert content[start:end].endswith(b"</xn:MeContext>")
+
+    with open(output_dir / "corrupt_metadata.yml") as yaml_file:
+        assert yaml.safe_load(yaml_file)["quarantine"] == quarantined
+
+    quarantine_file = (output_dir / "corrupt_quarantine.xml").read_bytes()
+    assert b'<xn:MeContext id="B">' in quarantine_file
+    assert b'<xn:MeContext id="C">' in quarantine_file
+    assert b'<xn:MeContext id="A">' not in quarantine_file
+
+    file_name = [f for f in os.listdir(output_dir) if f.startswith("MeContext")][0]
+    with open(output_dir / file_name, newline="") as csv_file:
+        assert [row["MeContext"] for row in csv.DictReader(csv_file)] == ["A", "D"]
+
+    # a clean file
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(output_dir))
+    metadata, _ = bulkcm.parse(
+        os.path.abspath("data/bulkcm.xml"),
+        str(output_dir),
+        stream,
+        quarantine="MeContext",
+    )
+    assert metadata["quarantine"] == []
+    assert not os.path.exists(output_dir / "bulkcm_quarantine.xml")
+
+    # only the malformed files are scanned for units
+    assert bulkcm.check_document("data/bulkcm.xml") is None
+    assert bulkcm.check_document(str(file_path)).startswith("mismatched tag, line 6")
+
+    try:
+        bulkcm.parse(b"<x/>", str(output_dir), stream, quarantine="MeContext")
+        assert False
+    except TeedException as e:
+        assert str(e) == "Error, quarantine needs a file path or URI"
+
+
+def test_parse_quarantine_end_tag_missing(tmp_path):
+    """Test bulkcm.parse quarantine of units lacking their end tag"""
+
+    def managed_elements(sn_id: str, end_tag: bool = True) -> str:
+        return "".join(
+            f"""<xn:ManagedElement id="{sn_id}{me_id}"><xn:attributes>
+            <xn:userLabel>{sn_id}{me_id}</xn:userLabel></xn:attributes>"""
+            + ("</xn:ManagedElement>" if end_tag or me_id == 1 else "")
+            for me_id in (1, 2)
+        )
+
+    # the last ManagedElement of the first SubNetwork lacks it's end tag
+    file_path = tmp_path / "corrupt.xml"
+    file_path.write_text(f"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm">
+    <configData dnPrefix="DC=a1.companyNN.com">
+        <xn:SubNetwork id="1">{managed_elements("1", False)}</xn:SubNetwork>
+        <xn:SubNetwork id="2">{managed_elements("2")}</xn:SubNetwork>
+    </configData>
+</bulkCmConfigDataFile>""")
+
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(tmp_path))
+    metadata, _ = bulkcm.parse(
+        str(file_path), str(tmp_path), stream, quarantine="ManagedElement"
+    )
+
+    content = file_path.read_bytes()
+    quarantined = metadata["quarantine"]
+    assert [unit["dn"] for unit in quarantined] == ["ManagedElement=12"]
+    start, end = quarantined[0]["range"]
+    assert content[start:end].startswith(b'<xn:ManagedElement id="12">')
+    assert b"SubNetwork" not in content[start:end]
+
+    file_name = [f for f in os.listdir(tmp_path) if f.startswith("SubNetwork")][0]
+    with open(tmp_path / file_name, newline="") as csv_file:
+        assert [row["SubNetwork"] for row in csv.DictReader(csv_file)] == ["1", "2"]
+
+    file_name = [f for f in os.listdir(tmp_path) if f.startswith("ManagedElement")][0]
+    with open(tmp_path / file_name, newline="") as csv_file:
+        assert [
+            (row["SubNetwork"], row["ManagedElement"]) for row in csv.DictReader(csv_file)
+        ] == [("1", "11"), ("2", "21"), ("2", "22")]
+
+    # the last unit of the file
+    file_path = tmp_path / "last.xml"
+    with open("data/bulkcm.xml", encoding="utf-8") as source:
+        lines = source.readlines()
+    assert lines[34].strip() == "</xn:ManagedElement>"
+    file_path.write_text("".join(lines[:34] + lines[35:]))
+
+    output_dir = tmp_path / "last"
+    output_dir.mkdir()
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(output_dir))
+    metadata, _ = bulkcm.parse(
+        str(file_path), str(output_dir), stream, quarantine="ManagedElement"
+    )
+    assert [unit["dn"] for unit in metadata["quarantine"]] == ["ManagedElement=2"]
+
+    # the elements outside of the units must nest correctly, configData end tag missing
+    file_path = tmp_path / "broken.xml"
+    file_path.write_text("".join(lines[:34] + lines[35:36] + lines[37:]))
+    try:
+        bulkcm.scan_units(str(file_path), "ManagedElement")
+        assert False
+    except TeedException as e:
+        assert str(e).startswith(
+            "Error, unexpected bulkCmConfigDataFile end tag at byte "
+        )
+
+
+def test_apply_delta(tmp_path):
+    """Test bulkcm.apply_delta"""
+
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    stream = bulkcm.BulkCmParser.stream_to_parquet(str(tmp_path))
+    bulkcm.parse(
+        f"file://{os.path.abspath('data/bulkcm_with_utrancell.xml')}",
+        str(tmp_path),
+        stream,
+    )
+
+    # the files left in the staging directory by an interrupted run are ignored
+    (tmp_path / "_delta").mkdir()
+    (
+        tmp_path / "_delta" / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"
+    ).write_bytes(b"")
+
+    changes = bulkcm.apply_delta(
+        f"file://{os.path.abspath('data/bulkcm_delta.xml')}", str(tmp_path)
+    )
+
+    assert changes == {
+        "vsDataRncHandOver": {"created": 0, "updated": 0, "deleted": 1},
+        "vsDataUtranCell": {"created": 1, "updated": 1, "deleted": 0},
+    }
+
+    # the deleted class has no files, the updated class keeps it's types
+    file_names = sorted(os.listdir(tmp_path))
+    assert not any(file_name.startswith("vsDataRncHandOver") for file_name in file_names)
+    assert "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet" in file_names
+    assert "_delta" not in file_names
+
+    table = pq.read_table(
+        tmp_path / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"
+    )
+    assert table.schema.field("sc").type == pa.int64()
+    assert table.select(["vsDataUtranCell", "sc", "pcpichpower"]).to_pylist() == [
+        {"vsDataUtranCell": "Cell4", "sc": 333, "pcpichpower": 222},
+        {"vsDataUtranCell": "Cell6", "sc": 444, "pcpichpower": 555},
+    ]
+
+    # the rows without changes are kept as is, the changed rows appended
+    with open("data/bulkcm_delta.xml", "rb") as delta_file:
+        delta = delta_file.read()
+    delta = (
+        delta.replace(b'id="Cell6" modifier="create"', b'id="Cell7" modifier="create"')
+        .replace(b'id="Cell4" modifier="update"', b'id="Cell4"')
+        .replace(b'id="5" modifier="delete"', b'id="5"')
+    )
+    assert bulkcm.apply_delta(delta, str(tmp_path)) == {
+        "vsDataUtranCell": {"created": 1, "updated": 0, "deleted": 0},
+    }
+    assert [
+        file_name for file_name in os.listdir(tmp_path) if "vsDataUtranCell" in file_name
+    ] == ["vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"]
+
+    table = pq.read_table(
+        tmp_path / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.parquet"
+    )
+    assert table.select(["vsDataUtranCell", "sc"]).to_pylist() == [
+        {"vsDataUtranCell": "Cell4", "sc": 333},
+        {"vsDataUtranCell": "Cell6", "sc": 444},
+        {"vsDataUtranCell": "Cell7", "sc": 444},
+    ]
+
+    # deleting the parent deletes the subtree
+    delta = delta.replace(b'id="Cell7" modifier="create"', b'id="Cell7"').replace(
+        b'<un:RncFunction id="3">', b'<un:RncFunction id="3" modifier="delete">'
+    )
+    assert bulkcm.apply_delta(delta, str(tmp_path))["vsDataUtranCell"] == {
+        "created": 0,
+        "updated": 0,
+        "deleted": 3,
+    }
+    assert not any("vsDataUtranCell" in file_name for file_name in os.listdir(tmp_path))
+
+    # the operations on a DN are applied in file order, the last one wins
+    def container(cell_id, modifier, sc=""):
+        return f"""<xn:VsDataContainer id="{cell_id}" modifier="{modifier}"><xn:attributes>
+            <xn:vsDataType>vsDataUtranCell</xn:vsDataType>
+            <vsRHO11:vsDataUtranCell><vsRHO11:sc>{sc}</vsRHO11:sc></vsRHO11:vsDataUtranCell>
+            </xn:attributes></xn:VsDataContainer>"""
+
+    with open("data/bulkcm_delta.xml", encoding="utf-8") as delta_file:
+        delta = delta_file.read()
+    start = delta.index('<xn:VsDataContainer id="Cell4"')
+    end = delta.index("</un:RncFunction>")
+    delta = (
+        delta[:start]
+        + container("Cell8", "create", "8")
+        + container("Cell8", "delete")
+        + container("Cell9", "create", "1")
+        + container("Cell9", "delete")
+        + container("Cell9", "create", "9")
+        + delta[end:]
+    )
+    assert bulkcm.apply_delta(delta.encode(), str(tmp_path))["vsDataUtranCell"] == {
+        "created": 1,
+        "updated": 0,
+        "deleted": 0,
+    }
+    (file_name,) = [f for f in os.listdir(tmp_path) if f.startswith("vsDataUtranCell")]
+    table = pq.read_table(tmp_path / file_name)
+    assert table.select(["vsDataUtranCell", "sc"]).to_pylist() == [
+        {"vsDataUtranCell": "Cell9", "sc": 9}
+    ]
+
+
+def test_write(tmp_path):
+    """Test bulkcm.write"""
+
+    parsed_dir = tmp_path / "parsed"
+    written_dir = tmp_path / "written"
+    parsed_dir.mkdir()
+    written_dir.mkdir()
+
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(parsed_dir))
+    bulkcm.parse(
+        f"file://{os.path.abspath('data/bulkcm_with_utrancell.xml')}",
+        str(parsed_dir),
+        stream,
+    )
+
+    # unsort the vsDataUtranCell rows, to go through the external sort
+    utrancell_path = parsed_dir / "vsDataUtranCell-762627b0939d1ac04dadef2b58f194c1.csv"
+    with open(utrancell_path, newline="") as csv_file:
+        rows = list(csv.reader(csv_file))
+    rows.append(["1", "2", "3", "Cell0", "0", "1.5"])
+    with open(utrancell_path, "w", newline="") as csv_file:
+        csv.writer(csv_file).writerows(rows)
+
+    bulkcm_path = str(tmp_path / "bulkcm.xml")
+    assert (
+        bulkcm.write(
+            [str(parsed_dir)], bulkcm_path, dn_prefix="DC=a1", sort_buffer_size=1
+        )
+        == 6
+    )
+
+    # parsing the written file gives back the same nodes
+    stream = bulkcm.BulkCmParser.stream_to_csv(str(written_dir))
+    bulkcm.parse(f"file://{bulkcm_path}", str(written_dir), stream)
+
+    csv_file_names = sorted(
+        file_name for file_name in os.listdir(parsed_dir) if file_name.endswith(".csv")
+    )
+    assert csv_file_names == sorted(
+        file_name for file_name in os.listdir(written_dir) if file_name.endswith(".csv")
+    )
+
+    for file_name in csv_file_names:
+        with open(parsed_dir / file_name) as parsed, open(
+            written_dir / file_name
+        ) as written:
+            assert sorted(parsed.readlines()) == sorted(written.readlines())
+
+    # the vsData nodes are VsDataContainer elements
+    root = etree.parse(bulkcm_path).getroot()
+    assert [element.get("id") for element in root.iter("{*}VsDataContainer")] == [
+        "Cell0",
+        "Cell4",
+        "5",
+    ]
+
+
+def test_audit(tmp_path):
+    """Test bulkcm.audit"""
+
+    xml = b"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm"
+    xmlns:un="http://www.3gpp.org/ftp/specs/archive/32_series/32.645#utranNrm">
+    <configData>
+        <xn:SubNetwork id="1">
+            <un:UtranCell id="1"><un:attributes>
+                <un:qQualMin>-18</un:qQualMin><un:uarfcnDl>10837</un:uarfcnDl>
+            </un:attributes></un:UtranCell>
+            <un:UtranCell id="2"><un:attributes>
+                <un:qQualMin>-20</un:qQualMin><un:uarfcnDl>10837</un:uarfcnDl>
+            </un:attributes></un:UtranCell>
+            <un:UtranCell id="3"><un:attributes>
+                <un:qQualMin>-20</un:qQualMin><un:uarfcnDl>10812</un:uarfcnDl>
+            </un:attributes></un:UtranCell>
+            <un:UtranCell id="4"><un:attributes>
+                <un:uarfcnDl>10837</un:uarfcnDl>
+            </un:attributes></un:UtranCell>
+        </xn:SubNetwork>
+    </configData>
+</bulkCmConfigDataFile>
+"""
+
+    rules_path = tmp_path / "rules.yaml"
+    rules_path.write_text("""rules:
+  - name: qQualMin golden value
+    check: UtranCell.qQualMin == -18
+    when: UtranCell.uarfcnDl == 10837
+    severity: major
+  - check: UtranCell.uarfcnDl in [10812, 10837]
+  - check: ManagedElement.userLabel != test
+""")
+
+    violations_path = str(tmp_path / "violations.csv")
+    violations = bulkcm.audit(xml, str(rules_path), violations_path)
+
+    assert violations.to_pylist() == [
+        {
+            "rule": "qQualMin golden value",
+            "severity": "major",
+            "class": "UtranCell",
+            "dn": f"SubNetwork=1,UtranCell={cell}",
+            "attribute": "qQualMin",
+            "value": value,
+            "expected": "UtranCell.qQualMin == -18",
+        }
+        for cell, value in (("2", "-20"), ("4", None))
+    ]
+
+    with open(violations_path, newline="") as csv_file:
+        assert [row["dn"] for row in csv.DictReader(csv_file)] == [
+            "SubNetwork=1,UtranCell=2",
+            "SubNetwork=1,UtranCell=4",
+        ]
+
+    for rules in (
+        [{"check": "UtranCell.qQualMin = -18"}],
+        [{"check": "UtranCell.qQualMin == abc"}],
+        [{"check": "UtranCell.qQualMin == -18", "when": "RncFunction.x == 1"}],
+    ):
+        try:
+            bulkcm.audit(xml, rules)
+            assert False
+        except TeedException:
+            pass
@@ -685,3 +685,156 @@ def test_meas_parse_output_to_parquet_local_filesystem():
             "mm": 15,
         },
     ]
+
+
+def test_meas_parse_output_to_sqlite(tmp_path):
+    """Use the SQLite consume method in meas.parse"""
+
+    import sqlite3
+
+    meas.parse("data/mdc_c3_1.xml", str(tmp_path), consume=meas.consume_to_sqlite)
+
+    connection = sqlite3.connect(str(tmp_path / "meas.sqlite"))
+
+    assert connection.execute(
+        'SELECT "LDN", "attTCHSeizures", "succImmediateAssignProcs" FROM "UtranCell_900"'
+    ).fetchall() == [
+        ("RncFunction=RF-1,UtranCell=Gbg-997", 234, 789),
+        ("RncFunction=RF-1,UtranCell=Gbg-998", 890, 234),
+        ("RncFunction=RF-1,UtranCell=Gbg-999", 456, 789),
+    ]
+
+    assert connection.execute(
+        "SELECT name FROM sqlite_master WHERE type='index'"
+    ).fetchall() == [("UtranCell_900_key",)]
+
+    connection.close()
+
+
+def test_meas_parse_output_to_arrow(tmp_path):
+    """Use the Arrow IPC consume method in meas.parse"""
+
+    meas.parse("data/mdc_c3_1.xml", str(tmp_path), consume=meas.consume_to_arrow)
+
+    with pa.memory_map(
+        str(tmp_path / "UtranCell-900-9995823c30bcf308b91ab0b66313e86a.arrow")
+    ) as source:
+        table = pa.ipc.open_file(source).read_all()
+
+    assert table.schema.types == [pa.string()] * 3 + [pa.int64()] * 4
+    assert table.column("LDN").to_pylist() == [
+        "RncFunction=RF-1,UtranCell=Gbg-997",
+        "RncFunction=RF-1,UtranCell=Gbg-998",
+        "RncFunction=RF-1,UtranCell=Gbg-999",
+    ]
+    assert table.column("attTCHSeizures").to_pylist() == [234, 890, 456]
+
+
+def test_meas_parse_buffers(tmp_path):
+    """Use meas.parse with in memory files"""
+
+    with open("data/mdc_c3_1.xml", "rb") as mdc_file:
+        data = mdc_file.read()
+
+    meas.parse([data, memoryview(data)], str(tmp_path))
+
+    with open(
+        tmp_path / "UtranCell-900-9995823c30bcf308b91ab0b66313e86a.csv", newline=""
+    ) as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    assert len(rows) == 6
+    assert rows[0]["LDN"] == "RncFunction=RF-1,UtranCell=Gbg-997"
+    assert rows[0]["attTCHSeizures"] == "234"
+
+
+def test_meas_parse_producers(tmp_path):
+    """Use meas.parse with several producer processes"""
+
+    input_dir = tmp_path / "input"
+    input_dir.mkdir()
+    for i in range(4):
+        with open("data/mdc_c3_1.xml", "rb") as mdc_file:
+            (input_dir / f"mdc_{i}.xml").write_bytes(mdc_file.read())
+
+    meas.parse(str(input_dir / "mdc_*.xml"), str(tmp_path), producers=3)
+
+    with open(
+        tmp_path / "UtranCell-900-9995823c30bcf308b91ab0b66313e86a.csv", newline=""
+    ) as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    assert len(rows) == 12
+    assert (
+        sorted(row["LDN"] for row in rows)[:4]
+        == ["RncFunction=RF-1,UtranCell=Gbg-997"] * 4
+    )
+
+    # the consumer counts one DONE per producer
+    queue = Queue()
+    queue.put(
+        {
+            "mts": ["c1"],
+            "gp": "900",
+            "rows": [["20210301141500", "ManagedElement=1", "UtranCell=1", "1"]],
+        }
+    )
+    queue.put("DONE")
+    queue.put(
+        {
+            "mts": ["c1"],
+            "gp": "900",
+            "rows": [["20210301141500", "ManagedElement=1", "UtranCell=2", "2"]],
+        }
+    )
+    queue.put("DONE")
+    meas.consume_to_csv(queue, Lock(), str(tmp_path), producers=2)
+
+    with open(
+        tmp_path / f"UtranCell-900-{hashlib.md5(b'c1').hexdigest()}.csv", newline=""
+    ) as csv_file:
+        assert [row["LDN"] for row in csv.DictReader(csv_file)] == [
+            "UtranCell=1",
+            "UtranCell=2",
+        ]
+
+    # a corrupt file stops the producers and the consumer
+    with open("data/tag_mismatch.xml", "rb") as xml_file:
+        (input_dir / "mdc_bad.xml").write_bytes(xml_file.read())
+
+    meas.parse(str(input_dir / "mdc_*.xml"), str(tmp_path), producers=2)
+
+    # any producer error stops the consumer, a directory matching the glob
+    os.remove(input_dir / "mdc_bad.xml")
+    (input_dir / "mdc_dir.xml").mkdir()
+
+    meas.parse(str(input_dir / "mdc_*.xml"), str(tmp_path), producers=2)
+
+    # a consumer without the producers argument gets a single producer
+    meas.parse(
+        str(input_dir / "mdc_0.xml"),
+        str(tmp_path),
+        consume=my_custom_consume,
+        producers=2,
+    )
+
+    assert path.exists(
+        tmp_path
+        / "ManagedElement=RNC-Gbg-1/UtranCell-900-9250b00755cdcfa28421b7ddb6f76666.csv"
+    )
+
+
+def failing_consume(queue: Queue, lock: Lock, output_dir: str):
+    """Consumer failing on the first item"""
+
+    raise ValueError(queue.get())
+
+
+def test_meas_parse_consumer_error():
+    """A failed consumer process raises an exception"""
+
+    try:
+        meas.parse("data/mdc_c3_1.xml", "data", consume=failing_consume)
+        assert False
+    except meas.TeedException as e:
+        assert str(e) == "Error, consumer failing_consume exit code 1"
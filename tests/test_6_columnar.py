@@ -0,0 +1,98 @@
+import pyarrow as pa
+import pytest
+
+from teed import TeedException
+from teed.columnar import (
+    ColumnarWriter,
+    concat_tables,
+    convert_values,
+    infer_type,
+    load_type_map,
+)
+
+
+class ListWriter:
+    """Record batch writer keeping the batches in a list"""
+
+    def __init__(self, schema):
+        self.schema = schema
+        self.batches = []
+        self.closed = False
+
+    def write_batch(self, batch):
+        self.batches.append(batch)
+
+    def close(self):
+        self.closed = True
+
+
+def test_infer_type():
+    """Test columnar.infer_type"""
+
+    assert infer_type(["1", "-2", "+3"]) == pa.int64()
+    assert infer_type(["1", "2.5", "1e3"]) == pa.float64()
+    assert infer_type(["true", "FALSE", ""]) == pa.bool_()
+    assert infer_type(["1", "abc"]) == pa.string()
+    assert infer_type(["", None]) == pa.string()
+    assert infer_type([str(2**64)]) == pa.float64()
+    assert infer_type(["-.5", "3.", "+1E-3"]) == pa.float64()
+    for value in ("nan", "inf", "-Infinity", "1_000", "1e999", " 1", "1.2.3"):
+        assert infer_type(["1.5", value]) == pa.string()
+
+    assert convert_values(["1", ""], pa.int64()) == [1, None]
+    assert convert_values(["True", "false"], pa.bool_()) == [True, False]
+    assert convert_values(["a", ""], pa.string()) == ["a", ""]
+
+    with pytest.raises(ValueError):
+        convert_values(["yes"], pa.bool_())
+
+    with pytest.raises(TeedException):
+        load_type_map({"UtranCell": {"sc": "integer"}})
+
+
+def test_columnar_writer_fallback_on_conflict():
+    """Test columnar.ColumnarWriter type inference and widening"""
+
+    parts = []
+
+    def open_writer(table_name, table_key, part, schema):
+        writer = ListWriter(schema)
+        parts.append((table_name, part, writer))
+        return writer
+
+    writer = ColumnarWriter(open_writer, batch_size=2, sample_size=2)
+    columns = ["UtranCell", "sc", "state"]
+
+    writer.write("key", "UtranCell", columns, ["1", "10", "true"], key_columns=1)
+    writer.write("key", "UtranCell", columns, ["2", "11", "false"], key_columns=1)
+    # sc is no longer an integer
+    writer.write("key", "UtranCell", columns, ["3", "11.5", "true"], key_columns=1)
+    writer.close()
+
+    assert [(name, part) for name, part, _ in parts] == [
+        ("UtranCell", 0),
+        ("UtranCell", 1),
+    ]
+    assert all(writer.closed for _, _, writer in parts)
+
+    first, second = parts[0][2], parts[1][2]
+    assert first.schema.types == [pa.string(), pa.int64(), pa.bool_()]
+    assert second.schema.types == [pa.string(), pa.float64(), pa.bool_()]
+    assert pa.Table.from_batches(second.batches).to_pylist() == [
+        {"UtranCell": "3", "sc": 11.5, "state": True}
+    ]
+
+
+def test_concat_tables():
+    """Test columnar.concat_tables"""
+
+    first = pa.table({"UtranCell": ["1"], "sc": [111]})
+    second = pa.table({"UtranCell": ["2"], "sc": ["abc"], "state": [True]})
+
+    table = concat_tables([first, second])
+
+    assert table.schema.types == [pa.string(), pa.string(), pa.bool_()]
+    assert table.to_pylist() == [
+        {"UtranCell": "1", "sc": "111", "state": None},
+        {"UtranCell": "2", "sc": "abc", "state": True},
+    ]
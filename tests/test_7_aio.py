@@ -0,0 +1,188 @@
+import asyncio
+import multiprocessing
+import os
+import sqlite3
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import aclosing
+
+from teed import TeedException, bulkcm
+from teed.aio import AsyncRunner
+
+
+def test_async_probe_and_parse(tmp_path):
+    """Test AsyncRunner.probe and AsyncRunner.parse"""
+
+    file_uri = os.path.abspath("data/bulkcm.xml")
+
+    async def run():
+        async with AsyncRunner(max_concurrency=2) as runner:
+            return await asyncio.gather(
+                runner.probe(file_uri),
+                runner.parse(f"file://{file_uri}", str(tmp_path), output_format="sqlite"),
+            )
+
+    bulkcm_info, (metadata, duration) = asyncio.run(run())
+
+    assert bulkcm_info == bulkcm.probe(file_uri)
+    assert metadata == {}
+
+    with sqlite3.connect(tmp_path / "bulkcm.sqlite") as connection:
+        (count,) = connection.execute('SELECT COUNT(*) FROM "ManagedElement"').fetchone()
+        assert count == 2
+
+    # the job exceptions are raised in the caller
+    try:
+        asyncio.run(AsyncRunner().probe(os.path.abspath("data/tag_mismatch.xml")))
+        assert False
+    except Exception as e:
+        assert str(e).startswith("Opening and ending tag mismatch")
+
+
+def test_async_iterators(tmp_path):
+    """Test AsyncRunner.iter_nodes and AsyncRunner.split"""
+
+    async def run():
+        runner = AsyncRunner()
+
+        class_names = [
+            mo.class_name
+            async for mo in runner.iter_nodes(
+                os.path.abspath("data/bulkcm_with_utrancell.xml"),
+                include_elements=["vsDataUtranCell", "vsDataRncHandOver"],
+                exclude_elements=["*"],
+            )
+        ]
+        sns = [sn async for sn in runner.split("data/bulkcm.xml", str(tmp_path))]
+
+        return class_names, sns
+
+    class_names, sns = asyncio.run(run())
+
+    assert class_names == ["vsDataUtranCell", "vsDataRncHandOver"]
+    assert sns == [("1", f"{tmp_path}{os.path.sep}bulkcm_1.xml")]
+
+
+def test_async_cancel():
+    """Test AsyncRunner job cancellation"""
+
+    runner = AsyncRunner(max_concurrency=1)
+
+    async def run():
+        await asyncio.wait_for(runner.run(time.sleep, 60), timeout=2)
+
+    start = time.perf_counter()
+    try:
+        asyncio.run(run())
+        assert False
+    except (asyncio.TimeoutError, TeedException):
+        pass
+
+    # the job process was terminated
+    assert time.perf_counter() - start < 30
+    assert multiprocessing.active_children() == []
+
+
+def count():
+    """A slow generator job"""
+
+    for i in range(1000):
+        time.sleep(0.1)
+        yield i
+
+
+def test_async_early_exit():
+    """Test leaving an AsyncRunner async for early terminates the job process"""
+
+    async def run():
+        runner = AsyncRunner(max_concurrency=1)
+
+        async with aclosing(runner.iterate(count, batch_size=1)) as items:
+            async for i in items:
+                assert multiprocessing.active_children() != []
+                break
+
+        assert multiprocessing.active_children() == []
+
+        # the job slot is free
+        return await asyncio.wait_for(runner.run(sum, [1, 2]), timeout=30)
+
+    assert asyncio.run(run()) == 3
+
+
+def test_async_no_executor_threads():
+    """Test the running jobs don't hold the event loop executor threads"""
+
+    async def run():
+        loop = asyncio.get_running_loop()
+        loop.set_default_executor(ThreadPoolExecutor(max_workers=1))
+
+        async with AsyncRunner(max_concurrency=2) as runner:
+            jobs = [asyncio.ensure_future(runner.run(time.sleep, 3)) for _ in range(2)]
+            await asyncio.sleep(0.5)
+
+            # the executor is free while the jobs run
+            start = time.perf_counter()
+            await asyncio.wait_for(loop.run_in_executor(None, int), timeout=1)
+            elapsed = time.perf_counter() - start
+
+            await asyncio.gather(*jobs)
+
+        return elapsed
+
+    assert asyncio.run(run()) < 1
+
+
+def test_async_parse_progress(tmp_path):
+    """Test AsyncRunner.parse_progress"""
+
+    async def run():
+        async with AsyncRunner() as runner:
+            return [
+                progress
+                async for progress in runner.parse_progress(
+                    os.path.abspath("data/bulkcm_with_utrancell.xml"),
+                    str(tmp_path),
+                    batch_size=0,
+                    every=2,
+                )
+            ]
+
+    progresses = asyncio.run(run())
+    nodes = len(
+        list(bulkcm.iter_nodes(os.path.abspath("data/bulkcm_with_utrancell.xml")))
+    )
+
+    assert [progress["nodes"] for progress in progresses[:-1]] == list(
+        range(2, nodes + 1, 2)
+    ) + ([nodes] if nodes % 2 else [])
+    assert progresses[-1]["nodes"] == nodes
+    assert progresses[-1]["metadata"] == {}
+    assert "duration" in progresses[-1]
+
+
+class ProactorLikeEventLoop(asyncio.SelectorEventLoop):
+    """Event loop lacking add_reader, as the Windows proactor event loop"""
+
+    def add_reader(self, fd, callback, *args):
+        raise NotImplementedError
+
+
+def test_async_without_add_reader():
+    """Test AsyncRunner on an event loop without add_reader"""
+
+    async def run():
+        async with AsyncRunner() as runner:
+            mos = [
+                mo async for mo in runner.iter_nodes(os.path.abspath("data/bulkcm.xml"))
+            ]
+            return len(mos), await runner.run(sum, [1, 2])
+
+    loop = ProactorLikeEventLoop()
+    try:
+        assert loop.run_until_complete(run()) == (
+            len(list(bulkcm.iter_nodes(os.path.abspath("data/bulkcm.xml")))),
+            3,
+        )
+    finally:
+        loop.close()
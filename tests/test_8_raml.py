@@ -0,0 +1,108 @@
+import csv
+import os
+from io import BytesIO
+
+from teed import bulkcm, raml
+
+
+def test_get_node_path():
+    """Test raml.get_node_path"""
+
+    assert raml.get_node_path("PLMN-PLMN/RNC-1/WBTS-2/WCEL-3") == {
+        "PLMN": "PLMN",
+        "RNC": "1",
+        "WBTS": "2",
+        "WCEL": "3",
+    }
+    assert raml.get_node_path("PLMN-PLMN/MRBTS-1/LNBTS-1/LNCEL-a-1") == {
+        "PLMN": "PLMN",
+        "MRBTS": "1",
+        "LNBTS": "1",
+        "LNCEL": "a-1",
+    }
+
+
+def test_raml_parse(tmp_path):
+    """Test raml.parse"""
+
+    file_uri = f"file://{os.path.abspath('data/raml.xml')}"
+
+    for backend in bulkcm.BACKENDS:
+        output_dir = tmp_path / backend
+        output_dir.mkdir()
+
+        stream = bulkcm.BulkCmParser.stream_to_csv(str(output_dir))
+        metadata, _ = raml.parse(file_uri, str(output_dir), stream, backend=backend)
+
+        assert metadata == {
+            "type": "actual",
+            "scope": "all",
+            "dateTime": "2011-05-18T10:00:00",
+            "action": "created",
+            "appInfo": "ActualExporter",
+        }
+
+        file_names = sorted(os.listdir(output_dir))
+        assert [file_name.split("-")[0] for file_name in file_names] == [
+            "RNC",
+            "WBTS",
+            "WCEL",
+            "raml_metadata.yml",
+        ]
+
+        with open(output_dir / file_names[2], newline="") as csv_file:
+            assert list(csv.DictReader(csv_file)) == [
+                {
+                    "PLMN": "PLMN",
+                    "RNC": "1",
+                    "WBTS": "2",
+                    "WCEL": "3",
+                    "name": "Cell 3",
+                    "AdminCellState": "1",
+                    "URAId": "1;2",
+                    "AdjsList": "AdjsCI=100,AdjsLAC=200;AdjsCI=101,AdjsLAC=200",
+                },
+                {
+                    "PLMN": "PLMN",
+                    "RNC": "1",
+                    "WBTS": "2",
+                    "WCEL": "4",
+                    "name": "Cell 4",
+                    "AdminCellState": "0",
+                    "URAId": "1",
+                    "AdjsList": "AdjsCI=100,AdjsLAC=200",
+                },
+            ]
+
+
+def test_raml_parser_filters():
+    """Test the RamlParser elements filters and predicates"""
+
+    with open("data/raml.xml", "rb") as raml_file:
+        xml = raml_file.read()
+
+    def parse(**kwargs):
+        nodes = []
+
+        def stream_to_list():
+            while True:
+                node = yield
+                nodes.append((node["node_name"], node["node_path"][node["node_name"]]))
+
+        target = raml.RamlParser(stream_to_list(), **kwargs)
+        bulkcm.parse_target(BytesIO(xml), target)
+
+        return nodes
+
+    assert parse() == [("RNC", "1"), ("WBTS", "2"), ("WCEL", "3"), ("WCEL", "4")]
+    assert parse(exclude_elements=["WCEL"]) == [("RNC", "1"), ("WBTS", "2")]
+    assert parse(include_elements=["WCEL"], exclude_elements=["*"]) == [
+        ("WCEL", "3"),
+        ("WCEL", "4"),
+    ]
+    assert parse(where=["WCEL=4"]) == [("RNC", "1"), ("WBTS", "2"), ("WCEL", "4")]
+    assert parse(where=["WCEL.AdminCellState=1", "RNC.name=*Gbg*"]) == [
+        ("RNC", "1"),
+        ("WBTS", "2"),
+        ("WCEL", "3"),
+    ]
@@ -0,0 +1,140 @@
+import csv
+import os
+import sqlite3
+
+from teed import TeedException, index, meas
+
+BULKCM = b"""<?xml version="1.0" encoding="UTF-8"?>
+<bulkCmConfigDataFile xmlns="http://www.3gpp.org/ftp/specs/archive/32_series/32.615#configData"
+    xmlns:xn="http://www.3gpp.org/ftp/specs/archive/32_series/32.625#genericNrm"
+    xmlns:un="http://www.3gpp.org/ftp/specs/archive/32_series/32.645#utranNrm"
+    xmlns:vs="http://www.companyNN.com/xmlschemas/NNUtranCell.1.1">
+    <configData dnPrefix="DC=a1.companyNN.com">
+        <xn:SubNetwork id="CountryNN">
+            <xn:MeContext id="MEC-Gbg1">
+                <xn:ManagedElement id="RNC-Gbg-1">
+                    <un:RncFunction id="RF-1">
+                        <un:UtranCell id="Gbg-997">
+                            <un:attributes>
+                                <un:userLabel>Gbg 997</un:userLabel>
+                                <un:uarfcnDl>10837</un:uarfcnDl>
+                            </un:attributes>
+                        </un:UtranCell>
+                        <un:UtranCell id="Gbg-998">
+                            <un:attributes>
+                                <un:userLabel>Gbg 998</un:userLabel>
+                                <un:uarfcnDl>10812</un:uarfcnDl>
+                            </un:attributes>
+                        </un:UtranCell>
+                        <xn:VsDataContainer id="Gbg-998">
+                            <xn:attributes>
+                                <xn:vsDataType>vsDataUtranCell</xn:vsDataType>
+                                <xn:vsDataFormatVersion>NNUtranCell.1.1</xn:vsDataFormatVersion>
+                                <vs:vsDataUtranCell>
+                                    <vs:sectorId>2</vs:sectorId>
+                                </vs:vsDataUtranCell>
+                            </xn:attributes>
+                        </xn:VsDataContainer>
+                    </un:RncFunction>
+                </xn:ManagedElement>
+            </xn:MeContext>
+        </xn:SubNetwork>
+    </configData>
+</bulkCmConfigDataFile>
+"""
+
+NEDN = "DC=a1.companyNN.com,SubNetwork=1,IRPAgent=1,SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1"
+
+
+def test_get_dn_key():
+    """Test index.get_dn_key"""
+
+    assert (
+        index.get_dn_key(f"{NEDN},RncFunction=RF-1,UtranCell=Gbg-997")
+        == "SubNetwork=CountryNN,MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1,RncFunction=RF-1,UtranCell=Gbg-997"
+    )
+    assert (
+        index.get_dn_key("SubNetwork=1,RncFunction=3,vsDataUtranCell=4")
+        == "SubNetwork=1,RncFunction=3,UtranCell=4"
+    )
+    assert index.get_dn_key(NEDN, ignore_before="MeContext") == (
+        "MeContext=MEC-Gbg1,ManagedElement=RNC-Gbg-1"
+    )
+
+
+def test_build_save_load(tmp_path):
+    """Test index.build, DnIndex.save and DnIndex.load"""
+
+    dn_index = index.build(
+        BULKCM, ["UtranCell.uarfcnDl", "vsDataUtranCell.sectorId", "UtranCell.userLabel"]
+    )
+
+    assert len(dn_index) == 2
+    assert dn_index.attributes == ["uarfcnDl", "sectorId", "userLabel"]
+    assert dn_index.table.column("DN").to_pylist() == sorted(
+        dn_index.table.column("DN").to_pylist()
+    )
+
+    index_path = str(tmp_path / "index.arrow")
+    dn_index.save(index_path)
+    loaded = index.DnIndex.load(index_path)
+
+    assert loaded.table.equals(dn_index.table)
+    assert loaded.values(NEDN, "RncFunction=RF-1,UtranCell=Gbg-998") == [
+        "10812",
+        "2",
+        "Gbg 998",
+    ]
+    assert loaded.values(NEDN, "RncFunction=RF-1,UtranCell=Gbg-999") == [None] * 3
+    assert loaded.lookup(f"{NEDN},RncFunction=RF-1,UtranCell=Gbg-997") == {
+        "uarfcnDl": "10837",
+        "sectorId": None,
+        "userLabel": "Gbg 997",
+    }
+
+    try:
+        index.build(BULKCM, ["uarfcnDl"])
+        assert False
+    except TeedException:
+        pass
+
+
+def test_meas_enrich(tmp_path):
+    """Test the meas consumers enrichment with a DN index"""
+
+    index_path = str(tmp_path / "index.arrow")
+    index.build(BULKCM, ["UtranCell.uarfcnDl", "vsDataUtranCell.sectorId"]).save(
+        index_path
+    )
+
+    meas.parse(
+        "data/mdc_c3_1.xml",
+        str(tmp_path),
+        consume_kwargs={"dn_index": index_path},
+    )
+
+    csv_paths = [
+        file_name for file_name in os.listdir(tmp_path) if file_name.endswith(".csv")
+    ]
+    assert len(csv_paths) == 1
+
+    with open(tmp_path / csv_paths[0], newline="") as csv_file:
+        rows = list(csv.DictReader(csv_file))
+
+    assert [(row["LDN"], row["uarfcnDl"], row["sectorId"]) for row in rows] == [
+        ("RncFunction=RF-1,UtranCell=Gbg-997", "10837", ""),
+        ("RncFunction=RF-1,UtranCell=Gbg-998", "10812", "2"),
+        ("RncFunction=RF-1,UtranCell=Gbg-999", "", ""),
+    ]
+
+    meas.parse(
+        "data/mdc_c3_1.xml",
+        str(tmp_path),
+        consume=meas.consume_to_sqlite,
+        consume_kwargs={"dn_index": index_path},
+    )
+
+    with sqlite3.connect(tmp_path / "meas.sqlite") as connection:
+        assert connection.execute(
+            'SELECT uarfcnDl, sectorId FROM "UtranCell_900" ORDER BY LDN'
+        ).fetchall() == [(10837, None), (10812, 2), (None, None)]